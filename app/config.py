@@ -11,8 +11,11 @@ TEMPLATE_PATH = os.path.join(CONFIG_DIR, 'config.yaml.template')
 INIT_FLAG_PATH = os.path.join(CONFIG_DIR, '.init_complete')
 RESTART_FLAG_PATH = os.path.join(CONFIG_DIR, '.restart_in_progress')
 LAST_SHUTDOWN_PATH = os.path.join(CONFIG_DIR, '.last_shutdown')
-FOLDER_SCAN_CACHE_PATH = os.path.join(CONFIG_DIR, '.folder_scan_cache.json')
+FOLDER_SCAN_CACHE_PATH = os.path.join(CONFIG_DIR, '.folder_scan_cache.bin')
+FOLDER_SCAN_WAL_PATH = os.path.join(CONFIG_DIR, '.folder_scan_cache.wal')
+LEGACY_FOLDER_SCAN_CACHE_PATH = os.path.join(CONFIG_DIR, '.folder_scan_cache.json')
 LOG_FILE_PATH = os.path.join(LOG_DIR, 'gshare_manager.log')
+HISTORY_DB_PATH = os.path.join(CONFIG_DIR, 'history.db')
 
 @dataclass
 class GshareConfig:
@@ -63,16 +66,43 @@ class GshareConfig:
     SMB_LINKS_DIR: str
     ## SMB 공유 모드 (folder: 폴더 단위, file: 파일 단위)
     SMB_SHARE_MODE: str = 'folder'
+    ## SMB 공유 백엔드 (symlink: links_dir에 심볼릭 링크, fuse: links_dir에 허용 목록 FUSE 마운트)
+    SMB_SHARE_BACKEND: str = 'symlink'
+    ## 상위 폴더를 공유하면 그 아래에 따로 공유 중이던 하위 폴더 링크를 제거할지 여부
+    SMB_PRUNE_COVERED_LINKS: bool = False
     
     # 로그 시간대
     TIMEZONE: str = 'Asia/Seoul'
     
     ## SMB 포트
     SMB_PORT: int = 445
+    ## smbstatus 읽기 활동으로 VM 종료 시점 판단 여부
+    SMB_ACTIVITY_ENABLED: bool = True
+    ## 읽기가 끝났다고 판단할 연속 무활동 샘플 수 (CHECK_INTERVAL 단위)
+    SMB_IDLE_SAMPLES: int = 2
+    ## 읽기가 끝났고 유휴 판정도 충족하면 마지막 파일 이벤트 후 유예 시간 없이 종료할지 여부
+    SMB_DRAINED_SKIP_GRACE: bool = False
+    ## VM이 모두 읽은 공유 항목을 VM 종료 전에 개별 해제할지 여부
+    ## (smbstatus 샘플은 CHECK_INTERVAL마다라 폴더 항목은 주로 /api/consumed 콜백으로 해제된다)
+    SMB_RETIRE_CONSUMED: bool = False
+    ## 읽기 완료 후 공유 해제까지 유예 시간(초)
+    SMB_CONSUMED_GRACE: int = 120
     
     # 로그 레벨 설정
     LOG_LEVEL: str = 'INFO'
 
+    # 폴더 스캔 설정
+    ## 전체 스캔 엔진 (find: find 명령, threaded: os.scandir 병렬 탐색)
+    SCAN_ENGINE: str = 'find'
+    ## threaded 엔진의 동시 탐색 스레드 수
+    SCAN_WORKERS: int = 8
+    ## 폴더 스캔 캐시 기록 간격(초) - 이벤트 변경분을 모아 간격당 최대 1회 기록
+    SCAN_CACHE_FLUSH_INTERVAL: float = 5.0
+    ## 마운트 대상 선택 시 직접 변경 확인(디렉토리 조회)을 동시에 수행할 스레드 수
+    MOUNT_PROBE_WORKERS: int = 4
+    ## 직접 변경 확인 시 첫 번째 일치 파일에서 조회 중단 여부
+    MOUNT_PROBE_SHORT_CIRCUIT: bool = True
+
     # NFS 설정
     ## NFS 공유 경로
     NFS_PATH: Optional[str] = None
@@ -99,6 +129,62 @@ class GshareConfig:
     ## 트랜스코딩 완료 파일명
     TRANSCODING_DONE_FILENAME: str = '.transcoding_done'
 
+    # Proxmox API 연결
+    ## keep-alive 연결 풀 크기
+    PROXMOX_POOL_SIZE: int = 8
+    ## 연속 실패 시 회로 차단 기준 횟수
+    PROXMOX_BREAKER_THRESHOLD: int = 3
+    ## 회로 차단 유지 시간(초), 이후 시험 요청 1회 허용
+    PROXMOX_BREAKER_RESET: float = 30.0
+    ## VM 상태(status/current) 조회 보조 전송 대기 시간(초, 0이면 사용 안 함)
+    PROXMOX_HEDGE_DELAY: float = 1.0
+
+    # VM 상태 캐시
+    ## 상태 스냅샷 폴링 간격(초, 웹/상태 계산은 스냅샷만 사용)
+    VM_STATUS_POLL_INTERVAL: float = 5.0
+    ## 평상시 status/current 캐시 TTL(초)
+    PROXMOX_STATUS_TTL: float = 5.0
+    ## start/stop 직후 캐시 TTL(초)
+    PROXMOX_STATUS_TTL_TRANSITION: float = 0.5
+    ## start/stop 후 짧은 TTL을 유지할 시간(초)
+    PROXMOX_STATUS_TRANSITION_WINDOW: float = 60.0
+
+    ## NAS 이벤트를 모아 한 번에 처리할 대기 시간(초, 0이면 이벤트마다 즉시 처리)
+    EVENT_BATCH_WINDOW: float = 1.0
+
+    # VM 세션 기록 (SQLite)
+    HISTORY_ENABLED: bool = True
+    ## 원본 기록 보관 기간(일)
+    HISTORY_RAW_RETENTION_DAYS: int = 7
+    ## 5분 단위 집계 보관 기간(일)
+    HISTORY_ROLLUP_RETENTION_DAYS: int = 365
+
+    # VM 깨우기/재우기 방식
+    ## stop: stop/start, hibernate: suspend todisk/재개 (실패 시 stop/콜드 스타트)
+    VM_LIFECYCLE_MODE: str = 'stop'
+    ## 깨우기 지연 측정용 Android VM 준비 확인 포트 (0이면 Proxmox 작업 완료 시점으로 측정)
+    VM_READY_PORT: int = 5555
+    ## 릴레이 활동 신호 수신 시 VM 사전 기동
+    VM_PREWARM_ENABLED: bool = False
+    ## 사전 기동 최소 간격(초)
+    VM_PREWARM_COOLDOWN: int = 600
+
+    # 유휴 판단 지표
+    ## status: status/current CPU 샘플 연속 횟수, rrddata: 분 단위 CPU/네트워크/디스크 시계열
+    METRICS_SOURCE: str = 'status'
+    ## rrddata 판단 창(초)
+    METRICS_WINDOW: int = 900
+    ## 유휴로 판단할 업로드 처리량 상한(bytes/s)
+    IDLE_NET_THRESHOLD: float = 51200.0
+    ## 유휴로 판단할 디스크 I/O 상한(bytes/s)
+    IDLE_DISK_THRESHOLD: float = 1048576.0
+    ## 마지막 파일 이벤트 수신 후 VM 종료를 유예할 시간(초, 모든 VM 프로필 공통)
+    SHUTDOWN_GRACE: int = 1800
+
+    # 추가 VM 프로필 (하나의 스캔 인덱스/SMB 서버를 여러 VM이 공유, 공유는 프로필마다 따로)
+    ## 각 항목: name, vm_id, node_name, folders, shutdown_webhook_url, cpu_threshold, threshold_count, ready_host, share_name
+    VM_PROFILES: List[Dict[str, Any]] = None
+
     # 이벤트 수신 기반 감시 설정
     MONITOR_MODE: str = 'event'
     EVENT_AUTH_TOKEN: str = ''
@@ -115,6 +201,8 @@ class GshareConfig:
     def __post_init__(self):
         if self.TRANSCODING_RULES is None:
             self.TRANSCODING_RULES = []
+        if self.VM_PROFILES is None:
+            self.VM_PROFILES = []
 
     @classmethod
     def load_config(cls) -> 'GshareConfig':
@@ -178,13 +266,36 @@ class GshareConfig:
             'VM_ID': yaml_config['proxmox'].get('vm_id', ''),
             'ANDROID_VM_IP': yaml_config['proxmox'].get('android_vm_ip', ''),
             'PROXMOX_TIMEOUT': yaml_config['proxmox'].get('timeout') or 5,
+            'PROXMOX_POOL_SIZE': yaml_config['proxmox'].get('pool_size') or 8,
+            'PROXMOX_BREAKER_THRESHOLD': yaml_config['proxmox'].get('breaker_threshold') or 3,
+            'PROXMOX_BREAKER_RESET': yaml_config['proxmox'].get('breaker_reset') or 30.0,
+            'PROXMOX_HEDGE_DELAY': yaml_config['proxmox'].get('hedge_delay', 1.0),
+            'VM_STATUS_POLL_INTERVAL': yaml_config['proxmox'].get('status_poll_interval') or 5.0,
+            'PROXMOX_STATUS_TTL': yaml_config['proxmox'].get('status_ttl') or 5.0,
+            'PROXMOX_STATUS_TTL_TRANSITION': yaml_config['proxmox'].get('status_ttl_transition') or 0.5,
+            'PROXMOX_STATUS_TRANSITION_WINDOW': yaml_config['proxmox'].get('status_transition_window') or 60.0,
             'TOKEN_ID': yaml_config['credentials'].get('token_id', ''),
             'SECRET': yaml_config['credentials'].get('secret', ''),
             'CPU_THRESHOLD': yaml_config['proxmox']['cpu'].get('threshold') or 10.0,
             'CHECK_INTERVAL': yaml_config['proxmox']['cpu'].get('check_interval') or 60,
             'THRESHOLD_COUNT': yaml_config['proxmox']['cpu'].get('threshold_count') or 3,
+            'METRICS_SOURCE': yaml_config['proxmox']['cpu'].get('metrics_source') or 'status',
+            'METRICS_WINDOW': yaml_config['proxmox']['cpu'].get('metrics_window') or 900,
+            'IDLE_NET_THRESHOLD': yaml_config['proxmox']['cpu'].get('net_threshold') or 51200.0,
+            'IDLE_DISK_THRESHOLD': yaml_config['proxmox']['cpu'].get('disk_threshold') or 1048576.0,
+            'SHUTDOWN_GRACE': yaml_config['proxmox']['cpu'].get('shutdown_grace', 1800),
+            'VM_LIFECYCLE_MODE': (yaml_config['proxmox'].get('lifecycle') or {}).get('mode') or 'stop',
+            'VM_READY_PORT': (yaml_config['proxmox'].get('lifecycle') or {}).get('ready_port', 5555),
+            'VM_PREWARM_ENABLED': (yaml_config['proxmox'].get('lifecycle') or {}).get('prewarm', False),
+            'VM_PREWARM_COOLDOWN': (yaml_config['proxmox'].get('lifecycle') or {}).get('prewarm_cooldown') or 600,
+            'VM_PROFILES': yaml_config['proxmox'].get('vm_profiles') or [],
             'MOUNT_PATH': yaml_config['mount'].get('path', '/mnt/gshare'),
             'GET_FOLDER_SIZE_TIMEOUT': yaml_config['mount'].get('folder_size_timeout') or 30,
+            'SCAN_ENGINE': yaml_config['mount'].get('scan_engine') or 'find',
+            'SCAN_WORKERS': yaml_config['mount'].get('scan_workers') or 8,
+            'SCAN_CACHE_FLUSH_INTERVAL': yaml_config['mount'].get('scan_cache_flush_interval') or 5.0,
+            'MOUNT_PROBE_WORKERS': yaml_config['mount'].get('probe_workers') or 4,
+            'MOUNT_PROBE_SHORT_CIRCUIT': yaml_config['mount'].get('probe_short_circuit', True),
             'SHUTDOWN_WEBHOOK_URL': yaml_config['credentials'].get('shutdown_webhook_url', ''),
             'SMB_SHARE_NAME': yaml_config['smb'].get('share_name', 'gshare'),
             'SMB_USERNAME': yaml_config['credentials'].get('smb_username', ''),
@@ -194,7 +305,14 @@ class GshareConfig:
             'SMB_READ_ONLY': yaml_config['smb'].get('read_only', True),
             'SMB_LINKS_DIR': yaml_config['smb'].get('links_dir', '/mnt/gshare_links'),
             'SMB_SHARE_MODE': yaml_config['smb'].get('share_mode', 'folder'),
+            'SMB_SHARE_BACKEND': yaml_config['smb'].get('share_backend') or 'symlink',
+            'SMB_PRUNE_COVERED_LINKS': yaml_config['smb'].get('prune_covered_links', False),
             'SMB_PORT': yaml_config['smb'].get('port') or 445,
+            'SMB_ACTIVITY_ENABLED': yaml_config['smb'].get('activity_probe', True),
+            'SMB_IDLE_SAMPLES': yaml_config['smb'].get('idle_samples') or 2,
+            'SMB_DRAINED_SKIP_GRACE': yaml_config['smb'].get('drained_skip_grace', False),
+            'SMB_RETIRE_CONSUMED': yaml_config['smb'].get('retire_consumed', False),
+            'SMB_CONSUMED_GRACE': yaml_config['smb'].get('consumed_grace', 120),
             'TIMEZONE': yaml_config.get('timezone') or 'Asia/Seoul',
             'LOG_LEVEL': log_level,
             'MQTT_BROKER': yaml_config['mqtt'].get('broker', ''),
@@ -207,6 +325,10 @@ class GshareConfig:
             'TRANSCODING_RULES': yaml_config.get('transcoding', {}).get('rules', []),
             'TRANSCODING_DONE_FILENAME': yaml_config.get('transcoding', {}).get('done_filename', '.transcoding_done'),
             'MONITOR_MODE': yaml_config.get('monitoring', {}).get('mode', 'event'),
+            'EVENT_BATCH_WINDOW': float(yaml_config.get('monitoring', {}).get('event_batch_window', 1.0)),
+            'HISTORY_ENABLED': yaml_config.get('monitoring', {}).get('history_enabled', True),
+            'HISTORY_RAW_RETENTION_DAYS': yaml_config.get('monitoring', {}).get('history_raw_days') or 7,
+            'HISTORY_ROLLUP_RETENTION_DAYS': yaml_config.get('monitoring', {}).get('history_rollup_days') or 365,
             'EVENT_AUTH_TOKEN': yaml_config.get('credentials', {}).get('event_auth_token', ''),
             'GSHARE_ENABLED': yaml_config.get('features', {}).get('gshare_enabled', True),
             'MQTT_ENABLED': yaml_config.get('features', {}).get('mqtt_enabled', True),
@@ -281,16 +403,65 @@ class GshareConfig:
             yaml_config["proxmox"]["android_vm_ip"] = config_dict["ANDROID_VM_IP"]
         if "PROXMOX_TIMEOUT" in config_dict and str(config_dict["PROXMOX_TIMEOUT"]).strip():
             yaml_config["proxmox"]["timeout"] = int(config_dict["PROXMOX_TIMEOUT"])
+        if 'PROXMOX_POOL_SIZE' in config_dict and str(config_dict['PROXMOX_POOL_SIZE']).strip():
+            yaml_config['proxmox']['pool_size'] = int(config_dict['PROXMOX_POOL_SIZE'])
+        if 'PROXMOX_BREAKER_THRESHOLD' in config_dict and str(config_dict['PROXMOX_BREAKER_THRESHOLD']).strip():
+            yaml_config['proxmox']['breaker_threshold'] = int(config_dict['PROXMOX_BREAKER_THRESHOLD'])
+        if 'PROXMOX_BREAKER_RESET' in config_dict and str(config_dict['PROXMOX_BREAKER_RESET']).strip():
+            yaml_config['proxmox']['breaker_reset'] = float(config_dict['PROXMOX_BREAKER_RESET'])
+        if 'PROXMOX_HEDGE_DELAY' in config_dict and str(config_dict['PROXMOX_HEDGE_DELAY']).strip():
+            yaml_config['proxmox']['hedge_delay'] = float(config_dict['PROXMOX_HEDGE_DELAY'])
+        if 'VM_STATUS_POLL_INTERVAL' in config_dict and str(config_dict['VM_STATUS_POLL_INTERVAL']).strip():
+            yaml_config['proxmox']['status_poll_interval'] = float(config_dict['VM_STATUS_POLL_INTERVAL'])
+        if 'PROXMOX_STATUS_TTL' in config_dict and str(config_dict['PROXMOX_STATUS_TTL']).strip():
+            yaml_config['proxmox']['status_ttl'] = float(config_dict['PROXMOX_STATUS_TTL'])
+        if 'PROXMOX_STATUS_TTL_TRANSITION' in config_dict and str(config_dict['PROXMOX_STATUS_TTL_TRANSITION']).strip():
+            yaml_config['proxmox']['status_ttl_transition'] = float(config_dict['PROXMOX_STATUS_TTL_TRANSITION'])
+        if 'PROXMOX_STATUS_TRANSITION_WINDOW' in config_dict and str(config_dict['PROXMOX_STATUS_TRANSITION_WINDOW']).strip():
+            yaml_config['proxmox']['status_transition_window'] = float(config_dict['PROXMOX_STATUS_TRANSITION_WINDOW'])
         if 'CPU_THRESHOLD' in config_dict and str(config_dict['CPU_THRESHOLD']).strip():
             yaml_config['proxmox']['cpu']['threshold'] = float(config_dict['CPU_THRESHOLD'])
         if 'CHECK_INTERVAL' in config_dict and str(config_dict['CHECK_INTERVAL']).strip():
             yaml_config['proxmox']['cpu']['check_interval'] = int(config_dict['CHECK_INTERVAL'])
         if 'THRESHOLD_COUNT' in config_dict and str(config_dict['THRESHOLD_COUNT']).strip():
             yaml_config['proxmox']['cpu']['threshold_count'] = int(config_dict['THRESHOLD_COUNT'])
+        if 'METRICS_SOURCE' in config_dict:
+            yaml_config['proxmox']['cpu']['metrics_source'] = config_dict['METRICS_SOURCE']
+        if 'METRICS_WINDOW' in config_dict and str(config_dict['METRICS_WINDOW']).strip():
+            yaml_config['proxmox']['cpu']['metrics_window'] = int(config_dict['METRICS_WINDOW'])
+        if 'IDLE_NET_THRESHOLD' in config_dict and str(config_dict['IDLE_NET_THRESHOLD']).strip():
+            yaml_config['proxmox']['cpu']['net_threshold'] = float(config_dict['IDLE_NET_THRESHOLD'])
+        if 'IDLE_DISK_THRESHOLD' in config_dict and str(config_dict['IDLE_DISK_THRESHOLD']).strip():
+            yaml_config['proxmox']['cpu']['disk_threshold'] = float(config_dict['IDLE_DISK_THRESHOLD'])
+        if 'SHUTDOWN_GRACE' in config_dict and str(config_dict['SHUTDOWN_GRACE']).strip():
+            yaml_config['proxmox']['cpu']['shutdown_grace'] = int(config_dict['SHUTDOWN_GRACE'])
+        if any(key in config_dict for key in ('VM_LIFECYCLE_MODE', 'VM_READY_PORT', 'VM_PREWARM_ENABLED', 'VM_PREWARM_COOLDOWN')):
+            if not isinstance(yaml_config['proxmox'].get('lifecycle'), dict):
+                yaml_config['proxmox']['lifecycle'] = {}
+        if 'VM_LIFECYCLE_MODE' in config_dict:
+            yaml_config['proxmox']['lifecycle']['mode'] = config_dict['VM_LIFECYCLE_MODE']
+        if 'VM_READY_PORT' in config_dict and str(config_dict['VM_READY_PORT']).strip():
+            yaml_config['proxmox']['lifecycle']['ready_port'] = int(config_dict['VM_READY_PORT'])
+        if 'VM_PREWARM_ENABLED' in config_dict:
+            yaml_config['proxmox']['lifecycle']['prewarm'] = config_dict['VM_PREWARM_ENABLED'] in (True, 'yes', 'true')
+        if 'VM_PREWARM_COOLDOWN' in config_dict and str(config_dict['VM_PREWARM_COOLDOWN']).strip():
+            yaml_config['proxmox']['lifecycle']['prewarm_cooldown'] = int(config_dict['VM_PREWARM_COOLDOWN'])
+        if 'VM_PROFILES' in config_dict:
+            yaml_config['proxmox']['vm_profiles'] = config_dict['VM_PROFILES'] or []
         if 'MOUNT_PATH' in config_dict:
             yaml_config['mount']['path'] = config_dict['MOUNT_PATH']
         if 'GET_FOLDER_SIZE_TIMEOUT' in config_dict and str(config_dict['GET_FOLDER_SIZE_TIMEOUT']).strip():
             yaml_config['mount']['folder_size_timeout'] = int(config_dict['GET_FOLDER_SIZE_TIMEOUT'])
+        if 'SCAN_ENGINE' in config_dict:
+            yaml_config['mount']['scan_engine'] = config_dict['SCAN_ENGINE']
+        if 'SCAN_WORKERS' in config_dict and str(config_dict['SCAN_WORKERS']).strip():
+            yaml_config['mount']['scan_workers'] = int(config_dict['SCAN_WORKERS'])
+        if 'SCAN_CACHE_FLUSH_INTERVAL' in config_dict and str(config_dict['SCAN_CACHE_FLUSH_INTERVAL']).strip():
+            yaml_config['mount']['scan_cache_flush_interval'] = float(config_dict['SCAN_CACHE_FLUSH_INTERVAL'])
+        if 'MOUNT_PROBE_WORKERS' in config_dict and str(config_dict['MOUNT_PROBE_WORKERS']).strip():
+            yaml_config['mount']['probe_workers'] = int(config_dict['MOUNT_PROBE_WORKERS'])
+        if 'MOUNT_PROBE_SHORT_CIRCUIT' in config_dict:
+            yaml_config['mount']['probe_short_circuit'] = config_dict['MOUNT_PROBE_SHORT_CIRCUIT'] in (True, 'yes', 'true')
         if 'SMB_SHARE_NAME' in config_dict:
             yaml_config['smb']['share_name'] = config_dict['SMB_SHARE_NAME']
         if 'SMB_COMMENT' in config_dict:
@@ -303,8 +474,22 @@ class GshareConfig:
             yaml_config['smb']['links_dir'] = config_dict['SMB_LINKS_DIR']
         if 'SMB_SHARE_MODE' in config_dict:
             yaml_config['smb']['share_mode'] = config_dict['SMB_SHARE_MODE']
+        if 'SMB_SHARE_BACKEND' in config_dict:
+            yaml_config['smb']['share_backend'] = config_dict['SMB_SHARE_BACKEND']
+        if 'SMB_PRUNE_COVERED_LINKS' in config_dict:
+            yaml_config['smb']['prune_covered_links'] = config_dict['SMB_PRUNE_COVERED_LINKS'] in (True, 'yes', 'true')
         if 'SMB_PORT' in config_dict and str(config_dict['SMB_PORT']).strip():
             yaml_config['smb']['port'] = int(config_dict['SMB_PORT'])
+        if 'SMB_ACTIVITY_ENABLED' in config_dict:
+            yaml_config['smb']['activity_probe'] = config_dict['SMB_ACTIVITY_ENABLED'] in (True, 'yes', 'true')
+        if 'SMB_IDLE_SAMPLES' in config_dict and str(config_dict['SMB_IDLE_SAMPLES']).strip():
+            yaml_config['smb']['idle_samples'] = int(config_dict['SMB_IDLE_SAMPLES'])
+        if 'SMB_DRAINED_SKIP_GRACE' in config_dict:
+            yaml_config['smb']['drained_skip_grace'] = config_dict['SMB_DRAINED_SKIP_GRACE'] in (True, 'yes', 'true')
+        if 'SMB_RETIRE_CONSUMED' in config_dict:
+            yaml_config['smb']['retire_consumed'] = config_dict['SMB_RETIRE_CONSUMED'] in (True, 'yes', 'true')
+        if 'SMB_CONSUMED_GRACE' in config_dict and str(config_dict['SMB_CONSUMED_GRACE']).strip():
+            yaml_config['smb']['consumed_grace'] = int(config_dict['SMB_CONSUMED_GRACE'])
         if 'TIMEZONE' in config_dict:
             yaml_config['timezone'] = config_dict['TIMEZONE']
         # 로그 레벨 업데이트
@@ -343,6 +528,14 @@ class GshareConfig:
 
         if 'MONITOR_MODE' in config_dict:
             yaml_config['monitoring']['mode'] = config_dict['MONITOR_MODE']
+        if 'EVENT_BATCH_WINDOW' in config_dict and str(config_dict['EVENT_BATCH_WINDOW']).strip():
+            yaml_config['monitoring']['event_batch_window'] = float(config_dict['EVENT_BATCH_WINDOW'])
+        if 'HISTORY_ENABLED' in config_dict:
+            yaml_config['monitoring']['history_enabled'] = config_dict['HISTORY_ENABLED'] in (True, 'yes', 'true')
+        if 'HISTORY_RAW_RETENTION_DAYS' in config_dict and str(config_dict['HISTORY_RAW_RETENTION_DAYS']).strip():
+            yaml_config['monitoring']['history_raw_days'] = int(config_dict['HISTORY_RAW_RETENTION_DAYS'])
+        if 'HISTORY_ROLLUP_RETENTION_DAYS' in config_dict and str(config_dict['HISTORY_ROLLUP_RETENTION_DAYS']).strip():
+            yaml_config['monitoring']['history_rollup_days'] = int(config_dict['HISTORY_ROLLUP_RETENTION_DAYS'])
         
         # NFS 설정 저장
         if 'NFS_PATH' in config_dict:
@@ -414,12 +607,22 @@ class GshareConfig:
         
         # 템플릿 파일이 없으면 기본 설정 반환
         return {
-            'proxmox': {'node_name': '', 'vm_id': '', 'android_vm_ip': '', 'timeout': 5, 'cpu': {'threshold': 10.0, 'check_interval': 60, 'threshold_count': 3}},
-            'mount': {'path': '/mnt/gshare', 'folder_size_timeout': 30},
-            'smb': {'share_name': 'gshare', 'comment': 'GShare SMB 공유', 'guest_ok': False, 'read_only': True, 'links_dir': '/mnt/gshare_links', 'port': 445, 'share_mode': 'folder'},
+            'proxmox': {'node_name': '', 'vm_id': '', 'android_vm_ip': '', 'timeout': 5,
+                        'pool_size': 8, 'breaker_threshold': 3, 'breaker_reset': 30.0, 'hedge_delay': 1.0,
+                        'status_poll_interval': 5.0, 'status_ttl': 5.0, 'status_ttl_transition': 0.5, 'status_transition_window': 60.0,
+                        'cpu': {'threshold': 10.0, 'check_interval': 60, 'threshold_count': 3,
+                                'metrics_source': 'status', 'metrics_window': 900,
+                                'net_threshold': 51200.0, 'disk_threshold': 1048576.0, 'shutdown_grace': 1800},
+                        'lifecycle': {'mode': 'stop', 'ready_port': 5555, 'prewarm': False, 'prewarm_cooldown': 600},
+                        'vm_profiles': []},
+            'mount': {'path': '/mnt/gshare', 'folder_size_timeout': 30, 'scan_engine': 'find', 'scan_workers': 8,
+                      'scan_cache_flush_interval': 5.0, 'probe_workers': 4, 'probe_short_circuit': True},
+            'smb': {'share_name': 'gshare', 'comment': 'GShare SMB 공유', 'guest_ok': False, 'read_only': True, 'links_dir': '/mnt/gshare_links', 'port': 445, 'share_mode': 'folder', 'share_backend': 'symlink', 'prune_covered_links': False,
+                    'activity_probe': True, 'idle_samples': 2, 'drained_skip_grace': False, 'retire_consumed': False, 'consumed_grace': 120},
             'nfs': {'path': ''},
             'mqtt': {'broker': '', 'port': 1883, 'topic_prefix': 'gshare', 'ha_discovery_prefix': 'homeassistant'},
-            'monitoring': {'mode': 'event'},
+            'monitoring': {'mode': 'event', 'event_batch_window': 1.0,
+                           'history_enabled': True, 'history_raw_days': 7, 'history_rollup_days': 365},
             'credentials': {'proxmox_host': '', 'token_id': '', 'secret': '', 'shutdown_webhook_url': '', 'smb_username': '', 'smb_password': '', 'mqtt_username': '', 'mqtt_password': '', 'event_auth_token': ''},
             'timezone': 'Asia/Seoul',
             'transcoding': {'enabled': False, 'rules': []},
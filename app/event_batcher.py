@@ -0,0 +1,56 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class FolderEventBatch:
+    """대기 시간 동안 모인 폴더 이벤트 묶음"""
+    # 폴더 -> 이벤트로 전달된 파일명 집합 (파일명 없이 온 이벤트만 있으면 빈 집합)
+    folders: dict[str, set] = field(default_factory=dict)
+    # 묶음의 첫 이벤트 수신 시각 (VM 깨우기 지연 측정 기준)
+    first_event_at: float = 0.0
+    # 병합 전 이벤트 수
+    event_count: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.folders)
+
+
+class FolderEventBatcher:
+    """NAS 이벤트 폭주 시 짧은 대기 시간 동안 이벤트를 하나의 묶음으로 병합
+
+    add()는 잠금 하나로 집합에 넣고 바로 반환하며, 묶음의 첫 이벤트일 때만 True를 돌려
+    호출자가 처리 타이머를 한 번만 예약하게 한다. drain()은 모인 묶음을 꺼내 비운다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batch = FolderEventBatch()
+        self.batches = 0
+        self.merged_events = 0
+
+    def add(self, folder: str, file_name: Optional[str] = None) -> bool:
+        """이벤트를 묶음에 추가 (새 묶음이 시작되었으면 True)"""
+        with self._lock:
+            first = not self._batch
+            if first:
+                self._batch.first_event_at = time.time()
+            files = self._batch.folders.setdefault(folder, set())
+            if file_name:
+                files.add(file_name)
+            self._batch.event_count += 1
+            return first
+
+    def drain(self) -> FolderEventBatch:
+        with self._lock:
+            batch, self._batch = self._batch, FolderEventBatch()
+        if batch:
+            self.batches += 1
+            self.merged_events += batch.event_count
+        return batch
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._batch.event_count
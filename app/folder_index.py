@@ -0,0 +1,261 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+
+# 마운트 경로(cwd)에서 실행하는 전체 폴더 스캔 find 명령
+# -printf '%T@\t%P\n'
+#   %T@: Epoch seconds (float 형태)
+#   \t: 탭 구분자
+#   %P: 검색 시작점('.')을 제외한 상대 경로
+FIND_FOLDER_CMD = [
+    'find', '.',
+    '-mindepth', '1',
+    '-type', 'd',
+    '(',
+    '-name', '@*', '-o',
+    '-name', '.*', '-o',
+    '-name', '#recycle',
+    ')',
+    '-prune',
+    '-o',
+    '-type', 'd',
+    '-printf', r'%T@\t%P\n'
+]
+
+
+def is_pruned_dir_name(name: str) -> bool:
+    """find 스캔과 동일한 제외 규칙(@*, .*, #recycle)에 해당하는 디렉토리 이름인지 확인"""
+    return name.startswith('@') or name.startswith('.') or name == '#recycle'
+
+
+def parse_find_record(line: str) -> Optional[tuple[float, str]]:
+    """FIND_FOLDER_CMD 출력 한 줄을 (mtime, 상대경로)로 변환 (형식이 맞지 않으면 None)"""
+    parts = line.rstrip('\n').split('\t', 1)
+    if len(parts) != 2 or not parts[1]:
+        return None
+    try:
+        return float(parts[0]), parts[1]
+    except ValueError:
+        return None
+
+
+class FolderIndex:
+    """마운트 경로의 디렉토리 트리를 경로 키로 유지하는 증분 인덱스
+
+    각 디렉토리의 부모 포인터와 마지막으로 확인한 mtime을 보관한다.
+    하위 항목이 추가/삭제/이름 변경되면 부모 디렉토리의 mtime이 바뀌므로,
+    mtime이 바뀐 디렉토리만 다시 listdir 하여 트리 구조를 갱신한다.
+    """
+
+    ROOT = ''
+
+    def __init__(self, root_path: str, workers: int = 1):
+        self.root_path = root_path
+        self.workers = max(1, int(workers))
+        self._mtimes: dict[str, float] = {}
+        self._parents: dict[str, str] = {}
+        self._children: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        # rebuild()마다 증가 (잠금 밖에서 수집한 refresh 결과가 유효한지 확인)
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return max(0, len(self._mtimes) - (1 if self.ROOT in self._mtimes else 0))
+
+    @property
+    def is_empty(self) -> bool:
+        return self.ROOT not in self._mtimes
+
+    def _full_path(self, path: str) -> str:
+        return os.path.join(self.root_path, path) if path else self.root_path
+
+    @staticmethod
+    def _parent_of(path: str) -> str:
+        return path.rsplit('/', 1)[0] if '/' in path else FolderIndex.ROOT
+
+    @staticmethod
+    def _join(parent: str, name: str) -> str:
+        return f"{parent}/{name}" if parent else name
+
+    def rebuild(self, scan: dict[str, float]) -> None:
+        """전체 스캔(find) 결과로 인덱스를 다시 구성한다."""
+        with self._lock:
+            # 루트 mtime은 0으로 두어 다음 refresh에서 최상위 목록을 1회 재검증한다.
+            # (find 실행 도중 생성된 최상위 폴더를 놓치지 않기 위함)
+            mtimes: dict[str, float] = {self.ROOT: 0.0}
+            parents: dict[str, str] = {}
+            children: dict[str, set[str]] = {self.ROOT: set()}
+
+            for path, mtime in scan.items():
+                mtimes[path] = mtime
+                children.setdefault(path, set())
+
+            for path in scan:
+                parent = self._parent_of(path)
+                parents[path] = parent
+                children.setdefault(parent, set()).add(path)
+                if parent not in mtimes:
+                    # 부모가 스캔 결과에 없으면(경쟁 상태 등) 0으로 두어 다음 refresh에서 재검증
+                    mtimes[parent] = 0.0
+
+            self._mtimes = mtimes
+            self._parents = parents
+            self._children = children
+            self._generation += 1
+        logging.debug(f"폴더 인덱스 재구성 완료: {len(self)}개")
+
+    def _list_subdirs(self, path: str) -> dict[str, float]:
+        """디렉토리의 하위 폴더 {경로: mtime} (제외 규칙 적용, 잠금 없이 호출)"""
+        current: dict[str, float] = {}
+        with os.scandir(self._full_path(path)) as it:
+            for entry in it:
+                if is_pruned_dir_name(entry.name):
+                    continue
+                try:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    current[self._join(path, entry.name)] = entry.stat(follow_symlinks=False).st_mtime
+                except OSError:
+                    continue
+        return current
+
+    def _walk_subtree(self, path: str, mtime: float) -> list[tuple[str, float]]:
+        """새로 발견된 디렉토리와 그 하위 트리 전체의 (경로, mtime) 목록 (잠금 없이 호출)
+
+        하위 목록 조회에 실패한 디렉토리는 mtime 0.0으로 넣어 다음 refresh에서 다시 listdir 하게 한다.
+        """
+        entries: list[tuple[str, float]] = []
+        stack = [(path, mtime)]
+        while stack:
+            current, current_mtime = stack.pop()
+            try:
+                stack.extend(self._list_subdirs(current).items())
+            except OSError as e:
+                logging.debug(f"새 폴더 하위 목록 조회 실패(다음 refresh에서 재시도): {current} - {e}")
+                current_mtime = 0.0
+            entries.append((current, current_mtime))
+        return entries
+
+    def _stat_chunk(self, paths: list[str]) -> dict[str, Optional[float]]:
+        """경로별 mtime (사라진 경로는 None, 그 밖의 stat 실패는 결과에서 제외)"""
+        result: dict[str, Optional[float]] = {}
+        for path in paths:
+            try:
+                result[path] = os.stat(self._full_path(path)).st_mtime
+            except FileNotFoundError:
+                result[path] = None
+            except OSError as e:
+                logging.debug(f"폴더 인덱스 stat 실패(무시): {path} - {e}")
+        return result
+
+    def _stat_all(self, paths: list[str]) -> dict[str, Optional[float]]:
+        """인덱스의 모든 디렉토리를 stat (workers개 묶음으로 나눠 동시에 수행)"""
+        if self.workers <= 1 or len(paths) < self.workers:
+            return self._stat_chunk(paths)
+        chunks = [paths[i::self.workers] for i in range(self.workers)]
+        result: dict[str, Optional[float]] = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='folder-index') as executor:
+            for part in executor.map(self._stat_chunk, chunks):
+                result.update(part)
+        return result
+
+    def _insert(self, entries: list[tuple[str, float]], changed: dict[str, float]) -> None:
+        """_walk_subtree 결과를 인덱스에 추가 (잠금 안에서 호출, mtime 0.0은 다시 listdir 할 때 변경으로 보고)"""
+        for path, mtime in entries:
+            self._mtimes[path] = mtime
+            self._children.setdefault(path, set())
+            parent = self._parent_of(path)
+            self._parents[path] = parent
+            self._children.setdefault(parent, set()).add(path)
+            if mtime:
+                changed[path] = mtime
+
+    def _remove_subtree(self, path: str, deleted: list[str]) -> None:
+        """디렉토리와 그 하위 트리 전체를 인덱스에서 제거"""
+        parent = self._parents.pop(path, None)
+        if parent is not None and parent in self._children:
+            self._children[parent].discard(path)
+
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            stack.extend(self._children.pop(current, ()))
+            self._parents.pop(current, None)
+            if self._mtimes.pop(current, None) is not None and current != self.ROOT:
+                deleted.append(current)
+
+    def refresh(self) -> tuple[dict[str, float], list[str]]:
+        """인덱스의 디렉토리를 stat하여 변경분만 반영한다.
+
+        파일 추가는 해당 디렉토리의 mtime만 바꾸므로 모든 디렉토리의 stat은 필요하지만,
+        비싼 listdir(NFS READDIR)은 mtime이 바뀐 디렉토리에서만 수행한다.
+        stat/listdir은 잠금 밖에서 수행하고, 결과 반영만 잠금 안에서 한다.
+
+        Returns:
+            (새로 발견되었거나 mtime이 바뀐 폴더 {경로: mtime}, 삭제된 폴더 경로 목록)
+        """
+        changed: dict[str, float] = {}
+        deleted: list[str] = []
+
+        with self._lock:
+            if self.is_empty:
+                return changed, deleted
+            known = dict(self._mtimes)
+            generation = self._generation
+
+        stats = self._stat_all(list(known))
+        if self.ROOT in stats and stats[self.ROOT] is None:
+            logging.warning(f"폴더 인덱스 루트가 존재하지 않습니다: {self.root_path}")
+            return changed, deleted
+
+        # mtime이 바뀐 디렉토리만 다시 listdir 하고, 새 하위 폴더는 트리 전체를 미리 탐색
+        listings: dict[str, Optional[dict[str, float]]] = {}
+        subtrees: dict[str, list[tuple[str, float]]] = {}
+        for path, mtime in stats.items():
+            if mtime is None or mtime == known[path]:
+                continue
+            try:
+                listings[path] = self._list_subdirs(path)
+            except OSError as e:
+                logging.debug(f"폴더 인덱스 listdir 실패(무시): {path} - {e}")
+                listings[path] = None
+                continue
+            for child, child_mtime in listings[path].items():
+                if child not in known:
+                    subtrees[child] = self._walk_subtree(child, child_mtime)
+
+        with self._lock:
+            if generation != self._generation:
+                # 탐색 도중 전체 스캔으로 인덱스가 재구성됨 (이번 결과는 버림)
+                return {}, []
+
+            for path, mtime in stats.items():
+                if path not in self._mtimes:
+                    # 상위 디렉토리 삭제 처리 과정에서 이미 제거됨
+                    continue
+                if mtime is None:
+                    self._remove_subtree(path, deleted)
+                    continue
+                if mtime == self._mtimes[path]:
+                    continue
+                listing = listings.get(path)
+                if listing is None:
+                    # listdir 실패: 이전 mtime을 유지해 다음 refresh에서 다시 listdir 한다.
+                    continue
+
+                self._mtimes[path] = mtime
+                if path != self.ROOT:
+                    changed[path] = mtime
+                known_children = self._children.setdefault(path, set())
+                for child in known_children - set(listing):
+                    self._remove_subtree(child, deleted)
+                for child in set(listing) - known_children:
+                    self._insert(subtrees.get(child) or [(child, listing[child])], changed)
+
+        return changed, deleted
+
+    def get_mtime(self, path: str) -> Optional[float]:
+        return self._mtimes.get(path)
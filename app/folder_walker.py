@@ -0,0 +1,67 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterator, Optional
+
+from folder_index import is_pruned_dir_name
+
+
+class ParallelFolderWalker:
+    """os.scandir 기반 병렬 디렉토리 탐색기 (find 스캔 엔진 대체)
+
+    NFS에서는 디렉토리당 왕복 지연(READDIR/GETATTR)이 스캔 시간을 지배하므로,
+    형제 서브트리를 제한된 스레드 풀에서 동시에 탐색해 전체 소요 시간을 줄인다.
+    find 스캔과 동일하게 (mtime, 상대경로) 레코드를 생성하고 같은 제외 규칙을 적용한다.
+    """
+
+    def __init__(self, root_path: str, max_workers: int = 8,
+                 cancel_event: Optional[threading.Event] = None):
+        self.root_path = root_path
+        self.max_workers = max(1, int(max_workers))
+        self.cancel_event = cancel_event or threading.Event()
+        self.error_count = 0
+        # 작업 스레드들이 동시에 error_count를 올리므로 잠금으로 보호
+        self._error_lock = threading.Lock()
+
+    def _list_directory(self, rel_path: str) -> tuple[list[tuple[float, str]], list[str]]:
+        """디렉토리 1개의 하위 폴더 레코드와 다음에 탐색할 하위 경로 목록을 반환"""
+        records: list[tuple[float, str]] = []
+        full_path = os.path.join(self.root_path, rel_path) if rel_path else self.root_path
+        try:
+            with os.scandir(full_path) as it:
+                for entry in it:
+                    if is_pruned_dir_name(entry.name):
+                        continue
+                    try:
+                        if not entry.is_dir(follow_symlinks=False):
+                            continue
+                        mtime = entry.stat(follow_symlinks=False).st_mtime
+                    except OSError:
+                        continue
+                    records.append((mtime, f"{rel_path}/{entry.name}" if rel_path else entry.name))
+        except OSError as e:
+            with self._error_lock:
+                self.error_count += 1
+            logging.debug(f"디렉토리 탐색 실패(무시): {full_path} - {e}")
+        return records, [path for _, path in records]
+
+    def iter_records(self) -> Iterator[tuple[float, str]]:
+        """탐색이 끝난 디렉토리부터 (mtime, 상대경로) 레코드를 순서 없이 반환"""
+        self.error_count = 0
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='folder-walker')
+        try:
+            pending = {executor.submit(self._list_directory, '')}
+            while pending:
+                if self.cancel_event.is_set():
+                    break
+
+                # 취소 신호를 주기적으로 확인하기 위해 짧은 timeout으로 대기
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    records, subdirs = future.result()
+                    for subdir in subdirs:
+                        pending.add(executor.submit(self._list_directory, subdir))
+                    yield from records
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
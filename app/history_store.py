@@ -0,0 +1,205 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+
+class HistoryStore:
+    """VM 세션/CPU 샘플/이벤트/공유 기록을 보관하는 SQLite 시계열 저장소
+
+    - 기록은 큐에 넣고 백그라운드 스레드가 묶어서 쓰므로 모니터 루프가 디스크 I/O를 기다리지 않는다.
+    - 원본(events)은 raw_retention_days 동안, ROLLUP_SECONDS 단위 집계(rollups)는
+      rollup_retention_days 동안 보관한다.
+    - VM 시작/종료 기록은 세션 계산에 필요하므로 원본 정리 대상에서 제외한다.
+    """
+
+    KIND_VM_START = 'vm_start'
+    KIND_VM_STOP = 'vm_stop'
+    KIND_CPU = 'cpu'
+    KIND_FOLDER_EVENT = 'folder_event'
+    KIND_SHARE = 'share'
+    KIND_UNSHARE = 'unshare'
+    # 원본 정리에서 제외하는 종류 (세션 계산용)
+    SESSION_KINDS = (KIND_VM_START, KIND_VM_STOP)
+    # vm 열이 없던 기록은 기본 VM 기록으로 본다.
+    DEFAULT_VM = 'primary'
+
+    ROLLUP_SECONDS = 300
+    # 오래된 기록 정리 간격(초)
+    PRUNE_INTERVAL = 3600
+
+    def __init__(self, path: str, raw_retention_days: int = 7, rollup_retention_days: int = 365):
+        self.path = path
+        self.raw_retention = raw_retention_days * 86400
+        self.rollup_retention = rollup_retention_days * 86400
+        self._queue: queue.Queue = queue.Queue()
+        self._last_prune = 0.0
+        self._init_schema()
+        self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_schema(self) -> None:
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS events (
+                ts REAL NOT NULL, kind TEXT NOT NULL, value REAL, detail TEXT)""")
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(events)")}
+            if 'vm' not in columns:
+                conn.execute("ALTER TABLE events ADD COLUMN vm TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_events_kind_ts ON events(kind, ts)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS rollups (
+                bucket INTEGER NOT NULL, kind TEXT NOT NULL, count INTEGER NOT NULL,
+                sum REAL NOT NULL, min REAL NOT NULL, max REAL NOT NULL,
+                PRIMARY KEY (bucket, kind))""")
+
+    def record(self, kind: str, value: Optional[float] = None, detail: Optional[str] = None,
+               ts: Optional[float] = None, vm: Optional[str] = None) -> None:
+        """기록 추가 (비동기, 즉시 반환). vm은 VM 시작/종료 기록의 프로필 이름"""
+        self._queue.put((ts or time.time(), kind, value, detail, vm))
+
+    def close(self) -> None:
+        """남은 기록을 모두 쓰고 쓰기 스레드를 종료"""
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+
+    def _run(self) -> None:
+        conn = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                stop = False
+                # 한 번에 쌓인 기록을 같은 트랜잭션으로 묶는다.
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                try:
+                    self._write(conn, batch)
+                    self._prune(conn)
+                except sqlite3.Error as e:
+                    logging.error(f"기록 저장 실패: {e}")
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, batch: list[tuple]) -> None:
+        with conn:
+            conn.executemany("INSERT INTO events (ts, kind, value, detail, vm) VALUES (?, ?, ?, ?, ?)", batch)
+            conn.executemany(
+                """INSERT INTO rollups (bucket, kind, count, sum, min, max) VALUES (?, ?, 1, ?, ?, ?)
+                   ON CONFLICT(bucket, kind) DO UPDATE SET
+                     count = count + 1, sum = sum + excluded.sum,
+                     min = MIN(min, excluded.min), max = MAX(max, excluded.max)""",
+                [(int(ts // self.ROLLUP_SECONDS) * self.ROLLUP_SECONDS, kind, v, v, v)
+                 for ts, kind, value, _, _ in batch
+                 for v in (1.0 if value is None else float(value),)])
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        now = time.time()
+        if now - self._last_prune < self.PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        with conn:
+            conn.execute(f"DELETE FROM events WHERE ts < ? AND kind NOT IN ({','.join('?' * len(self.SESSION_KINDS))})",
+                         (now - self.raw_retention, *self.SESSION_KINDS))
+            conn.execute("DELETE FROM rollups WHERE bucket < ?", (now - self.rollup_retention,))
+
+    def query(self, start: float, end: float, kinds: Optional[list[str]] = None,
+              limit: int = 5000) -> list[dict[str, Any]]:
+        """원본 기록 범위 조회 (시간순)"""
+        sql = "SELECT ts, kind, value, detail, vm FROM events WHERE ts >= ? AND ts < ?"
+        args: list[Any] = [start, end]
+        if kinds:
+            sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+            args.extend(kinds)
+        sql += " ORDER BY ts LIMIT ?"
+        args.append(limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, args)]
+
+    def rollups(self, start: float, end: float, kinds: Optional[list[str]] = None,
+                step: int = ROLLUP_SECONDS) -> list[dict[str, Any]]:
+        """집계 조회: step(ROLLUP_SECONDS의 배수) 단위로 다시 묶어 count/avg/min/max 반환"""
+        step = max(self.ROLLUP_SECONDS, int(step) // self.ROLLUP_SECONDS * self.ROLLUP_SECONDS)
+        sql = ("SELECT (bucket / ?) * ? AS bucket, kind, SUM(count) AS count, SUM(sum) AS sum, "
+               "MIN(min) AS min, MAX(max) AS max FROM rollups WHERE bucket >= ? AND bucket < ?")
+        args: list[Any] = [step, step, start, end]
+        if kinds:
+            sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+            args.extend(kinds)
+        sql += " GROUP BY 1, kind ORDER BY 1"
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute(sql, args)]
+        for row in rows:
+            row['avg'] = row['sum'] / row['count'] if row['count'] else None
+        return rows
+
+    def vm_sessions(self, start: float, end: float) -> dict[str, Any]:
+        """VM 시작/종료 기록을 VM별 세션으로 묶어 시작 사유(워크플로우)별/VM별 가동 시간을 계산
+
+        조회 시작 전에 시작되어 범위에 걸친 세션은 조회 시작 시점부터로 잘라 포함한다.
+        """
+        placeholders = ','.join('?' * len(self.SESSION_KINDS))
+        with self._connect() as conn:
+            # VM별로 조회 시작 직전의 마지막 시작/종료 기록 (SQLite는 MAX()와 같은 행의 값을 돌려준다)
+            before = [dict(row) for row in conn.execute(
+                f"SELECT COALESCE(vm, ?) AS vm, kind, detail, MAX(ts) AS ts FROM events "
+                f"WHERE kind IN ({placeholders}) AND ts < ? GROUP BY 1",
+                (self.DEFAULT_VM, *self.SESSION_KINDS, start))]
+            records = [dict(row) for row in conn.execute(
+                f"SELECT ts, kind, detail, COALESCE(vm, ?) AS vm FROM events "
+                f"WHERE kind IN ({placeholders}) AND ts >= ? AND ts < ? ORDER BY ts",
+                (self.DEFAULT_VM, *self.SESSION_KINDS, start, end))]
+
+        sessions: list[dict[str, Any]] = []
+        current: dict[str, dict[str, Any]] = {}
+        for record in before:
+            if record['kind'] == self.KIND_VM_START:
+                current[record['vm']] = {'vm': record['vm'], 'start': start, 'end': None,
+                                         'reason': record['detail'] or '알 수 없음',
+                                         'started_at': record['ts'], 'clipped': True}
+        for record in records:
+            vm = record['vm']
+            if record['kind'] == self.KIND_VM_START:
+                if vm not in current:
+                    current[vm] = {'vm': vm, 'start': record['ts'], 'end': None,
+                                   'reason': record['detail'] or '알 수 없음'}
+            elif vm in current:
+                session = current.pop(vm)
+                session['end'] = record['ts']
+                sessions.append(session)
+        for session in current.values():
+            # 진행 중인 세션은 조회 종료 시점(또는 현재)까지로 계산
+            session['end'] = max(session['start'], min(end, time.time()))
+            session['ongoing'] = True
+            sessions.append(session)
+        sessions.sort(key=lambda s: s['start'])
+
+        by_reason: dict[str, float] = {}
+        by_vm: dict[str, float] = {}
+        for session in sessions:
+            session['hours'] = round((session['end'] - session['start']) / 3600, 3)
+            by_reason[session['reason']] = round(by_reason.get(session['reason'], 0.0) + session['hours'], 3)
+            by_vm[session['vm']] = round(by_vm.get(session['vm'], 0.0) + session['hours'], 3)
+        return {
+            'sessions': sessions,
+            'total_hours': round(sum(s['hours'] for s in sessions), 3),
+            'hours_by_reason': by_reason,
+            'hours_by_vm': by_vm,
+        }
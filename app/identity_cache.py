@@ -0,0 +1,84 @@
+import grp
+import logging
+import pwd
+import subprocess
+import threading
+from typing import Optional, Tuple
+
+
+class IdentityCache:
+    """SMB 사용자/그룹 정보와 Samba passdb 등록 여부를 프로세스 안에서 기억하는 캐시
+
+    - 사용자/그룹 조회는 id/getent 프로세스 대신 pwd/grp(NSS)로 수행한다.
+    - 없는 사용자/그룹 결과도 기억하므로 공유 작업마다 조회가 반복되지 않는다.
+    - 사용자/그룹을 만들거나 바꾼 뒤에는 invalidate()로 비운다.
+    """
+
+    _MISSING = object()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users: dict = {}
+        self._group_names: dict = {}
+        self._group_gids: dict = {}
+        self._samba_users: dict = {}
+
+    def invalidate(self) -> None:
+        """사용자/그룹/Samba 사용자 변경 후 캐시 전체 비우기"""
+        with self._lock:
+            self._users.clear()
+            self._group_names.clear()
+            self._group_gids.clear()
+            self._samba_users.clear()
+
+    def _lookup(self, cache: dict, key, loader):
+        with self._lock:
+            value = cache.get(key, self._MISSING)
+        if value is self._MISSING:
+            value = loader(key)
+            with self._lock:
+                cache[key] = value
+        return value
+
+    def user(self, username: str) -> Optional[Tuple[int, int]]:
+        """사용자의 (UID, 기본 GID). 없으면 None"""
+        def load(name: str) -> Optional[Tuple[int, int]]:
+            try:
+                entry = pwd.getpwnam(name)
+            except KeyError:
+                return None
+            return entry.pw_uid, entry.pw_gid
+        return self._lookup(self._users, username, load)
+
+    def group_name(self, gid: int) -> Optional[str]:
+        """GID에 해당하는 그룹 이름. 없으면 None"""
+        def load(value: int) -> Optional[str]:
+            try:
+                return grp.getgrgid(value).gr_name
+            except KeyError:
+                return None
+        return self._lookup(self._group_names, gid, load)
+
+    def group_gid(self, name: str) -> Optional[int]:
+        """그룹 이름에 해당하는 GID. 없으면 None"""
+        def load(value: str) -> Optional[int]:
+            try:
+                return grp.getgrnam(value).gr_gid
+            except KeyError:
+                return None
+        return self._lookup(self._group_gids, name, load)
+
+    def samba_user_exists(self, username: str) -> bool:
+        """Samba passdb에 사용자가 등록되어 있는지 (pdbedit는 사용자별 최초 1회만 실행)"""
+        def load(name: str) -> bool:
+            try:
+                return subprocess.run(['pdbedit', '-L', name], capture_output=True).returncode == 0
+            except OSError as e:
+                logging.error(f"pdbedit 실행 실패: {e}")
+                return False
+        return self._lookup(self._samba_users, username, load)
+
+    def set_samba_user(self, username: str, exists: bool) -> None:
+        """smbpasswd로 사용자를 추가/삭제한 결과를 반영"""
+        with self._lock:
+            self._samba_users[username] = exists
@@ -1,9 +1,8 @@
 import logging
-from bisect import bisect_right
 from logging.handlers import RotatingFileHandler
 import time
 from dataclasses import dataclass, asdict
-from typing import Optional
+from typing import Callable, Optional
 import requests  # type: ignore
 import subprocess
 from datetime import datetime
@@ -11,16 +10,33 @@ import pytz  # type: ignore
 import os
 import threading
 import queue
+from concurrent.futures import Future, ThreadPoolExecutor
 import math
 import sys
 import atexit
 from config import (GshareConfig, CONFIG_PATH, INIT_FLAG_PATH,
-                    LAST_SHUTDOWN_PATH, FOLDER_SCAN_CACHE_PATH, LOG_DIR, LOG_FILE_PATH)  # type: ignore
+                    LAST_SHUTDOWN_PATH, FOLDER_SCAN_CACHE_PATH, FOLDER_SCAN_WAL_PATH, HISTORY_DB_PATH,
+                    LEGACY_FOLDER_SCAN_CACHE_PATH, LOG_DIR, LOG_FILE_PATH)  # type: ignore
 from proxmox_api import ProxmoxAPI
+from proxmox_tasks import wait_task
 from web_server import GshareWebServer
 from smb_manager import SMBManager
 from mqtt_manager import MQTTManager
 from transcoder import Transcoder
+from folder_index import FolderIndex, FIND_FOLDER_CMD, parse_find_record
+from folder_walker import ParallelFolderWalker
+from scan_cache import ScanCacheStore, ScanCacheWriter
+from path_trie import PathTrie
+from stat_cache import DirectoryStatCache
+from scheduler import MonitorScheduler
+from vm_pool import VMPool, VMRuntime
+from vm_metrics import VMMetricsClient
+from vm_lifecycle import VMLifecycle
+from history_store import HistoryStore
+from vm_status_poller import VMStatusPoller
+from smb_activity import SMBActivityProbe
+from share_consumption import ShareConsumptionTracker
+from event_batcher import FolderEventBatcher
 import yaml  # type: ignore
 import traceback
 import urllib3  # type: ignore
@@ -128,6 +144,10 @@ class FolderMonitor:
         # 스캔 스레드 관리
         self._scan_queue = queue.Queue()
         self._scan_thread = None
+        self._scan_process = None  # 진행 중인 find 프로세스
+        self._scan_cancel = threading.Event()
+        # 스캔 결과가 큐에 들어오면 호출 (모니터 스케줄러를 즉시 깨우는 용도)
+        self.on_scan_complete: Optional[Callable[[], None]] = None
 
         # 성능 최적화: NFS 상태 확인은 subprocess("mount -t nfs") 호출 비용이 큰 편이라
         # 짧은 TTL 캐시로 폴링 루프의 반복 syscall을 줄인다.
@@ -136,7 +156,25 @@ class FolderMonitor:
         self._nfs_status_checked_at = 0.0
         self._nfs_status_ttl = 5.0
         self._scan_cycle = 0
-        self._full_scan_cycle_interval = 12
+        # 증분 인덱스가 평상시 스캔을 담당하고, find 전체 스캔은 드문 정합성 검사로만 수행한다.
+        # 폴더 추가/삭제/이름 변경은 부모 mtime 변화로 매 주기 인덱스에 반영되므로, 전체 스캔은
+        # stat 실패로 놓친 변화를 바로잡는 용도만 남는다. (CHECK_INTERVAL 60초 기준 약 12시간마다 1회)
+        self._full_scan_cycle_interval = 720
+        self.folder_index = FolderIndex(self.config.MOUNT_PATH, workers=self.config.SCAN_WORKERS)
+        # 성능 최적화: keepalive/마운트 대상 선택/트랜스코더가 공유하는 주기 단위 stat 캐시
+        # (같은 주기 안에서 디렉토리별 listdir는 최대 1회)
+        self.stat_cache = DirectoryStatCache()
+        # 성능 최적화: JSON 전체 재작성 대신 바이너리 스냅샷 + WAL로 저장하여
+        # 폴더 이벤트마다 O(1) append만 수행한다.
+        self._scan_cache_store = ScanCacheStore(FOLDER_SCAN_CACHE_PATH, FOLDER_SCAN_WAL_PATH)
+        # 성능 최적화: 이벤트 폭주(예: 사진 수백 장 백업) 시 변경분을 모아
+        # SCAN_CACHE_FLUSH_INTERVAL마다 최대 1회만 백그라운드에서 기록한다.
+        self._scan_cache_writer = ScanCacheWriter(
+            self._scan_cache_store,
+            self._get_scan_cache_identity,
+            lambda: dict(self.previous_mtimes),
+            interval=self.config.SCAN_CACHE_FLUSH_INTERVAL)
+        self._scan_cache_writer.start()
 
         # 서브폴더 정보 업데이트 및 초기 링크 생성은 initialize()에서 수행
         self.loaded_from_cache = self._load_scan_cache()
@@ -194,10 +232,23 @@ class FolderMonitor:
     def _load_scan_cache(self) -> bool:
         """NFS 공유 설정이 동일하면 이전 폴더 스캔 결과를 로드한다."""
         try:
-            if not os.path.exists(FOLDER_SCAN_CACHE_PATH):
+            data = self._scan_cache_store.load(self._get_scan_cache_identity())
+            if data is not None:
+                self.previous_mtimes = data
+                logging.info(f'폴더 스캔 캐시 로드 완료: {len(self.previous_mtimes)}개')
+                return True
+        except Exception as e:
+            logging.warning(f'폴더 스캔 캐시 로드 실패: {e}')
+
+        return self._load_legacy_scan_cache()
+
+    def _load_legacy_scan_cache(self) -> bool:
+        """이전 버전의 JSON 스캔 캐시를 로드한다. (다음 저장 시 바이너리 형식으로 이전)"""
+        try:
+            if not os.path.exists(LEGACY_FOLDER_SCAN_CACHE_PATH):
                 return False
 
-            with open(FOLDER_SCAN_CACHE_PATH, 'r', encoding='utf-8') as f:
+            with open(LEGACY_FOLDER_SCAN_CACHE_PATH, 'r', encoding='utf-8') as f:
                 payload = json.load(f)
 
             if not isinstance(payload, dict):
@@ -219,27 +270,33 @@ class FolderMonitor:
                     continue
 
             self.previous_mtimes = loaded
-            logging.info(f'폴더 스캔 캐시 로드 완료: {len(self.previous_mtimes)}개')
-            return True
+            logging.info(f'이전 형식(JSON) 폴더 스캔 캐시 로드 완료: {len(self.previous_mtimes)}개')
         except Exception as e:
-            logging.warning(f'폴더 스캔 캐시 로드 실패: {e}')
+            logging.warning(f'이전 형식 폴더 스캔 캐시 로드 실패: {e}')
             return False
 
-    def _save_scan_cache(self) -> None:
-        """현재 폴더 스캔 결과를 캐시에 저장한다."""
+        # 1회성 이전: 바이너리 스냅샷을 기록한 뒤 JSON 캐시를 제거한다.
         try:
-            payload = {
-                'saved_at': time.time(),
-                'identity': self._get_scan_cache_identity(),
-                'previous_mtimes': self.previous_mtimes,
-            }
-            os.makedirs(os.path.dirname(FOLDER_SCAN_CACHE_PATH), exist_ok=True)
-            with open(FOLDER_SCAN_CACHE_PATH, 'w', encoding='utf-8') as f:
-                json.dump(payload, f, ensure_ascii=False)
+            self._scan_cache_store.save_snapshot(self._get_scan_cache_identity(), dict(self.previous_mtimes))
+            os.remove(LEGACY_FOLDER_SCAN_CACHE_PATH)
+            logging.info('폴더 스캔 캐시를 바이너리 형식으로 이전했습니다.')
         except Exception as e:
-            logging.warning(f'폴더 스캔 캐시 저장 실패: {e}')
+            logging.warning(f'폴더 스캔 캐시 형식 이전 실패: {e}')
+        return True
+
+    def _save_scan_cache(self) -> None:
+        """현재 폴더 스캔 결과 전체의 스냅샷 저장을 예약한다. (백그라운드 작성기가 기록)"""
+        self._scan_cache_writer.request_snapshot()
 
+    def _record_scan_cache_changes(self, updated: list[str], deleted: list[str]) -> None:
+        """변경된 폴더를 기록 대기열에 표시한다. (요청 스레드에서는 파일 I/O를 하지 않음)"""
+        changes = {path: self.previous_mtimes[path] for path in updated if path in self.previous_mtimes}
+        self._scan_cache_writer.mark_changed(changes, deleted)
 
+    def flush_scan_cache(self) -> None:
+        """대기 중인 스캔 캐시 변경분을 즉시 기록하고 작성기를 종료한다."""
+        self._scan_cache_writer.stop()
+        self._scan_cache_store.close()
 
     def _polling_recent_window_mmin(self) -> int:
         """polling 스캔 시 최근 변경 탐지에 사용할 mmin 창(분)"""
@@ -257,83 +314,139 @@ class FolderMonitor:
         # 최소 1분 이상 할당
         return max(1, math.ceil(recent_window_seconds / 60))
 
-    def _scan_folders(self, full_scan: bool = False) -> dict[str, float]:
-        """마운트 경로의 서브폴더 목록과 수정 시간을 find -printf 로 빠르고 완벽하게 수집하여 반환합니다."""
-        results = {}
-        if not os.path.exists(self.config.MOUNT_PATH):
-            logging.error(f"마운트 경로가 존재하지 않음: {self.config.MOUNT_PATH}")
-            return results
+    def _iter_find_records(self):
+        """find 출력을 파이프로 읽으며 (mtime, 상대경로) 레코드를 하나씩 반환한다.
 
+        전체 stdout을 문자열로 모으지 않으므로 메모리 사용량이 출력 크기와 무관하다.
+        cancel_scan()이 호출되면 find 프로세스를 종료하고 순회를 중단한다.
+        """
+        process = subprocess.Popen(
+            FIND_FOLDER_CMD,
+            cwd=self.config.MOUNT_PATH,
+            stdout=subprocess.PIPE,
+            # stderr를 파이프로 받으면 읽지 않는 동안 버퍼가 가득 차 find가 멈출 수 있다.
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors='surrogateescape'
+        )
+        self._scan_process = process
         try:
-            # -printf '%T@\t%P\n' 
-            #   %T@: Epoch seconds (float 형태)
-            #   \t: 탭 구분자
-            #   %P: 검색 시작점('.')을 제외한 상대 경로
-            cmd = [
-                'find', '.',
-                '-mindepth', '1',
-                '-type', 'd',
-                '(',
-                '-name', '@*', '-o',
-                '-name', '.*', '-o',
-                '-name', '#recycle',
-                ')',
-                '-prune',
-                '-o',
-                '-type', 'd',
-                '-printf', r'%T@\t%P\n'
-            ]
+            for line in process.stdout:
+                if self._scan_cancel.is_set():
+                    break
 
-            result = subprocess.run(
-                cmd,
-                cwd=self.config.MOUNT_PATH,
-                capture_output=True,
-                text=True,
-                check=True,
-                errors='surrogateescape'
-            )
+                record = parse_find_record(line)
+                if record is not None:
+                    yield record
+        finally:
+            if process.poll() is None and self._scan_cancel.is_set():
+                process.terminate()
+            process.stdout.close()
+            process.wait()
+            self._scan_process = None
+
+        if self._scan_cancel.is_set():
+            logging.info("폴더 스캔이 취소되었습니다.")
+        elif process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, FIND_FOLDER_CMD)
+
+    def cancel_scan(self) -> None:
+        """진행 중인 find 스캔을 중단한다. (설정 변경, 종료 시 호출)"""
+        self._scan_cancel.set()
+        process = self._scan_process
+        if process is not None and process.poll() is None:
+            try:
+                process.terminate()
+            except Exception as e:
+                logging.debug(f"스캔 프로세스 종료 실패(무시): {e}")
+
+    def _iter_scan_records(self):
+        """설정된 스캔 엔진(find 또는 threaded)으로 (mtime, 상대경로) 레코드를 순회한다."""
+        if self.config.SCAN_ENGINE == 'threaded':
+            walker = ParallelFolderWalker(self.config.MOUNT_PATH,
+                                          max_workers=self.config.SCAN_WORKERS,
+                                          cancel_event=self._scan_cancel)
+            yield from walker.iter_records()
+            if self._scan_cancel.is_set():
+                logging.info("폴더 스캔이 취소되었습니다.")
+            elif walker.error_count:
+                # find의 비정상 종료와 같이 취급: 읽지 못한 하위 트리를 삭제로 오판하지 않도록 실패 처리
+                raise OSError(f"병렬 폴더 스캔 중 {walker.error_count}개 디렉토리를 읽지 못했습니다.")
+            return
 
-            if not result.stdout:
-                return results
+        yield from self._iter_find_records()
 
+    def _scan_folders(self, full_scan: bool = False) -> Optional[dict[str, float]]:
+        """마운트 경로의 서브폴더 목록과 수정 시간을 설정된 스캔 엔진으로 스트리밍 수집하여 반환합니다.
+
+        스캔이 실패하면(마운트 경로 없음, find 비정상 종료 등) None을 반환한다.
+        부분 결과로 삭제를 판정하면 읽지 못한 폴더가 모두 삭제된 것으로 처리되기 때문이다.
+        """
+        results = {}
+        if not os.path.exists(self.config.MOUNT_PATH):
+            logging.error(f"마운트 경로가 존재하지 않음: {self.config.MOUNT_PATH}")
+            return None
+
+        self._scan_cancel.clear()
+        try:
             # 파이썬 메모리상에서 시간 계산 (NFS stat 병목 제거)
             window_seconds = self._polling_recent_window_mmin() * 60
             current_time = time.time()
 
-            for line in result.stdout.splitlines():
-                if not line.strip():
-                    continue
-
-                parts = line.split('\t', 1)
-                if len(parts) == 2:
-                    mtime_str, path = parts
-                    try:
-                        folder_mtime = float(mtime_str)
-                        if full_scan:
-                            results[path] = folder_mtime
-                        else:
-                            # 최근 변경 분(window_seconds) 이내인 경우만 추가
-                            if (current_time - folder_mtime) <= window_seconds:
-                                results[path] = folder_mtime
-                    except ValueError:
-                        continue
+            # 레코드가 도착하는 즉시 최근 변경 분(window_seconds) 필터를 적용해
+            # 최대 메모리 사용량을 결과 dict 크기로 제한한다.
+            for folder_mtime, path in self._iter_scan_records():
+                if full_scan or (current_time - folder_mtime) <= window_seconds:
+                    results[path] = folder_mtime
 
             return results
         except Exception as e:
             logging.error(f"Folder scan error: {e}")
-            return results
-
-
+            return None
+
+    @property
+    def scan_cancelled(self) -> bool:
+        return self._scan_cancel.is_set()
+
+    def _next_scan_is_full(self) -> bool:
+        """이번 백그라운드 스캔을 find 전체 스캔(정합성 검사)으로 수행할지 결정"""
+        self._scan_cycle += 1
+        return (self.folder_index.is_empty or
+                self._scan_cycle % self._full_scan_cycle_interval == 0)
+
+    def _complete_scan(self, result: dict[str, float], full_scan: bool,
+                       deleted: Optional[list[str]]) -> None:
+        """스캔 결과를 인덱스에 반영하고 결과 큐에 추가한 뒤 완료를 알린다."""
+        if full_scan:
+            # 정합성 검사: find 전체 스캔 후 인덱스를 재구성 (삭제는 결과 비교로 판단)
+            self.folder_index.rebuild(result)
+        self._scan_queue.put((result, full_scan, deleted))
+        logging.debug("백그라운드 스캔 완료 및 결과 큐에 추가")
+        if self.on_scan_complete is not None:
+            self.on_scan_complete()
+
+    def _start_background_scan(self) -> None:
+        """진행 중인 스캔이 없으면 백그라운드 스캔을 시작한다."""
+        if self._scan_thread is None or not self._scan_thread.is_alive():
+            self._scan_thread = threading.Thread(target=self._run_scan_worker)
+            self._scan_thread.daemon = True
+            self._scan_thread.start()
 
     def _run_scan_worker(self) -> None:
         """Background worker for folder scanning."""
         try:
             logging.debug("백그라운드 스캔 스레드 시작")
-            self._scan_cycle += 1
-            full_scan = (self._scan_cycle % self._full_scan_cycle_interval == 0)
-            result = self._scan_folders(full_scan=full_scan)
-            self._scan_queue.put((result, full_scan))
-            logging.debug("백그라운드 스캔 완료 및 결과 큐에 추가")
+            full_scan = self._next_scan_is_full()
+            if full_scan:
+                result = self._scan_folders(full_scan=True)
+                if result is None or self.scan_cancelled:
+                    # 실패/취소된 부분 결과로 삭제 판정/인덱스 재구성을 하지 않는다.
+                    return
+                deleted = None
+            else:
+                # 평상시: mtime이 바뀐 디렉토리만 다시 listdir 하는 증분 스캔
+                result, deleted = self.folder_index.refresh()
+            self._complete_scan(result, full_scan, deleted)
         except Exception as e:
             logging.error(f"백그라운드 스캔 중 오류 발생: {e}")
 
@@ -343,6 +456,13 @@ class FolderMonitor:
 
         # Use optimized scan
         current_scan = self._scan_folders(full_scan=True)
+        if current_scan is None:
+            logging.warning("폴더 스캔에 실패하여 폴더 구조 업데이트를 건너뜁니다.")
+            return
+        if self.scan_cancelled:
+            logging.info("초기 폴더 스캔이 취소되어 폴더 구조 업데이트를 건너뜁니다.")
+            return
+        self.folder_index.rebuild(current_scan)
 
         # Identify new folders for logging
         new_folders = set(current_scan.keys()) - set(self.previous_mtimes.keys())
@@ -365,24 +485,29 @@ class FolderMonitor:
         logging.debug(
             f"폴더 구조 업데이트 완료 - 걸린 시간: {elapsed_time:.3f}초, 총 폴더: {len(self.previous_mtimes)}개, 새 폴더: {len(new_folders)}개, 삭제된 폴더: {len(deleted_folders)}개")
 
-    def check_modifications(self, current_vm_status: bool = False) -> tuple[list[str], bool, list[str]]:
-        """수정 시간이 변경된 서브폴더 목록, VM 시작 필요 여부, 마운트/트랜스코딩 대상 폴더를 반환 (Async)"""
+    def check_modifications(self, current_vm_status: bool = False,
+                            start_scan: bool = True) -> tuple[list[str], bool, list[str]]:
+        """수정 시간이 변경된 서브폴더 목록, VM 시작 필요 여부, 마운트/트랜스코딩 대상 폴더를 반환 (Async)
+
+        start_scan이 False면 도착한 스캔 결과만 처리하고 새 스캔은 시작하지 않는다.
+        """
         start_time = time.time()
         changed_folders = []
         should_start_vm = False
 
         # Check for async scan results
         try:
-            current_scan, full_scan = self._scan_queue.get_nowait()
-
-            # 1. Handle Deleted Folders (정기 Full Scan에서만 수행)
-            if full_scan:
-                deleted_folders = set(self.previous_mtimes.keys()) - set(current_scan.keys())
-                for folder in deleted_folders:
-                    logging.info(f"폴더 삭제 감지: {folder}")
-                    self.smb_manager.remove_symlink(folder)
-                    if folder in self.previous_mtimes:
-                        del self.previous_mtimes[folder]
+            current_scan, full_scan, deleted_folders = self._scan_queue.get_nowait()
+
+            # 1. Handle Deleted Folders (증분 인덱스가 알려준 삭제 또는 정기 Full Scan 비교 결과)
+            if deleted_folders is None:
+                deleted_folders = (set(self.previous_mtimes.keys()) - set(current_scan.keys())
+                                   if full_scan else [])
+            for folder in deleted_folders:
+                logging.info(f"폴더 삭제 감지: {folder}")
+                self.smb_manager.remove_symlink(folder)
+                if folder in self.previous_mtimes:
+                    del self.previous_mtimes[folder]
 
             # 2. Handle Updates (New and Modified)
             for path, current_mtime in current_scan.items():
@@ -408,15 +533,20 @@ class FolderMonitor:
                         else:
                             logging.debug(f"수정 시간 변화 감지되었으나 VM이 이미 실행 중입니다 - 수정 시간: {last_modified}")
 
+            # 스캔으로 변경이 확인된 폴더는 주기 시작 시(keepalive 등) 캐시된 stat/listdir을 버린다.
+            # (_run_scan_cycle은 주기 중간에 결과를 처리하므로 스캔 이전 값이 남아 있을 수 있음)
+            for path in changed_folders:
+                self.stat_cache.invalidate(os.path.join(self.config.MOUNT_PATH, path))
             mount_targets = self._filter_mount_targets(changed_folders)
             if self.config.SMB_SHARE_MODE == 'folder':
-                for path in mount_targets:
-                    self.smb_manager.create_symlink(path)
+                self.smb_manager.create_symlinks(mount_targets)
             else:
                 logging.debug("파일 단위 공유 모드이므로 폴링 스캔에 의한 폴더 단위 마운트를 건너뜁니다.")
 
             if full_scan:
                 self._save_scan_cache()
+            elif current_scan or deleted_folders:
+                self._record_scan_cache_changes(list(current_scan), list(deleted_folders))
 
             elapsed_time = time.time() - start_time
             logging.debug(
@@ -428,10 +558,8 @@ class FolderMonitor:
             pass
 
         # Trigger new scan if needed
-        if self._scan_thread is None or not self._scan_thread.is_alive():
-            self._scan_thread = threading.Thread(target=self._run_scan_worker)
-            self._scan_thread.daemon = True
-            self._scan_thread.start()
+        if start_scan:
+            self._start_background_scan()
 
         return [], False, []
 
@@ -450,11 +578,13 @@ class FolderMonitor:
         # MOUNT_PATH prefix를 제거하여 subfolder와 file_name을 얻습니다.
         active_folders = set()
         file_shares = {}  # file_name -> subfolder
-        if self.config.SMB_SHARE_MODE == 'file' and hasattr(self.smb_manager, '_active_links'):
+        if self.config.SMB_SHARE_MODE == 'file':
             mount_path = self.config.MOUNT_PATH
             mount_prefix = mount_path.rstrip(os.sep) + os.sep
-            links_dir = self.smb_manager.links_dir
-            if os.path.isdir(links_dir):
+            # VM 프로필별 공유의 링크 디렉토리까지 모두 확인
+            for links_dir in self.smb_manager.links_dirs():
+                if not os.path.isdir(links_dir):
+                    continue
                 try:
                     for entry in os.listdir(links_dir):
                         if entry == ".tmp":
@@ -521,16 +651,15 @@ class FolderMonitor:
                     last_modified = datetime.fromtimestamp(mtime, self.local_tz).strftime('%Y-%m-%d %H:%M:%S')
                     logging.info(f"최근 수정된 폴더 감지 ({path}): {last_modified}")
 
+            self.stat_cache.new_cycle()
             mount_targets = self._filter_mount_targets(recently_modified)
             if mount_targets:
                 logging.info(
                     f"마지막 VM 종료({datetime.fromtimestamp(self.last_shutdown_time, self.local_tz).strftime('%Y-%m-%d %H:%M:%S')}) 이후 수정된 폴더 {len(mount_targets)}개의 링크 처리를 확인합니다.")
                 if self.config.SMB_SHARE_MODE == 'folder':
-                    for folder in mount_targets:
-                        if self.smb_manager.create_symlink(folder):
-                            logging.debug(f"초기 링크 생성 성공: {folder}")
-                        else:
-                            logging.error(f"초기 링크 생성 실패: {folder}")
+                    _, failed = self.smb_manager.create_symlinks(mount_targets)
+                    for folder in failed:
+                        logging.error(f"초기 링크 생성 실패: {folder}")
                 else:
                     logging.debug("파일 단위 공유 모드이므로 초기 폴더 단위 마운트를 건너뜁니다.")
 
@@ -551,68 +680,63 @@ class FolderMonitor:
         """폴더 내에 최근 수정된 파일이 있는지 확인 (직접적인 변경 여부)"""
         try:
             full_path = os.path.join(self.config.MOUNT_PATH, path)
-            if not os.path.exists(full_path):
+            stat_result = self.stat_cache.stat(full_path)
+            if stat_result is None:
                 return False
 
-            # 디렉토리의 mtime 가져오기
-            dir_mtime = os.stat(full_path).st_mtime
-
-            # 디렉토리 내 파일 스캔
-            with os.scandir(full_path) as it:
-                for entry in it:
-                    if entry.is_file():
-                        # 파일의 수정 시간이 디렉토리 수정 시간과 매우 가까우면 직접 변경으로 간주 (2초 이내)
-                        if abs(entry.stat().st_mtime - dir_mtime) <= 2.0:
-                            return True
-            return False
+            # 파일의 수정 시간이 디렉토리 수정 시간과 매우 가까우면 직접 변경으로 간주 (2초 이내)
+            return self.stat_cache.has_file_near_mtime(
+                full_path, stat_result.st_mtime, tolerance=2.0,
+                short_circuit=self.config.MOUNT_PROBE_SHORT_CIRCUIT)
         except Exception as e:
             logging.warning(f"직접 변경 확인 중 오류 ({path}): {e}")
             return False
 
+    def _probe_direct_changes(self, paths: list[str]) -> dict[str, bool]:
+        """여러 폴더의 직접 변경 여부를 스레드 풀에서 동시에 확인"""
+        workers = max(1, int(self.config.MOUNT_PROBE_WORKERS))
+        if len(paths) <= 1 or workers == 1:
+            return {path: self._has_direct_changes(path) for path in paths}
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(paths)),
+                                thread_name_prefix='mount-probe') as executor:
+            return dict(zip(paths, executor.map(self._has_direct_changes, paths)))
+
     def _filter_mount_targets(self, folders: list[str]) -> list[str]:
         """변경된 폴더 중 중복 마운트를 방지하고 최적의 폴더 선택"""
         if not folders:
             return []
 
-        folder_set = set(folders)
-        lexicographic_paths = sorted(folder_set)
+        # 성능 최적화: 경로 구성요소 트리로 하위 변경 폴더 존재 여부와
+        # 이미 선택된 상위 마운트 포함 여부를 각각 O(depth)에 판별한다.
+        changed_trie = PathTrie(folders)
 
-        # 성능 최적화: O(n) 루프 안에서 전체 폴더셋을 다시 순회(O(n^2))하지 않고,
-        # 정렬 + 이진 탐색으로 하위 폴더 존재 여부를 O(log n)에 판별한다.
-        def has_child_folder(path: str) -> bool:
-            path_prefix = path + os.sep
-            next_idx = bisect_right(lexicographic_paths, path)
-            return next_idx < len(lexicographic_paths) and lexicographic_paths[next_idx].startswith(path_prefix)
+        # 상위 폴더부터 처리하기 위해 경로 깊이별로 묶음 (얕은 순)
+        levels: dict[int, list[str]] = {}
+        for path in set(folders):
+            levels.setdefault(len(path.split(os.sep)), []).append(path)
 
-        # 상위 폴더부터 처리하기 위해 경로 길이로 정렬 (짧은 순)
-        sorted_folders = sorted(folders, key=lambda path: len(path.split(os.sep)))
-        final_mounts = set()
+        final_mounts = PathTrie()
+        selected = []
 
-        for path in sorted_folders:
+        for depth in sorted(levels):
             # 1. 이미 선택된 마운트 포인트에 포함되는지 확인 (중복 방지)
-            is_covered = False
-            for mount in final_mounts:
-                if path.startswith(mount + os.sep):
-                    is_covered = True
-                    break
-
-            if is_covered:
-                continue
-
-            # 2. 직접적인 파일 변경이 있는지 확인
-            if self._has_direct_changes(path):
-                final_mounts.add(path)
-            else:
-                # 3. 직접 변경이 없다면, 하위 폴더가 변경 목록에 있는지 확인
-                has_child_in_set = has_child_folder(path)
-
-                # 하위 폴더가 변경 목록에 없다면(Leaf 노드), 선택해야 함
-                # (예: 파일 삭제되거나 감지되지 않은 변경사항 등)
-                if not has_child_in_set:
+            candidates = [path for path in levels[depth] if not final_mounts.is_covered(path)]
+
+            # 2. 하위 폴더가 변경 목록에 없다면(Leaf 노드), 선택해야 함
+            #    (예: 파일 삭제되거나 감지되지 않은 변경사항 등)
+            # 3. 하위 폴더가 있더라도 직접적인 파일 변경이 있으면 선택,
+            #    없으면 하위 폴더에게 처리를 위임 (현재 폴더 스킵)
+            #    (디렉토리 조회 비용이 드는 직접 변경 확인은 Leaf가 아닐 때만, 같은 깊이끼리 병렬로 수행)
+            probes = self._probe_direct_changes(
+                [path for path in candidates if changed_trie.has_descendant(path)])
+
+            for path in candidates:
+                if probes.get(path, True):
                     final_mounts.add(path)
-                # 하위 폴더가 있다면, 하위 폴더에게 처리를 위임 (현재 폴더 스킵)
+                    selected.append(path)
 
-        return list(final_mounts)
+        return selected
 
     def check_nfs_status(self) -> bool:
         """NFS 마운트가 되어 있는지 확인"""
@@ -645,28 +769,36 @@ class FolderMonitor:
                 return
 
             # 마운트 루트 stat (attribute 캐시 갱신)
-            os.stat(mount_path)
+            # 결과는 주기 stat 캐시에 남아 같은 주기의 마운트 대상 선택에서 재사용된다.
+            self.stat_cache.stat(mount_path)
 
             # 활성 심볼릭 링크의 대상 경로도 stat하여 캐시 유지
             for subfolder in list(self.previous_mtimes.keys())[:50]:
-                try:
-                    full_path = os.path.join(mount_path, subfolder)
-                    os.stat(full_path)
-                except OSError:
-                    pass
+                self.stat_cache.stat(os.path.join(mount_path, subfolder))
 
             logging.debug("NFS keepalive 완료")
         except Exception as e:
             logging.debug(f"NFS keepalive 실패 (무시): {e}")
 
     def cleanup_resources(self) -> None:
-        """리소스 정리: 활성 심볼릭 링크 제거"""
-        # 모든 링크 제거
+        """리소스 정리: 진행 중인 스캔 중단 및 활성 심볼릭 링크 제거"""
+        self.cancel_scan()
+        self.flush_scan_cache()
+        # 모든 링크 제거 후 FUSE 공유 마운트 해제
         self.smb_manager.cleanup_all_symlinks()
+        self.smb_manager.close()
         logging.debug("모든 리소스가 정리되었습니다.")
 
 
 class GShareManager:
+    # 모니터 스케줄러 이벤트
+    EVENT_CYCLE = 'cycle'                # 주기 작업: keepalive, VM 상태 확인, 폴더 변경 확인
+    EVENT_SCAN = 'scan'                  # 스캔 결과 도착/즉시 처리 요청: 폴더 변경 처리만 수행
+    EVENT_CPU = 'cpu'                    # VM 업타임/CPU 사용량 샘플링
+    EVENT_PENDING_STOP = 'pending_stop'  # 예약된 VM stop 시점
+    EVENT_STATE = 'state'                # 상태 재계산 및 웹/MQTT 전송
+    EVENT_FOLDER_BATCH = 'folder_batch'  # 묶어 둔 NAS 폴더 이벤트 처리
+
     def __init__(self, config: GshareConfig, proxmox_api: ProxmoxAPI, mqtt_manager: Optional[MQTTManager] = None):
         self.config = config
         # 상태 갱신 루프에서 pytz.timezone() 반복 호출을 피하기 위해 1회만 생성해 재사용한다.
@@ -679,12 +811,49 @@ class GShareManager:
         self.event_relay_last_seen_epoch: Optional[float] = None
         self.event_relay_timeout_seconds = 90
         self.pending_stop_at: Optional[float] = None
+        # rrddata 기반 유휴 판단용 시계열 (METRICS_SOURCE가 rrddata일 때만 조회)
+        self.vm_metrics = VMMetricsClient(proxmox_api, window=self.config.METRICS_WINDOW)
+        # Samba 읽기 활동 감지: 업로더가 공유 파일을 읽는 중이면 CPU가 낮아도 종료를 보류한다.
+        self.smb_activity: Optional[SMBActivityProbe] = None
+        if self.config.SMB_ACTIVITY_ENABLED:
+            self.smb_activity = SMBActivityProbe(self.config.SMB_LINKS_DIR, self.config.SMB_IDLE_SAMPLES)
+        # 기본 VM 깨우기/재우기 (stop/start 또는 최대 절전/재개) 및 깨우기 지연 측정
+        self.vm_lifecycle = VMLifecycle(config, proxmox_api)
+        # VM 상태 스냅샷 폴러: 상태 계산/웹 요청은 Proxmox를 직접 호출하지 않고 스냅샷만 읽는다.
+        self.status_poller = VMStatusPoller(
+            proxmox_api, interval=self.config.VM_STATUS_POLL_INTERVAL,
+            transition_interval=self.config.PROXMOX_STATUS_TTL_TRANSITION * 2,
+            on_change=lambda snapshot: self.request_state_refresh())
+        # VM 세션/CPU 샘플/이벤트/공유 기록 (재시작 후에도 유지)
+        self.history: Optional[HistoryStore] = None
+        if self.config.HISTORY_ENABLED:
+            try:
+                self.history = HistoryStore(HISTORY_DB_PATH, self.config.HISTORY_RAW_RETENTION_DAYS,
+                                            self.config.HISTORY_ROLLUP_RETENTION_DAYS)
+            except Exception as e:
+                logging.error(f"기록 저장소 초기화 실패: {e}")
+        # 모니터 루프의 타이머/외부 이벤트를 한 곳에서 처리하는 스케줄러
+        self.scheduler = MonitorScheduler()
+        # NAS 이벤트 폭주를 EVENT_BATCH_WINDOW 단위로 병합
+        self.event_batcher = FolderEventBatcher()
+        self._state_refresh_full = False
+        self._last_vm_status: Optional[bool] = None
+        self._monitor_count = 0
         self.last_file_event_time: Optional[float] = None
         self.recent_mount_days: int = 3
+        # 스케줄러 생성 후 시작 (상태 변경 알림이 스케줄러로 전달됨)
+        self.status_poller.start()
 
         # VM 마지막 종료 시간 로드
         self.last_shutdown_time = self._load_last_shutdown_time()
 
+        # 추가 VM 프로필 (기본 VM은 proxmox_api/low_cpu_count/pending_stop_at을 그대로 사용)
+        # 각 프로필은 자체 상태 폴러와 VMLifecycle을 가진다.
+        self.vm_pool = VMPool(config, proxmox_api, self.vm_lifecycle, self.status_poller,
+                              self.last_shutdown_time,
+                              on_status_change=lambda snapshot: self.request_state_refresh())
+        self.vm_pool.start()
+
         # NFS 마운트 먼저 시도
         if self.config.NFS_MOUNT_ENABLED:
             self._mount_nfs()
@@ -695,6 +864,7 @@ class GShareManager:
         logging.info("FolderMonitor 초기화 시작")
         self.folder_monitor = FolderMonitor(
             config, proxmox_api, self.last_shutdown_time)
+        self.folder_monitor.on_scan_complete = self.request_scan
         self.last_shutdown_time_str = datetime.fromtimestamp(
             self.last_shutdown_time, self.local_tz).isoformat()
         logging.info("FolderMonitor 초기화 완료")
@@ -702,6 +872,18 @@ class GShareManager:
         # SMBManager 초기화 (FolderMonitor의 SMBManager를 사용)
         self.smb_manager = self.folder_monitor.smb_manager
         logging.debug("SMBManager 참조 완료")
+        # 추가 VM 프로필마다 별도 SMB 공유: 각 VM은 자신에게 라우팅된 폴더만 보게 된다.
+        if self.vm_pool.secondary:
+            self.smb_manager.configure_profiles(
+                [(runtime.name, runtime.profile.share_name) for runtime in self.vm_pool.secondary],
+                lambda folder: [runtime.name for runtime in self.vm_pool.route(folder)])
+
+        # VM이 모두 읽은 공유 항목을 VM 종료 전에 개별 해제 (내보내는 트리를 작게 유지)
+        self.share_consumption: Optional[ShareConsumptionTracker] = None
+        if self.config.SMB_RETIRE_CONSUMED:
+            self.share_consumption = ShareConsumptionTracker(
+                self.config.SMB_LINKS_DIR, self.config.MOUNT_PATH, self.config.SMB_CONSUMED_GRACE,
+                share_fs=self.smb_manager.share_fs)
 
         # Transcoder 초기화
         self.transcoder = Transcoder(config)
@@ -744,12 +926,7 @@ class GShareManager:
             logging.error(f'초기 폴더 스캔(비동기) 실패: {e}')
         finally:
             self.initial_scan_in_progress = False
-            try:
-                self.current_state = self.update_state(update_monitored_folders=True)
-                if gshare_web_server:
-                    gshare_web_server.emit_state_update()
-            except Exception as e:
-                logging.error(f'비동기 초기 스캔 후 상태 업데이트 실패: {e}')
+            self.request_state_refresh(update_monitored_folders=True)
 
     def _load_last_shutdown_time(self) -> float:
         """VM 마지막 종료 시간을 로드 (UTC 기준)"""
@@ -832,7 +1009,7 @@ class GShareManager:
                 self._run_vm_shutdown_workflow()
 
                 logging.info(f"종료 웹훅 전송 성공, 업타임: {uptime_str}")
-                self.pending_stop_at = time.time() + 10
+                self._set_pending_stop(time.time() + 10)
                 logging.info("10초 후 VM 종료 명령(qm stop) 전송을 예약했습니다.")
 
             except Exception as e:
@@ -860,38 +1037,39 @@ class GShareManager:
                     # 1) VM이 실행 중이면 종료
                     if self.proxmox_api.is_vm_running():
                         logging.info("VM 종료 요청 전송 중...")
-                        if not self.proxmox_api.stop_vm():
+                        stop_task = self.proxmox_api.submit_stop()
+                        if stop_task is None:
                             logging.error("VM 종료 명령 전송에 실패했습니다.")
                             self._reboot_in_progress = False
                             return
 
-                        # 종료 확인 폴링 (최대 90초)
+                        # Proxmox 종료 작업(UPID) 완료 대기 (최대 90초)
                         logging.info("VM 종료 대기 중...")
-                        for _ in range(30):  # 30 × 3초 = 90초
-                            time.sleep(3)
-                            if not self.proxmox_api.is_vm_running():
-                                logging.info("VM이 종료되었습니다.")
-                                break
+                        if wait_task(stop_task, timeout=90):
+                            logging.info("VM이 종료되었습니다.")
+                        elif not self.proxmox_api.is_vm_running():
+                            logging.info("VM이 종료되었습니다.")
                         else:
-                            logging.warning("VM 종료 타임아웃 (90초). 재부팅을 계속 시도합니다.")
+                            logging.warning("VM 종료 작업 완료를 확인하지 못했습니다 (90초). 재부팅을 계속 시도합니다.")
                     else:
                         logging.info("VM이 이미 종료되어 있습니다. 시작 단계로 넘어갑니다.")
 
-                    # 2) VM 시작
-                    time.sleep(3)  # 짧은 안정화 대기
+                    # 2) VM 시작 (시작 작업 완료까지 대기)
                     logging.info("VM 시작 요청 전송 중...")
-                    if self.proxmox_api.start_vm():
+                    start_task = self.proxmox_api.submit_start()
+                    if start_task is None:
+                        logging.error("VM 시작 명령 전송에 실패했습니다.")
+                    elif wait_task(start_task, timeout=90):
                         logging.info("=== VM 재부팅 완료 ===")
                     else:
-                        logging.error("VM 시작 명령 전송에 실패했습니다.")
+                        logging.error("VM 시작 작업이 실패했거나 완료를 확인하지 못했습니다.")
 
                 except Exception as e:
                     logging.error(f"재부팅 스레드 오류: {e}")
                 finally:
                     self._reboot_in_progress = False
                     # 상태 업데이트
-                    if hasattr(self, 'current_state') and self.current_state is not None:
-                        self.current_state = self.update_state()
+                    self.request_state_refresh()
 
             thread = threading.Thread(target=_do_reboot, daemon=True)
             thread.start()
@@ -905,6 +1083,18 @@ class GShareManager:
         self.save_last_shutdown_time()
 
         # VM 종료 시 모든 SMB 공유 비활성화
+        self._deactivate_smb_if_unused(self.vm_pool.primary)
+
+    def _deactivate_smb_if_unused(self, stopped: VMRuntime) -> None:
+        """종료된 VM 외에 공유 SMB 서버를 사용하는 VM이 없을 때만 SMB 공유를 비활성화한다.
+
+        다른 VM이 실행 중이면 smbd는 유지하고 종료된 VM의 공유만 비운다.
+        """
+        if self.vm_pool.secondary and self.vm_pool.any_running(exclude=stopped):
+            logging.info(f"다른 VM이 실행 중이므로 SMB 서버를 유지하고 {stopped.name} 공유만 비웁니다.")
+            self.smb_manager.cleanup_profile_share(stopped.name)
+            return
+
         if self.smb_manager.deactivate_smb_share():
             # SMB 비활성화 후 상태 즉시 업데이트
             if hasattr(self, 'current_state') and self.current_state is not None:
@@ -927,16 +1117,91 @@ class GShareManager:
                 self.pending_stop_at = None
                 return
 
-            if self.proxmox_api.stop_vm():
-                logging.info("예약된 VM 종료 명령(qm stop) 전송 성공")
+            stop_task = self.vm_lifecycle.sleep()
+            if stop_task is not None:
+                logging.info(f"예약된 VM 종료 명령 전송 성공 (방식: {self.vm_lifecycle.mode})")
                 self.pending_stop_at = None
+                stop_task.add_done_callback(lambda f: self._on_vm_task_done('VM 종료', f))
             else:
-                self.pending_stop_at = time.time() + 5
+                self._set_pending_stop(time.time() + 5)
                 logging.warning("VM 종료 명령(qm stop) 전송 실패, 5초 후 재시도합니다.")
         except Exception as e:
-            self.pending_stop_at = time.time() + 5
+            self._set_pending_stop(time.time() + 5)
             logging.error(f"예약된 VM 종료 명령 처리 중 오류: {e}")
 
+    def _on_vm_task_done(self, action: str, future: Future, runtime: Optional[VMRuntime] = None) -> None:
+        """Proxmox 작업(UPID) 완료 시 결과를 기록하고 상태 갱신을 요청한다. (작업 추적 스레드에서 호출)"""
+        (runtime.poller if runtime is not None else self.status_poller).refresh_soon()
+        error = future.exception()
+        if error is None:
+            logging.info(f"{action} 작업 완료")
+        else:
+            logging.error(f"{action} 작업 실패: {error}")
+        self.request_state_refresh()
+
+    def _record_history(self, kind: str, value: Optional[float] = None, detail: Optional[str] = None,
+                        vm: Optional[str] = None) -> None:
+        if self.history is not None:
+            self.history.record(kind, value, detail, vm=vm)
+
+    def retire_consumed_shares(self) -> list[str]:
+        """VM이 모두 읽은 공유 항목의 링크만 제거 (smbd 재시작/공유 비활성화 없음). 해제한 원본 경로 반환"""
+        if self.share_consumption is None:
+            return []
+        retired = []
+        for item in self.share_consumption.pop_ready():
+            if self.smb_manager.remove_symlink(item.source, deactivate_when_empty=False):
+                logging.info(f"VM이 읽기를 마친 공유를 해제했습니다: {item.source} (파일 {len(item.read)}개)")
+                self._record_history(HistoryStore.KIND_UNSHARE, detail=item.source)
+                retired.append(item.source)
+        if retired:
+            self.request_state_refresh()
+        return retired
+
+    def _set_pending_stop(self, when: float) -> None:
+        """VM stop 명령을 when 시점으로 예약하고 스케줄러 타이머를 등록한다."""
+        self.pending_stop_at = when
+        self.scheduler.schedule(self.EVENT_PENDING_STOP, when)
+
+    def _set_profile_pending_stop(self, runtime: VMRuntime, when: float) -> None:
+        """추가 VM 프로필의 stop 명령을 when 시점으로 예약한다."""
+        runtime.pending_stop_at = when
+        self.scheduler.schedule(runtime.pending_stop_event, when)
+
+    def _process_profile_pending_stop(self, runtime: VMRuntime) -> None:
+        """추가 VM 프로필의 예약된 stop 명령을 처리한다."""
+        if runtime.pending_stop_at is None or time.time() < runtime.pending_stop_at:
+            return
+
+        try:
+            if not runtime.status.vm_running:
+                logging.info(f"[{runtime.name}] 예약된 stop 시점에 VM이 이미 종료되어 stop 전송을 생략합니다.")
+                runtime.pending_stop_at = None
+                return
+
+            stop_task = runtime.lifecycle.sleep()
+            if stop_task is not None:
+                logging.info(f"[{runtime.name}] 예약된 VM 종료 명령 전송 성공 (방식: {runtime.lifecycle.mode})")
+                runtime.pending_stop_at = None
+                stop_task.add_done_callback(
+                    lambda f: self._on_vm_task_done(f'VM 종료({runtime.name})', f, runtime))
+            else:
+                self._set_profile_pending_stop(runtime, time.time() + 5)
+                logging.warning(f"[{runtime.name}] VM 종료 명령(qm stop) 전송 실패, 5초 후 재시도합니다.")
+        except Exception as e:
+            self._set_profile_pending_stop(runtime, time.time() + 5)
+            logging.error(f"[{runtime.name}] 예약된 VM 종료 명령 처리 중 오류: {e}")
+
+    def request_state_refresh(self, update_monitored_folders: bool = False) -> None:
+        """상태 재계산/전송을 모니터 루프에 요청한다. (연속 요청은 1회로 합쳐짐)"""
+        if update_monitored_folders:
+            self._state_refresh_full = True
+        self.scheduler.request(self.EVENT_STATE)
+
+    def request_scan(self) -> None:
+        """폴더 변경 처리를 다음 주기까지 기다리지 않고 즉시 수행하도록 요청한다."""
+        self.scheduler.request(self.EVENT_SCAN)
+
     def update_folder_mount_state(self, folder_path: str, is_mounted: bool) -> None:
         """특정 폴더의 마운트 상태만 업데이트 (효율적인 상태 업데이트)"""
         try:
@@ -979,63 +1244,128 @@ class GShareManager:
 
 
     def handle_folder_event(self, folder_path: str, file_name: Optional[str] = None) -> tuple[bool, str]:
-        """NAS 이벤트 기반으로 전달된 폴더를 즉시 처리"""
+        """NAS 이벤트 수신: EVENT_BATCH_WINDOW 동안 묶어서 처리하도록 넣고 즉시 반환 (0이면 바로 처리)"""
         if not self.config.EVENT_ENABLED:
             return False, '이벤트 수신 기능이 비활성화되어 있습니다.'
 
+        normalized = (folder_path or '').strip().strip('/')
+        if not normalized:
+            return False, '폴더 경로가 비어 있습니다.'
+        # 묶음 처리 시 요청에는 즉시 응답하므로 잘못된 폴더는 큐에 넣기 전에 거른다.
+        if '..' in normalized.split('/') or not os.path.isdir(os.path.join(self.config.MOUNT_PATH, normalized)):
+            return False, f'폴더를 찾을 수 없습니다: {normalized}'
+
+        if self.config.EVENT_BATCH_WINDOW <= 0:
+            return self._apply_folder_events({normalized: {file_name} if file_name else set()}, time.time())
+
+        # 성능 최적화: 이벤트 폭주 시 요청마다 Proxmox 조회/심링크/SMB 확인을 반복하지 않고
+        # 대기 시간 동안 모인 이벤트를 스케줄러 스레드에서 한 번에 처리한다.
+        if self.event_batcher.add(normalized, file_name):
+            self.scheduler.schedule_in(self.EVENT_FOLDER_BATCH, self.config.EVENT_BATCH_WINDOW)
+        detail = f"{normalized} ({file_name})" if file_name else normalized
+        return True, f"{detail} 처리 대기 중"
+
+    def _process_folder_batch(self) -> None:
+        """대기 시간 동안 모인 NAS 이벤트 묶음을 한 번에 처리"""
+        batch = self.event_batcher.drain()
+        if not batch:
+            return
+        success, detail = self._apply_folder_events(batch.folders, batch.first_event_at)
+        if batch.event_count > 1:
+            logging.info(f"NAS 이벤트 {batch.event_count}개를 묶어 처리했습니다. (폴더 {len(batch.folders)}개): {detail}")
+        if not success:
+            logging.error(f"이벤트 묶음 처리 실패: {detail}")
+        self.request_state_refresh(update_monitored_folders=True)
+
+    def _apply_folder_events(self, folders: dict[str, set], event_time: float) -> tuple[bool, str]:
+        """폴더 이벤트(폴더 -> 파일명 집합)를 반영: 심링크 생성, SMB 활성화 1회, 담당 VM별 시작 최대 1회"""
         try:
-            normalized = (folder_path or '').strip().strip('/')
-            if not normalized:
-                return False, '폴더 경로가 비어 있습니다.'
-
             # 방어적 코드: 설정 제약 검증 및 강제 보정
             share_mode = self.config.SMB_SHARE_MODE
             if share_mode == 'file' and self.config.MONITOR_MODE != 'event':
                 logging.warning("공유 모드가 'file'이지만 감시 방식이 'event'가 아닙니다. 강제로 'folder' 모드로 처리합니다.")
                 share_mode = 'folder'
 
-            event_mtime = time.time()
-            self.folder_monitor.previous_mtimes[normalized] = event_mtime
-            self.folder_monitor._save_scan_cache()
-            mount_targets = self.folder_monitor._filter_mount_targets([normalized])
-            if not mount_targets:
-                mount_targets = [normalized]
+            event_folders = list(folders)
+            for normalized in event_folders:
+                self._record_history(HistoryStore.KIND_FOLDER_EVENT, detail=normalized)
+                self.folder_monitor.previous_mtimes[normalized] = event_time
+                # 이벤트로 변경이 확인된 폴더는 주기 캐시에 남은 이전 목록을 쓰지 않도록 무효화
+                self.folder_monitor.stat_cache.invalidate(os.path.join(self.config.MOUNT_PATH, normalized))
+            self.folder_monitor._record_scan_cache_changes(event_folders, [])
+
+            if share_mode == 'file':
+                # 파일 단위 공유는 폴더마다 독립적이므로 상위/하위 폴더 선별을 하지 않는다.
+                mount_targets = event_folders
+            else:
+                mount_targets = self.folder_monitor._filter_mount_targets(event_folders) or event_folders
+
+            # 이벤트 폴더를 담당하는 VM (추가 프로필이 없으면 기본 VM)
+            routed: list[VMRuntime] = []
+            for normalized in event_folders:
+                for runtime in self.vm_pool.route(normalized):
+                    if all(runtime is not existing for existing in routed):
+                        routed.append(runtime)
 
             # 파일 이벤트 시간 갱신
-            if file_name:
-                self.last_file_event_time = time.time()
-
-            for folder in mount_targets:
-                if share_mode == 'file':
-                    if file_name:
-                        # 부모 폴더가 이미 공유중인지 체크하여 스킵
-                        if self.smb_manager.is_ancestor_shared(folder):
-                            logging.info(f"부모 폴더 '{folder}'가 이미 공유 중이므로 파일 '{file_name}'의 개별 마운트를 스킵합니다.")
-                            continue
-                        self.smb_manager.create_file_symlink(folder, file_name)
+            if any(folders.values()):
+                for runtime in routed:
+                    if runtime is self.vm_pool.primary:
+                        self.last_file_event_time = time.time()
                     else:
+                        runtime.last_file_event_time = time.time()
+
+            shared_files: list[str] = []
+            # 실제로 공유된 폴더만 이력에 남긴다. (건너뛴 폴더/생성 실패 제외)
+            shared_folders: list[str] = []
+            if share_mode == 'file':
+                for folder in mount_targets:
+                    if not folders.get(folder):
                         logging.debug("파일 단위 공유 모드이나 파일명이 전달되지 않아 심링크 생성을 생략합니다.")
-                else:
-                    self.smb_manager.create_symlink(folder)
+                        continue
+                    # 부모 폴더가 이미 공유중인지 체크하여 스킵
+                    if self.smb_manager.is_ancestor_shared(folder):
+                        logging.info(f"부모 폴더 '{folder}'가 이미 공유 중이므로 파일 {len(folders[folder])}개의 개별 마운트를 스킵합니다.")
+                        continue
+                    folder_files = [file_name for file_name in sorted(folders[folder])
+                                    if self.smb_manager.create_file_symlink(folder, file_name)]
+                    if folder_files:
+                        shared_files.extend(folder_files)
+                        shared_folders.append(folder)
+            else:
+                shared_folders, failed = self.smb_manager.create_symlinks(mount_targets)
+                if failed:
+                    logging.error(f"이벤트 폴더 공유 실패: {', '.join(failed)}")
+
+            for folder in shared_folders:
+                self._record_history(HistoryStore.KIND_SHARE, detail=folder)
 
             if mount_targets:
                 if self.smb_manager.check_smb_status():
                     logging.debug('SMB 공유가 이미 활성화되어 있어 재시작을 생략합니다.')
                 elif self.smb_manager.activate_smb_share():
                     self.last_action = f"SMB 공유 활성화(이벤트): {', '.join(mount_targets)}"
-                    if share_mode == 'file' and file_name:
-                        self.last_action += f" -> {file_name}"
+                    if shared_files:
+                        self.last_action += f" -> {', '.join(shared_files)}"
 
-            if not self.proxmox_api.is_vm_running():
-                self.last_action = 'VM 시작(이벤트)'
-                if self.proxmox_api.start_vm():
-                    logging.info('VM 시작 성공 (이벤트 기반)')
+            for runtime in routed:
+                if runtime.status.vm_running:
+                    continue
+                if runtime is self.vm_pool.primary:
+                    self.last_action = 'VM 시작(이벤트)'
                 else:
-                    logging.error('VM 시작 실패 (이벤트 기반)')
+                    self.last_action = f'VM 시작(이벤트): {runtime.name}'
+                start_task = runtime.lifecycle.wake('이벤트', requested_at=event_time)
+                if start_task is not None:
+                    logging.info(f'VM 시작 성공 (이벤트 기반, {runtime.name})')
+                    start_task.add_done_callback(
+                        lambda f, rt=runtime: self._on_vm_task_done(f'VM 시작({rt.name})', f, rt))
+                else:
+                    logging.error(f'VM 시작 실패 (이벤트 기반, {runtime.name})')
 
             ret_detail = ', '.join(mount_targets)
-            if share_mode == 'file' and file_name:
-                ret_detail += f" ({file_name})"
+            if shared_files:
+                ret_detail += f" ({', '.join(shared_files)})"
             return True, ret_detail
         except Exception as e:
             logging.error(f'이벤트 처리 실패: {e}')
@@ -1054,15 +1384,10 @@ class GShareManager:
                 path for path, mtime in self.folder_monitor.previous_mtimes.items()
                 if mtime and mtime >= threshold_epoch
             ]
+            self.folder_monitor.stat_cache.new_cycle()
             mount_targets = self.folder_monitor._filter_mount_targets(recent_folders)
 
-            mounted_folders: list[str] = []
-            failed_folders: list[str] = []
-            for folder in mount_targets:
-                if self.smb_manager.create_symlink(folder):
-                    mounted_folders.append(folder)
-                else:
-                    failed_folders.append(folder)
+            mounted_folders, failed_folders = self.smb_manager.create_symlinks(mount_targets)
 
             if mounted_folders:
                 self.smb_manager.activate_smb_share()
@@ -1089,15 +1414,13 @@ class GShareManager:
             logging.info(f"MQTT 수신 bulk_mount_recent(days={days or self.recent_mount_days}): {ok}, {detail}")
         elif command == "android_vm_on":
             if not self.proxmox_api.is_vm_running():
-                success = self.proxmox_api.start_vm()
+                success = self.vm_lifecycle.wake('MQTT') is not None
                 self.last_action = f"Android VM ON (MQTT): {'성공' if success else '실패'}"
             else:
                 self.last_action = "Android VM ON (MQTT): 이미 실행 중"
             logging.info(self.last_action)
             # 상태 강제 업데이트 전송
-            self.current_state = self.update_state(update_monitored_folders=False)
-            if self.mqtt_manager:
-                self.mqtt_manager.publish_state(self.current_state)
+            self.request_state_refresh()
         else:
             logging.warning(f"지원하지 않는 MQTT 명령: {command}")
 
@@ -1142,9 +1465,11 @@ class GShareManager:
                                 if update_monitored_folders or previous_state is None
                                 else getattr(previous_state, 'last_check_time', '-'))
 
-            vm_running = self.proxmox_api.is_vm_running()
-            cpu_usage = self.proxmox_api.get_cpu_usage() or 0.0
-            uptime = self.proxmox_api.get_vm_uptime()
+            # Proxmox 지연과 무관하게 즉시 응답하도록 폴러의 최신 스냅샷만 사용
+            snapshot = self.status_poller.snapshot
+            vm_running = snapshot.vm_running
+            cpu_usage = snapshot.cpu_usage
+            uptime = snapshot.uptime
             uptime_str = self._format_uptime(
                 uptime) if uptime is not None else "알 수 없음"
 
@@ -1241,169 +1566,390 @@ class GShareManager:
                 recent_mount_days=3
             )
 
+    def start_periodic_events(self) -> None:
+        """주기 작업 타이머를 즉시 실행되도록 등록"""
+        self.scheduler.schedule(self.EVENT_CYCLE, time.time())
+        self.scheduler.schedule(self.EVENT_CPU, time.time())
+
     def monitor(self) -> None:
-        last_vm_status = None  # VM 상태 변화 감지를 위한 변수
-        count = 0
+        """스케줄러 이벤트를 받아 주기 작업과 외부 요청을 한 곳에서 처리하는 모니터 루프"""
+        self.start_periodic_events()
         while True:
             try:
-                # 다음 실행 시간 계산 (현재 시간 + 체크 간격)
-                next_run_time = time.time() + self.config.CHECK_INTERVAL
-                
-                update_log_level()
-
-                # 전체 기능 활성화 여부 확인
-                if not self.config.GSHARE_ENABLED:
-                    logging.debug('GShare 전체 기능이 비활성화되어 있습니다.')
-                    self.current_state = self.update_state(update_monitored_folders=False)
-                    if gshare_web_server:
-                        gshare_web_server.emit_state_update()
-                    time.sleep(self.config.CHECK_INTERVAL)
-                    continue
-                logging.debug(f"모니터링 루프 Count:{count}")
-                count += 1
+                events = self.scheduler.wait()
+            except Exception as e:
+                logging.error(f"모니터 스케줄러 대기 중 오류: {e}")
+                time.sleep(1)
+                continue
 
-                # NFS attribute 캐시 keepalive (HDD IO stall 시 폴더 깜박임 방지)
-                if self.config.NFS_MOUNT_ENABLED and hasattr(self, 'folder_monitor'):
-                    try:
-                        self.folder_monitor.keepalive_nfs()
-                    except Exception as e:
-                        logging.debug(f"NFS keepalive 오류 (무시): {e}")
-                # VM 상태 확인
-                current_vm_status = False
-                if self.config.VM_MONITOR_ENABLED:
-                    try:
-                        current_vm_status = self.proxmox_api.is_vm_running()
-                    except Exception as e:
-                        logging.error(f'VM 상태 확인 중 오류: {e}')
-
-                # VM 상태가 변경되었고, 현재 종료 상태인 경우
-                if last_vm_status is not None and last_vm_status != current_vm_status and not current_vm_status:
-                    logging.info("VM이 종료되어 SMB 공유를 비활성화합니다.")
-                    if self.smb_manager.deactivate_smb_share():
-                        # SMB 비활성화 후 상태 즉시 업데이트
-                        if hasattr(self, 'current_state') and self.current_state is not None:
-                            self.current_state.smb_running = False
-                        logging.info("SMB 공유 비활성화 완료 및 상태 업데이트")
-                    else:
-                        logging.error("SMB 공유 비활성화 실패")
+            self.dispatch_events(events)
+
+    def dispatch_events(self, events: set[str]) -> None:
+        """스케줄러 이벤트를 정해진 순서로 처리"""
+        for event, handler in ((self.EVENT_CYCLE, self._run_monitor_cycle),
+                               (self.EVENT_SCAN, self._run_scan_cycle),
+                               (self.EVENT_CPU, self._run_cpu_cycle),
+                               (self.EVENT_FOLDER_BATCH, self._process_folder_batch),
+                               (self.EVENT_PENDING_STOP, self._process_pending_stop),
+                               (self.EVENT_STATE, self._publish_state)):
+            if event not in events:
+                continue
+            try:
+                handler()
+            except Exception as e:
+                logging.error(f"모니터링 루프에서 예상치 못한 오류 발생 ({event}): {e}")
+
+        # 추가 VM 프로필별 예약 stop 타이머
+        for runtime in self.vm_pool.secondary:
+            if runtime.pending_stop_event in events:
+                self._process_profile_pending_stop(runtime)
 
-                last_vm_status = current_vm_status
+    def _run_monitor_cycle(self) -> None:
+        """CHECK_INTERVAL 주기 작업: keepalive, VM 상태 확인, 폴더 변경 확인"""
+        started_at = time.time()
+        # 다음 주기를 먼저 예약해 작업 중 오류가 나도 스케줄이 유지되도록 한다.
+        self.scheduler.schedule(self.EVENT_CYCLE, started_at + self.config.CHECK_INTERVAL)
 
-                if self.config.POLLING_ENABLED:
+        update_log_level()
+
+        # 전체 기능 활성화 여부 확인
+        if not self.config.GSHARE_ENABLED:
+            logging.debug('GShare 전체 기능이 비활성화되어 있습니다.')
+            self.request_state_refresh()
+            return
+        self._monitor_count += 1
+        logging.debug(f"모니터링 루프 Count:{self._monitor_count}")
+
+        # 주기 단위 stat 캐시 초기화 (이번 주기의 keepalive/마운트 선택/트랜스코딩이 공유)
+        if hasattr(self, 'folder_monitor'):
+            self.folder_monitor.stat_cache.new_cycle()
+
+        # NFS attribute 캐시 keepalive (HDD IO stall 시 폴더 깜박임 방지)
+        if self.config.NFS_MOUNT_ENABLED and hasattr(self, 'folder_monitor'):
+            try:
+                self.folder_monitor.keepalive_nfs()
+            except Exception as e:
+                logging.debug(f"NFS keepalive 오류 (무시): {e}")
+
+        current_vm_status = self._check_vm_status_transition()
+        self._process_folder_changes(current_vm_status)
+        self.request_state_refresh(update_monitored_folders=True)
+
+        elapsed = time.time() - started_at
+        if elapsed > self.config.CHECK_INTERVAL:
+            logging.warning(f"체크 간격이 너무 짧습니다. 모니터링 작업이 체크 간격({self.config.CHECK_INTERVAL}초)보다 {elapsed - self.config.CHECK_INTERVAL:.2f}초 더 걸렸습니다.")
+
+    def _run_scan_cycle(self) -> None:
+        """백그라운드 스캔 결과가 도착했을 때 다음 주기를 기다리지 않고 즉시 처리"""
+        if not self.config.GSHARE_ENABLED:
+            return
+        current_vm_status = False
+        if self.config.VM_MONITOR_ENABLED:
+            try:
+                current_vm_status = self.proxmox_api.is_vm_running()
+            except Exception as e:
+                logging.error(f'VM 상태 확인 중 오류: {e}')
+        # 결과 처리만 수행 (여기서 새 스캔을 시작하면 스캔 완료 -> 재스캔이 끝없이 반복됨)
+        if self._process_folder_changes(current_vm_status, start_scan=False):
+            self.request_state_refresh(update_monitored_folders=True)
+
+    def _check_vm_status_transition(self) -> bool:
+        """VM 상태를 확인하고, 실행 -> 종료로 바뀌었으면 SMB 공유를 비활성화한다."""
+        current_vm_status = False
+        if self.config.VM_MONITOR_ENABLED:
+            try:
+                current_vm_status = self.proxmox_api.is_vm_running()
+            except Exception as e:
+                logging.error(f'VM 상태 확인 중 오류: {e}')
+
+        # VM 상태가 변경되었고, 현재 종료 상태인 경우
+        if self._last_vm_status is not None and self._last_vm_status != current_vm_status and not current_vm_status:
+            logging.info("VM이 종료되어 SMB 공유를 비활성화합니다.")
+            self._record_history(HistoryStore.KIND_VM_STOP, vm=VMPool.PRIMARY_NAME)
+            self._deactivate_smb_if_unused(self.vm_pool.primary)
+        elif self._last_vm_status is not None and not self._last_vm_status and current_vm_status:
+            self._record_history(HistoryStore.KIND_VM_START, detail=self.vm_lifecycle.last_reason or '외부',
+                                 vm=VMPool.PRIMARY_NAME)
+            self.vm_lifecycle.last_reason = None
+            if self.smb_activity:
+                self.smb_activity.reset_session()
+            if self.share_consumption is not None:
+                self.share_consumption.reset()
+
+        self._last_vm_status = current_vm_status
+
+        if self.config.VM_MONITOR_ENABLED:
+            for runtime in self.vm_pool.secondary:
+                running = runtime.status.vm_running
+                if runtime.last_vm_status and not running:
+                    logging.info(f"[{runtime.name}] VM 종료 감지")
+                    runtime.last_shutdown_time = time.time()
+                    self._record_history(HistoryStore.KIND_VM_STOP, vm=runtime.name)
+                    self._deactivate_smb_if_unused(runtime)
+                elif runtime.last_vm_status is False and running:
+                    self._record_history(HistoryStore.KIND_VM_START, detail=runtime.lifecycle.last_reason or '외부',
+                                         vm=runtime.name)
+                    runtime.lifecycle.last_reason = None
+                runtime.last_vm_status = running
+        return current_vm_status
+
+    def _process_folder_changes(self, current_vm_status: bool, start_scan: bool = True) -> bool:
+        """폴더 변경을 확인하고 트랜스코딩/SMB 활성화/VM 시작을 처리한다. (변경이 있었으면 True)"""
+        if not self.config.POLLING_ENABLED:
+            logging.debug("폴링 모드가 비활성화되어 있어 폴더 스캔을 건너뜁니다.")
+            return False
+
+        try:
+            logging.debug("폴더 수정 시간 변화 확인 중")
+            changed_folders, should_start_vm, mount_targets = self.folder_monitor.check_modifications(
+                current_vm_status, start_scan=start_scan)
+            if not changed_folders:
+                return False
+
+            # 변경된 폴더에 대해 트랜스코딩 실행 (SMB 활성화 전)
+            if self.transcoder.enabled:
+                # 성능 최적화: 변경된 폴더만 정확히 타겟팅하여 비재귀 스캔 (거대 서브트리 스캔 방지)
+                transcode_targets = changed_folders
+                for folder in transcode_targets:
                     try:
-                        logging.debug("폴더 수정 시간 변화 확인 중")
-                        changed_folders, should_start_vm, mount_targets = self.folder_monitor.check_modifications(current_vm_status)
-                        if changed_folders:
-                            # 변경된 폴더에 대해 트랜스코딩 실행 (SMB 활성화 전)
-                            if self.transcoder.enabled:
-                                # 성능 최적화: 변경된 폴더만 정확히 타겟팅하여 비재귀 스캔 (거대 서브트리 스캔 방지)
-                                transcode_targets = changed_folders
-                                for folder in transcode_targets:
-                                    try:
-                                        folder_full_path = os.path.join(self.config.MOUNT_PATH, folder)
-                                        self.transcoder.process_folder_blocking(folder_full_path, recursive=False)
-                                    except Exception as te:
-                                        logging.error(f"트랜스코딩 오류 ({folder}): {te}")
-
-                            # SMB가 비활성 상태일 때만 공유 활성화(활성 상태 재시작 방지)
-                            if mount_targets and self.config.SMB_ENABLED:
-                                if self.smb_manager.check_smb_status():
-                                    logging.debug("SMB 공유가 이미 활성화되어 있어 재시작을 생략합니다.")
-                                elif self.smb_manager.activate_smb_share():
-                                    self.last_action = f"SMB 공유 활성화: {', '.join(changed_folders)}"
-
-                            # VM이 정지 상태이고 최근 수정된 파일이 있는 경우에만 시작
-                            if self.config.VM_MONITOR_ENABLED and not current_vm_status and should_start_vm:
-                                self.last_action = "VM 시작"
-                                if self.proxmox_api.start_vm():
-                                    logging.info("VM 시작 성공")
-                                else:
-                                    logging.error("VM 시작 실패")
-                    except Exception as e:
-                        logging.error(f"파일시스템 모니터링 중 오류: {e}")
+                        folder_full_path = os.path.join(self.config.MOUNT_PATH, folder)
+                        self.transcoder.process_folder_blocking(
+                            folder_full_path, recursive=False,
+                            stat_cache=self.folder_monitor.stat_cache)
+                    except Exception as te:
+                        logging.error(f"트랜스코딩 오류 ({folder}): {te}")
+
+            if self.config.SMB_SHARE_MODE == 'folder':
+                for folder in mount_targets:
+                    self._record_history(HistoryStore.KIND_SHARE, detail=folder)
+
+            # SMB가 비활성 상태일 때만 공유 활성화(활성 상태 재시작 방지)
+            if mount_targets and self.config.SMB_ENABLED:
+                if self.smb_manager.check_smb_status():
+                    logging.debug("SMB 공유가 이미 활성화되어 있어 재시작을 생략합니다.")
+                elif self.smb_manager.activate_smb_share():
+                    self.last_action = f"SMB 공유 활성화: {', '.join(changed_folders)}"
+
+            if self.vm_pool.secondary:
+                # 추가 VM 프로필이 있으면 변경 폴더를 담당 VM별로 나눠 시작 여부를 판단
+                should_start_vm = self._start_routed_vms(changed_folders, current_vm_status)
+
+            # VM이 정지 상태이고 최근 수정된 파일이 있는 경우에만 시작
+            if self.config.VM_MONITOR_ENABLED and not current_vm_status and should_start_vm:
+                self.last_action = "VM 시작"
+                start_task = self.vm_lifecycle.wake('폴더 변경')
+                if start_task is not None:
+                    logging.info("VM 시작 성공")
+                    start_task.add_done_callback(lambda f: self._on_vm_task_done('VM 시작', f))
                 else:
-                    logging.debug("폴링 모드가 비활성화되어 있어 폴더 스캔을 건너뜁니다.")
+                    logging.error("VM 시작 실패")
+            return True
+        except Exception as e:
+            logging.error(f"파일시스템 모니터링 중 오류: {e}")
+            return False
 
-                try:
-                    self._process_pending_stop()
+    def _check_idle_from_cpu_sample(self) -> bool:
+        """status/current CPU 샘플이 THRESHOLD_COUNT회 연속 임계치 미만이면 유휴로 판단"""
+        cpu_usage = self.proxmox_api.get_cpu_usage()
+        if cpu_usage is None:
+            return False
 
-                    if self.config.VM_MONITOR_ENABLED and self.proxmox_api.is_vm_running():
-                        # 안드로이드가 12시간 이상 가동되었으면 자동 재부팅
-                        try:
-                            uptime = self.proxmox_api.get_vm_uptime()
-                            if uptime is not None and uptime >= 43200:  # 12시간 (12 * 3600)
-                                logging.info(f"안드로이드 VM 가동 시간이 {uptime/3600:.1f}시간입니다. (12시간 임계값 초과) 자동 재부팅을 시작합니다.")
-                                self.reboot_vm()
-                        except Exception as ue:
-                            logging.error(f"VM 업타임 체크 중 오류: {ue}")
-
-                        cpu_usage = self.proxmox_api.get_cpu_usage()
-                        if cpu_usage is not None:
-                            logging.debug(f"현재 CPU 사용량: {cpu_usage}%")
-                            if cpu_usage < self.config.CPU_THRESHOLD:
-                                self.low_cpu_count += 1
-                                logging.debug(
-                                    f"낮은 CPU 사용량 카운트: {self.low_cpu_count}/{self.config.THRESHOLD_COUNT}")
-                                if self.low_cpu_count >= self.config.THRESHOLD_COUNT:
-                                    # 마지막 파일 이벤트 수신 후 30분(1800초) 유예 검사
-                                    if self.last_file_event_time is not None and (time.time() - self.last_file_event_time) < 1800:
-                                        remaining = 1800 - (time.time() - self.last_file_event_time)
-                                        logging.info(f"마지막 파일 이벤트 수신 후 30분이 지나지 않아 VM 종료를 유예합니다. (남은 시간: {remaining:.1f}초)")
-                                        self.low_cpu_count = self.config.THRESHOLD_COUNT
-                                    else:
-                                        self.last_action = "종료 웹훅 전송"
-                                        self._send_shutdown_webhook()
-                                        self.low_cpu_count = 0
-                            else:
-                                self.low_cpu_count = 0
-                except Exception as e:
-                    logging.error(f"VM 모니터링 중 오류: {e}")
+        logging.debug(f"현재 CPU 사용량: {cpu_usage}%")
+        self._record_history(HistoryStore.KIND_CPU, cpu_usage)
+        if cpu_usage >= self.config.CPU_THRESHOLD:
+            self.low_cpu_count = 0
+            return False
 
-                try:
-                    # 상태 업데이트
-                    self.current_state = self.update_state(update_monitored_folders=True)
+        self.low_cpu_count += 1
+        logging.debug(
+            f"낮은 CPU 사용량 카운트: {self.low_cpu_count}/{self.config.THRESHOLD_COUNT}")
+        return self.low_cpu_count >= self.config.THRESHOLD_COUNT
+
+    def _check_idle_from_metrics(self) -> bool:
+        """rrddata 시계열의 창 평균 CPU/업로드/디스크 I/O가 모두 임계치 미만이면 유휴로 판단"""
+        # 부팅 이전(정지 구간) 포인트가 유휴로 집계되지 않도록 업타임 기준으로 자른다.
+        uptime = self.proxmox_api.get_vm_uptime()
+        booted_at = time.time() - uptime if uptime else None
+        if not self.vm_metrics.refresh(since=booted_at):
+            return False
+
+        summary = self.vm_metrics.summary()
+        logging.debug(
+            "rrddata 지표 - " + ", ".join(
+                f"{name}: 평균 {values['mean'] or 0:.1f}, p95 {values['p95'] or 0:.1f}, EWMA {values['ewma'] or 0:.1f}"
+                for name, values in summary.items()))
+
+        if summary['cpu']['mean'] is not None:
+            self._record_history(HistoryStore.KIND_CPU, summary['cpu']['mean'])
+        idle = self.vm_metrics.is_idle(self.config.CPU_THRESHOLD,
+                                       self.config.IDLE_NET_THRESHOLD,
+                                       self.config.IDLE_DISK_THRESHOLD)
+        # 웹 UI 표시용 카운트 (rrddata 모드에서는 창 전체가 유휴면 임계 횟수로 표시)
+        self.low_cpu_count = self.config.THRESHOLD_COUNT if idle else 0
+        return idle
+
+    def _start_routed_vms(self, changed_folders: list[str], current_vm_status: bool) -> bool:
+        """변경 폴더를 VM 프로필별로 라우팅해 추가 VM을 시작하고, 기본 VM 시작 필요 여부를 반환한다."""
+        primary = self.vm_pool.primary
+        start_primary = False
+        to_start: dict[str, VMRuntime] = {}
+        for folder in changed_folders:
+            mtime = self.folder_monitor.previous_mtimes.get(folder) or 0
+            for runtime in self.vm_pool.route(folder):
+                if runtime is primary:
+                    start_primary = start_primary or mtime > self.last_shutdown_time
+                elif mtime > runtime.last_shutdown_time:
+                    to_start[runtime.name] = runtime
+
+        if self.config.VM_MONITOR_ENABLED:
+            for runtime in to_start.values():
+                if runtime.status.vm_running:
+                    continue
+                self.last_action = f"VM 시작: {runtime.name}"
+                start_task = runtime.lifecycle.wake('폴더 변경')
+                if start_task is not None:
+                    logging.info(f"[{runtime.name}] VM 시작 성공")
+                    start_task.add_done_callback(
+                        lambda f, rt=runtime: self._on_vm_task_done(f'VM 시작({rt.name})', f, rt))
+                else:
+                    logging.error(f"[{runtime.name}] VM 시작 실패")
+        return start_primary and not current_vm_status
+
+    def _run_profile_cpu_cycle(self, runtime: VMRuntime) -> None:
+        """추가 VM 프로필의 CPU 사용량으로 유휴 여부를 판단해 종료를 예약한다."""
+        status = runtime.status
+        if not status.vm_running:
+            runtime.low_cpu_count = 0
+            return
+        if status.stale:
+            # 폴링 실패로 이전 값을 유지 중이면 유휴 카운트를 진행하지 않는다.
+            return
+        cpu_usage = status.cpu_usage
 
-                    # 웹 서버를 통해 소켓으로 상태 업데이트 전송
-                    if gshare_web_server:
-                        gshare_web_server.emit_state_update()
-                        # 로그도 주기적으로 업데이트 (모든 루프마다 업데이트)
-                        gshare_web_server.emit_log_update()
+        threshold = runtime.profile.cpu_threshold
+        if threshold is None:
+            threshold = self.config.CPU_THRESHOLD
+        threshold_count = runtime.profile.threshold_count or self.config.THRESHOLD_COUNT
 
-                    # MQTT 상태 업데이트 전송
-                    if self.mqtt_manager:
-                        self.mqtt_manager.publish_state(self.current_state)
+        if cpu_usage >= threshold:
+            runtime.low_cpu_count = 0
+            return
 
-                except Exception as e:
-                    logging.error(f"상태 업데이트 중 오류: {e}")
-                
-                # 다음 실행 시간까지 남은 시간 계산
-                sleep_time = next_run_time - time.time()
-                
-                # 작업이 체크 간격보다 오래 걸린 경우 로그 기록
-                if sleep_time <= 0:
-                    logging.warning(f"체크 간격이 너무 짧습니다. 모니터링 작업이 체크 간격({self.config.CHECK_INTERVAL}초)보다 {abs(sleep_time):.2f}초 더 걸렸습니다.")
-                    continue  # 즉시 다음 루프 실행
-                
-                # 남은 시간 대기(예약된 VM stop 시점이 더 이르면 그 시점까지만 대기)
-                sleep_until = next_run_time
-                if self.pending_stop_at is not None:
-                    sleep_until = min(sleep_until, self.pending_stop_at)
+        runtime.low_cpu_count += 1
+        logging.debug(f"[{runtime.name}] 낮은 CPU 사용량 카운트: {runtime.low_cpu_count}/{threshold_count}")
+        if runtime.low_cpu_count < threshold_count:
+            return
 
-                dynamic_sleep = max(0, sleep_until - time.time())
-                if dynamic_sleep > 0:
-                    time.sleep(dynamic_sleep)
+        grace = self.config.SHUTDOWN_GRACE
+        if runtime.last_file_event_time is not None and (time.time() - runtime.last_file_event_time) < grace:
+            logging.info(f"[{runtime.name}] 마지막 파일 이벤트 수신 후 {grace}초가 지나지 않아 VM 종료를 유예합니다.")
+            runtime.low_cpu_count = threshold_count
+            return
 
+        runtime.low_cpu_count = 0
+        if runtime.profile.shutdown_webhook_url:
+            try:
+                response = requests.post(runtime.profile.shutdown_webhook_url, timeout=5)
+                response.raise_for_status()
+                logging.info(f"[{runtime.name}] 종료 웹훅 전송 성공")
             except Exception as e:
-                logging.error(f"모니터링 루프에서 예상치 못한 오류 발생: {e}")
-                
-                # 오류 발생 시에도 다음 스케줄 유지를 위해 남은 시간 계산
-                remaining_time = max(0, next_run_time - time.time())
-                if remaining_time > 0:
-                    time.sleep(remaining_time)
+                logging.error(f"[{runtime.name}] 종료 웹훅 전송 실패: {e}")
+                return
+            self._set_profile_pending_stop(runtime, time.time() + 10)
+        else:
+            self._set_profile_pending_stop(runtime, time.time())
+        self.last_action = f"VM 종료 예약: {runtime.name}"
+        runtime.last_shutdown_time = time.time()
+        self._deactivate_smb_if_unused(runtime)
+
+    def _run_cpu_cycle(self) -> None:
+        """CHECK_INTERVAL 주기로 VM 업타임/CPU 사용량을 샘플링하여 자동 재부팅/종료를 판단"""
+        self.scheduler.schedule(self.EVENT_CPU, time.time() + self.config.CHECK_INTERVAL)
+        if not self.config.GSHARE_ENABLED:
+            return
+
+        try:
+            self._process_pending_stop()
+
+            if self.config.VM_MONITOR_ENABLED and self.proxmox_api.is_vm_running():
+                # 안드로이드가 12시간 이상 가동되었으면 자동 재부팅
+                try:
+                    uptime = self.proxmox_api.get_vm_uptime()
+                    if uptime is not None and uptime >= 43200:  # 12시간 (12 * 3600)
+                        logging.info(f"안드로이드 VM 가동 시간이 {uptime/3600:.1f}시간입니다. (12시간 임계값 초과) 자동 재부팅을 시작합니다.")
+                        self.reboot_vm()
+                except Exception as ue:
+                    logging.error(f"VM 업타임 체크 중 오류: {ue}")
+
+                if self.config.METRICS_SOURCE == 'rrddata':
+                    idle = self._check_idle_from_metrics()
                 else:
-                    # 이미 다음 실행 시간이 지났다면 짧은 시간만 대기 후 재시도
-                    time.sleep(1)  # 1초 대기 후 재시도
+                    idle = self._check_idle_from_cpu_sample()
+
+                smb_state = self.smb_activity.update() if self.smb_activity else SMBActivityProbe.UNKNOWN
+                drained = False
+                if smb_state == SMBActivityProbe.ACTIVE:
+                    if idle or self.low_cpu_count:
+                        logging.info("SMB 공유 파일을 읽는 중이므로 VM 종료를 보류합니다.")
+                    idle = False
+                    self.low_cpu_count = 0
+                elif smb_state == SMBActivityProbe.DRAINED and idle and self.config.SMB_DRAINED_SKIP_GRACE:
+                    # 공유 파일을 모두 읽었고 유휴 판정(THRESHOLD_COUNT 또는 rrddata 창)도 충족한 경우에만
+                    # 마지막 파일 이벤트 후 유예 시간을 건너뛴다. (네트워크 업로드 중 조기 종료 방지를 위해 선택 사항)
+                    logging.info("SMB 공유 파일 읽기가 끝나고 VM이 유휴 상태이므로 유예 시간 없이 종료합니다.")
+                    drained = True
+
+                if self.share_consumption is not None and smb_state != SMBActivityProbe.UNKNOWN:
+                    self.share_consumption.observe(self.smb_activity.last_sample.open_files)
+                    self.retire_consumed_shares()
+
+                if idle:
+                    # 마지막 파일 이벤트 수신 후 SHUTDOWN_GRACE(기본 30분) 유예 검사
+                    grace = self.config.SHUTDOWN_GRACE
+                    if not drained and self.last_file_event_time is not None and (time.time() - self.last_file_event_time) < grace:
+                        remaining = grace - (time.time() - self.last_file_event_time)
+                        logging.info(f"마지막 파일 이벤트 수신 후 {grace}초가 지나지 않아 VM 종료를 유예합니다. (남은 시간: {remaining:.1f}초)")
+                        self.low_cpu_count = self.config.THRESHOLD_COUNT
+                    else:
+                        self.last_action = "종료 웹훅 전송"
+                        self._send_shutdown_webhook()
+                        self.low_cpu_count = 0
+                        self.vm_metrics.reset()
+                        if self.smb_activity:
+                            self.smb_activity.reset_session()
+                        if self.share_consumption is not None:
+                            self.share_consumption.reset()
+        except Exception as e:
+            logging.error(f"VM 모니터링 중 오류: {e}")
+
+        if not self.config.VM_MONITOR_ENABLED:
+            return
+        for runtime in self.vm_pool.secondary:
+            try:
+                self._run_profile_cpu_cycle(runtime)
+            except Exception as e:
+                logging.error(f"[{runtime.name}] VM 모니터링 중 오류: {e}")
+
+    def _publish_state(self) -> None:
+        """요청된 상태 재계산을 1회 수행하고 웹 소켓/MQTT로 전송"""
+        update_monitored_folders = self._state_refresh_full
+        self._state_refresh_full = False
+        try:
+            self.current_state = self.update_state(update_monitored_folders=update_monitored_folders)
+
+            # 웹 서버를 통해 소켓으로 상태 업데이트 전송
+            if gshare_web_server:
+                gshare_web_server.emit_state_update()
+                if update_monitored_folders:
+                    # 로그도 주기적으로 업데이트 (주기 작업마다 업데이트)
+                    gshare_web_server.emit_log_update()
+
+            # MQTT 상태 업데이트 전송
+            if self.mqtt_manager:
+                self.mqtt_manager.publish_state(self.current_state)
 
+        except Exception as e:
+            logging.error(f"상태 업데이트 중 오류: {e}")
 
     def _update_nfs_mount_state(self) -> None:
         "설정에 따라 NFS 마운트 상태를 업데이트합니다."
@@ -1412,6 +1958,8 @@ class GShareManager:
             self._mount_nfs()
         else:
             logging.info("NFS 마운트 비활성화: 마운트 해제 시도 중...")
+            # 마운트 해제 전에 진행 중인 스캔을 중단해 find가 끊긴 마운트에서 대기하지 않도록 한다.
+            self.folder_monitor.cancel_scan()
             try:
                 if self.config.MOUNT_PATH:
                     subprocess.run(['umount', '-f', self.config.MOUNT_PATH], check=False)
@@ -1767,6 +2315,8 @@ if __name__ == "__main__":
 def on_exit():
     if gshare_manager:
         gshare_manager.folder_monitor.cleanup_resources()
+        if gshare_manager.history is not None:
+            gshare_manager.history.close()
         if gshare_manager.mqtt_manager:
             gshare_manager.mqtt_manager.disconnect()
 
@@ -0,0 +1,137 @@
+from typing import Iterable, Optional
+
+
+class _TrieNode:
+    __slots__ = ('children', 'terminal')
+
+    def __init__(self):
+        self.children: dict[str, '_TrieNode'] = {}
+        self.terminal = False
+
+
+class PathTrie:
+    """경로 구성요소('/' 단위) 트리
+
+    상위 폴더 포함 여부와 하위 폴더 존재 여부를 경로 깊이(O(depth))에 판별한다.
+    마운트 대상 선택과 SMB 공유 상위 폴더 확인에서 공통으로 사용한다.
+    """
+
+    def __init__(self, paths: Optional[Iterable[str]] = None):
+        self._root = _TrieNode()
+        self._size = 0
+        if paths:
+            for path in paths:
+                self.add(path)
+
+    @staticmethod
+    def _split(path: str) -> list[str]:
+        return [part for part in path.strip('/').split('/') if part]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __contains__(self, path: str) -> bool:
+        node = self._find(path)
+        return node is not None and node.terminal
+
+    def _find(self, path: str) -> Optional[_TrieNode]:
+        node = self._root
+        for part in self._split(path):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def add(self, path: str) -> None:
+        parts = self._split(path)
+        if not parts:
+            return
+        node = self._root
+        for part in parts:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _TrieNode()
+            node = child
+        if not node.terminal:
+            node.terminal = True
+            self._size += 1
+
+    def discard(self, path: str) -> None:
+        parts = self._split(path)
+        if not parts:
+            return
+        trail = [self._root]
+        node = self._root
+        for part in parts:
+            node = node.children.get(part)
+            if node is None:
+                return
+            trail.append(node)
+        if not node.terminal:
+            return
+        node.terminal = False
+        self._size -= 1
+
+        # 더 이상 쓰이지 않는 빈 노드를 정리
+        for depth in range(len(parts), 0, -1):
+            current = trail[depth]
+            if current.terminal or current.children:
+                break
+            del trail[depth - 1].children[parts[depth - 1]]
+
+    def clear(self) -> None:
+        self._root = _TrieNode()
+        self._size = 0
+
+    def is_covered(self, path: str, include_self: bool = False) -> bool:
+        """등록된 경로 중 path의 상위 폴더(include_self면 자기 자신 포함)가 있는지 확인"""
+        parts = self._split(path)
+        node = self._root
+        for index, part in enumerate(parts):
+            node = node.children.get(part)
+            if node is None:
+                return False
+            if node.terminal and (include_self or index < len(parts) - 1):
+                return True
+        return False
+
+    def covering(self, path: str) -> Optional[str]:
+        """등록된 경로 중 path 자신 또는 가장 가까운 상위 경로 (없으면 None)"""
+        parts = self._split(path)
+        node = self._root
+        for index, part in enumerate(parts):
+            node = node.children.get(part)
+            if node is None:
+                return None
+            if node.terminal:
+                return '/'.join(parts[:index + 1])
+        return None
+
+    def has_descendant(self, path: str) -> bool:
+        """등록된 경로 중 path의 하위 폴더가 있는지 확인"""
+        node = self._find(path)
+        return node is not None and bool(node.children)
+
+    def descendants(self, path: str) -> list[str]:
+        """등록된 경로 중 path의 하위 경로 목록 (path 자신 제외)"""
+        node = self._find(path)
+        if node is None:
+            return []
+        prefix = '/'.join(self._split(path))
+        result = []
+        stack = [(prefix, child_name, child) for child_name, child in node.children.items()]
+        while stack:
+            parent, name, current = stack.pop()
+            current_path = f"{parent}/{name}" if parent else name
+            if current.terminal:
+                result.append(current_path)
+            stack.extend((current_path, child_name, child) for child_name, child in current.children.items())
+        return result
+
+    def children(self, path: str) -> list[str]:
+        """path 바로 아래에 등록 경로로 이어지는 하위 구성요소 이름 목록"""
+        node = self._find(path)
+        return list(node.children) if node is not None else []
@@ -1,65 +1,278 @@
 import logging
+import threading
 import time
 import requests  # type: ignore
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import Optional
 from config import GshareConfig  # type: ignore
+from proxmox_tasks import ProxmoxTaskTracker
+from resilience import CircuitBreaker, CircuitOpenError, LatencyHistogram
 
 
 class ProxmoxAPI:
-    def __init__(self, config: GshareConfig):
+    def __init__(self, config: GshareConfig, node_name: Optional[str] = None, vm_id: Optional[str] = None,
+                 shared_with: Optional['ProxmoxAPI'] = None):
+        """
+        Args:
+            config: 설정 객체
+            node_name/vm_id: 대상 VM (기본값은 설정의 NODE_NAME/VM_ID)
+            shared_with: 같은 Proxmox 호스트를 사용하는 다른 ProxmoxAPI.
+                세션(연결 풀), 작업 추적기, 회로 차단기, 지연 히스토그램을 공유한다.
+        """
         self.config = config
+        self._node_name = node_name
+        self._vm_id = vm_id
+
+        # Cache for VM status
+        self._cached_status = None
+        self._last_status_check = 0
+        # 동시에 캐시를 놓친 호출자들이 status/current 요청 1회를 공유하도록 하는 잠금
+        self._status_fetch_lock = threading.Lock()
+        self._status_generation = 0
+        self._last_status_error: Optional[Exception] = None
+        # start/stop 직후에는 상태가 빠르게 바뀌므로 짧은 TTL을 사용
+        self._transition_until = 0.0
+        self._status_stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0, 'stale': 0}
+        # 적중 경로는 _status_fetch_lock 없이 실행되므로 통계 카운터는 별도 잠금으로 보호
+        self._stats_lock = threading.Lock()
+        # 보조 요청(hedge) 실행 풀은 VM별로 둔다. (프로필 간 보조 요청이 서로 대기하지 않도록)
+        self._hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix=f'proxmox-hedge-{self.vm_id}')
+
+        if shared_with is not None:
+            self.session = shared_with.session
+            self._hedge_session = shared_with._hedge_session
+            self.task_tracker = shared_with.task_tracker
+            self.breaker = shared_with.breaker
+            self.latency = shared_with.latency
+            return
+
         self.session = requests.Session()
         self.session.verify = False
 
-        # 재시도 로직 설정 (총 3회, 1초 대기)
+        # 재시도 로직 설정: 조회(GET)만 재시도한다.
+        # start/stop 같은 POST는 서버에서 이미 처리됐을 수 있으므로 자동 재시도하지 않는다.
         # urllib3 >= 1.26.0 required
         retry_strategy = Retry(
-            total=3,
-            backoff_factor=1,
+            total=2,
+            backoff_factor=0.5,
             status_forcelist=[500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS", "POST"]
+            allowed_methods=["HEAD", "GET", "OPTIONS"]
         )
 
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # keep-alive 연결 풀 (모니터 루프, 웹 상태 갱신, 작업 추적기가 동시에 사용)
+        adapter = HTTPAdapter(max_retries=retry_strategy,
+                              pool_connections=2, pool_maxsize=self.config.PROXMOX_POOL_SIZE)
         self.session.mount("https://", adapter)
         self.session.mount("http://", adapter)
+
+        # 보조 요청을 보내는 조회 전용 세션: 어댑터 재시도를 끄고 보조 요청 1개로만 지연에 대응한다.
+        # (재시도와 보조 요청이 겹치면 느린 조회 1건이 최대 6개 요청으로 늘어남)
+        self._hedge_session = requests.Session()
+        self._hedge_session.verify = False
+        hedge_adapter = HTTPAdapter(max_retries=0, pool_connections=2, pool_maxsize=self.config.PROXMOX_POOL_SIZE)
+        self._hedge_session.mount("https://", hedge_adapter)
+        self._hedge_session.mount("http://", hedge_adapter)
+
         self._set_token_auth()
+        self.task_tracker = ProxmoxTaskTracker(self.get_task_status)
+        self.breaker = CircuitBreaker(self.config.PROXMOX_BREAKER_THRESHOLD, self.config.PROXMOX_BREAKER_RESET)
+        # 엔드포인트별 지연 히스토그램 ("GET status/current" 등)
+        self.latency: dict[str, LatencyHistogram] = {}
 
-        # Cache for VM status
-        self._cached_status = None
-        self._last_status_check = 0
+    @property
+    def node_name(self) -> str:
+        return self._node_name or self.config.NODE_NAME
+
+    @property
+    def vm_id(self) -> str:
+        return self._vm_id or self.config.VM_ID
 
     def _set_token_auth(self) -> None:
         # API 토큰을 사용하여 인증 헤더 설정
-        self.session.headers.update({
-            "Authorization": f"PVEAPIToken={self.config.TOKEN_ID}={self.config.SECRET}"
-        })
+        for session in (self.session, self._hedge_session):
+            session.headers.update({
+                "Authorization": f"PVEAPIToken={self.config.TOKEN_ID}={self.config.SECRET}"
+            })
         logging.debug("Proxmox API 토큰 인증 설정 완료")
 
-    def _request(self, method: str, endpoint: str) -> requests.Response:
-        url = f"{self.config.PROXMOX_HOST}/nodes/{self.config.NODE_NAME}/qemu/{self.config.VM_ID}/{endpoint}"
-        response = self.session.request(
+    def _request(self, method: str, endpoint: str, params: Optional[dict] = None,
+                 data: Optional[dict] = None, hedge: bool = False) -> requests.Response:
+        """대상 VM의 qemu 엔드포인트 호출"""
+        return self._call(method, f"nodes/{self.node_name}/qemu/{self.vm_id}/{endpoint}",
+                          f"{method} {endpoint}", params=params, data=data, hedge=hedge)
+
+    def get_task_status(self, node: str, upid: str) -> dict:
+        """Proxmox 작업(UPID) 상태 조회 (작업 추적기에서 사용, 실패 시 예외)"""
+        response = self._call("GET", f"nodes/{node}/tasks/{upid}/status", "GET tasks/status")
+        return response.json()["data"]
+
+    def _call(self, method: str, path: str, key: str, params: Optional[dict] = None,
+              data: Optional[dict] = None, hedge: bool = False) -> requests.Response:
+        """회로 차단기/지연 히스토그램을 적용한 Proxmox API 호출 (key: 히스토그램 이름)
+
+        hedge=True인 GET은 PROXMOX_HEDGE_DELAY가 지나도 응답이 없으면 보조 요청을 보낸다.
+        회로가 반열림(시험 요청) 상태이면 보조 요청을 보내지 않는다.
+        """
+        # API가 연속으로 실패하는 동안에는 타임아웃까지 기다리지 않고 즉시 실패
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Proxmox API 회로 차단 중 ({key})")
+
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency.setdefault(key, LatencyHistogram())
+
+        kwargs = dict(
             method=method,
-            url=url,
+            url=f"{self.config.PROXMOX_HOST}/{path}",
+            params=params,
+            data=data,
             timeout=(self.config.PROXMOX_TIMEOUT, 10)
         )
-        response.raise_for_status()
+        started = time.monotonic()
+        try:
+            if (hedge and method == "GET" and self.config.PROXMOX_HEDGE_DELAY > 0
+                    and self.breaker.state != CircuitBreaker.HALF_OPEN):
+                response = self._hedged_request(kwargs)
+            else:
+                response = self.session.request(**kwargs)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            histogram.observe(time.monotonic() - started, error=True)
+            status = getattr(getattr(e, 'response', None), 'status_code', None)
+            # 연결 실패/타임아웃/5xx만 API 장애로 본다. (4xx는 요청 자체의 문제)
+            if status is None or status >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+
+        histogram.observe(time.monotonic() - started)
+        self.breaker.record_success()
         return response
 
+    def _hedged_request(self, kwargs: dict) -> requests.Response:
+        """조회 요청이 PROXMOX_HEDGE_DELAY 안에 끝나지 않으면 같은 요청을 하나 더 보내 먼저 끝난 응답을 사용
+
+        재시도 없는 _hedge_session을 사용하므로 조회 1건당 요청은 최대 2개다.
+        대기 시간은 첫 요청이 풀에서 실제로 시작된 시점부터 센다. (풀이 붐벼 대기열에 있는 동안
+        보조 요청을 보내면 Proxmox가 느릴 때 부하만 두 배가 된다)
+        """
+        started = threading.Event()
+
+        def attempt() -> requests.Response:
+            started.set()
+            return self._hedge_session.request(**kwargs)
+
+        first = self._hedge_pool.submit(attempt)
+        started.wait()
+        try:
+            return first.result(timeout=self.config.PROXMOX_HEDGE_DELAY)
+        except FutureTimeoutError:
+            pass
+
+        logging.debug(f"Proxmox 조회 지연으로 보조 요청 전송: {kwargs['url']}")
+        second = self._hedge_pool.submit(self._hedge_session.request, **kwargs)
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    return future.result()
+        raise error
+
+    def get_latency_stats(self) -> dict:
+        """엔드포인트별 지연 히스토그램과 회로 차단기 상태"""
+        return {
+            'breaker': self.breaker.snapshot(),
+            'endpoints': {key: histogram.snapshot() for key, histogram in sorted(self.latency.items())},
+        }
+
+    def _status_ttl(self) -> float:
+        """현재 VM 단계에 맞는 상태 캐시 TTL (start/stop 직후에는 짧게, 평상시에는 길게)"""
+        if time.time() < self._transition_until:
+            return self.config.PROXMOX_STATUS_TTL_TRANSITION
+        return self.config.PROXMOX_STATUS_TTL
+
+    def _fresh_status(self) -> Optional[dict]:
+        cached = self._cached_status
+        if cached and (time.time() - self._last_status_check < self._status_ttl()):
+            return cached
+        return None
+
+    @property
+    def in_transition(self) -> bool:
+        """start/stop 요청 직후 상태가 바뀌는 중인지 여부"""
+        return time.time() < self._transition_until
+
+    def _mark_transition(self) -> None:
+        """start/stop 요청 후 캐시를 만료시키고 일정 시간 짧은 TTL을 적용
+
+        값 자체는 남겨 두어, 전환 구간에 API가 실패해 회로가 열려도 마지막 상태를 제공할 수 있게 한다.
+        """
+        self._transition_until = time.time() + self.config.PROXMOX_STATUS_TRANSITION_WINDOW
+        self._last_status_check = 0
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._status_stats[name] += 1
+
     def _get_vm_status_data(self) -> dict:
-        now = time.time()
-        # 2초 캐시 (모니터링 루프 내 중복 호출 방지)
-        if self._cached_status and (now - self._last_status_check < 2.0):
-            return self._cached_status
+        cached = self._fresh_status()
+        if cached is not None:
+            self._count('hits')
+            return cached
+
+        generation = self._status_generation
+        with self._status_fetch_lock:
+            # 대기하는 동안 다른 스레드가 조회를 끝냈으면 그 결과(또는 오류)를 공유
+            cached = self._fresh_status()
+            if cached is not None:
+                self._count('coalesced')
+                return cached
+            if self._status_generation != generation and self._last_status_error is not None:
+                self._count('coalesced')
+                raise self._last_status_error
+
+            self._count('misses')
+            try:
+                response = self._request("GET", "status/current", hedge=True)
+                data = response.json()["data"]
+            except CircuitOpenError:
+                self._status_generation += 1
+                if self._cached_status:
+                    # API 장애 중에는 마지막으로 확인한 상태를 그대로 제공 (모니터 루프 정지 방지)
+                    self._count('stale')
+                    return self._cached_status
+                raise
+            except Exception as e:
+                self._count('errors')
+                self._last_status_error = e
+                self._status_generation += 1
+                raise
+            self._status_generation += 1
+
+            self._last_status_error = None
+            self._cached_status = data
+            self._last_status_check = time.time()
+            return data
 
-        response = self._request("GET", "status/current")
-        data = response.json()["data"]
+    def fetch_vm_status(self) -> dict:
+        """status/current 원본 데이터 (캐시/단일 요청 공유 적용, 실패 시 예외)"""
+        return self._get_vm_status_data()
 
-        self._cached_status = data
-        self._last_status_check = now
-        return data
+    def get_status_cache_stats(self) -> dict:
+        """상태 캐시 적중/미스/합류 횟수와 현재 TTL"""
+        with self._stats_lock:
+            stats = dict(self._status_stats)
+        lookups = stats['hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_ratio'] = round((stats['hits'] + stats['coalesced']) / lookups, 3) if lookups else 0.0
+        stats['ttl'] = self._status_ttl()
+        return stats
 
     def is_vm_running(self) -> bool:
         try:
@@ -91,21 +304,85 @@ class ProxmoxAPI:
             logging.error(f"CPU 사용량 확인 실패: {e}")
             return None
 
-    def start_vm(self) -> bool:
+    def get_rrd_data(self, timeframe: str = "hour") -> Optional[list]:
+        """분 단위 평균 통계(cpu, netin/netout, diskread/diskwrite) 목록"""
+        try:
+            response = self._request("GET", "rrddata", params={"timeframe": timeframe, "cf": "AVERAGE"})
+            result = response.json()["data"]
+            logging.debug(f"rrddata 응답: {len(result)}개")
+            return result
+        except Exception as e:
+            logging.error(f"rrddata 조회 실패: {e}")
+            return None
+
+    def _submit_task(self, endpoint: str, data: Optional[dict] = None) -> Future:
+        """작업 요청을 보내고 반환된 UPID의 완료 Future를 반환 (요청 실패 시 예외)"""
+        response = self._request("POST", endpoint, data=data)
+        self._mark_transition()
+        upid = response.json().get("data")
+        if not upid:
+            # UPID가 없으면 요청 수락 자체를 완료로 간주
+            future: Future = Future()
+            future.set_result(None)
+            return future
+        logging.debug(f"작업 UPID: {upid}")
+        return self.task_tracker.track(self.node_name, upid)
+
+    def submit_start(self) -> Optional[Future]:
+        """VM 시작 요청 후 작업 완료 Future 반환 (요청 실패 시 None)"""
         try:
-            self._request("POST", "status/start")
+            future = self._submit_task("status/start")
             logging.debug("VM 시작 응답 받음")
-            return True
+            return future
         except Exception as e:
             logging.error(f"VM 시작 API 호출 실패: {e}")
-            return False
-
+            return None
 
-    def stop_vm(self) -> bool:
+    def submit_stop(self) -> Optional[Future]:
+        """VM 중지 요청 후 작업 완료 Future 반환 (요청 실패 시 None)"""
         try:
-            self._request("POST", "status/stop")
+            future = self._submit_task("status/stop")
             logging.debug("VM 중지 응답 받음")
-            return True
+            return future
         except Exception as e:
             logging.error(f"VM 중지 API 호출 실패: {e}")
-            return False
\ No newline at end of file
+            return None
+
+    def submit_hibernate(self) -> Optional[Future]:
+        """VM 메모리를 디스크에 저장하고 종료(suspend todisk) 후 작업 완료 Future 반환"""
+        try:
+            future = self._submit_task("status/suspend", data={"todisk": 1})
+            logging.debug("VM 최대 절전 응답 받음")
+            return future
+        except Exception as e:
+            logging.error(f"VM 최대 절전 API 호출 실패: {e}")
+            return None
+
+    def submit_resume(self) -> Optional[Future]:
+        """일시 정지(paused)된 VM 재개 후 작업 완료 Future 반환"""
+        try:
+            future = self._submit_task("status/resume")
+            logging.debug("VM 재개 응답 받음")
+            return future
+        except Exception as e:
+            logging.error(f"VM 재개 API 호출 실패: {e}")
+            return None
+
+    def get_power_state(self) -> str:
+        """VM 전원 상태: running, paused(메모리 일시 정지), hibernated(디스크 절전), stopped, unknown"""
+        try:
+            data = self._get_vm_status_data()
+        except Exception as e:
+            logging.error(f"VM 전원 상태 확인 실패: {e}")
+            return "unknown"
+        if data.get("status") == "running":
+            return "paused" if data.get("qmpstatus") in ("paused", "suspended") else "running"
+        if data.get("lock") == "suspended":
+            return "hibernated"
+        return "stopped"
+
+    def start_vm(self) -> bool:
+        return self.submit_start() is not None
+
+    def stop_vm(self) -> bool:
+        return self.submit_stop() is not None
\ No newline at end of file
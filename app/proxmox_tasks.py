@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+
+class ProxmoxTaskError(Exception):
+    """Proxmox 작업이 실패(exitstatus != OK)하거나 완료 확인 시간을 넘긴 경우"""
+
+
+class _TrackedTask:
+    def __init__(self, node: str, upid: str, timeout: float, initial_delay: float):
+        self.node = node
+        self.upid = upid
+        self.future: Future = Future()
+        self.deadline = time.time() + timeout
+        self.delay = initial_delay
+        self.next_poll = time.time() + initial_delay
+
+
+class ProxmoxTaskTracker:
+    """start/stop 등이 반환한 UPID를 추적해 완료 시 Future를 완료시키는 감시자
+
+    - 하나의 백그라운드 스레드가 추적 중인 모든 작업을 각자의 백오프 간격에 맞춰 조회한다.
+      (0.5초에서 시작해 최대 5초까지 1.5배씩 증가)
+    - Future 결과는 Proxmox exitstatus("OK")이며, 실패/시간 초과 시 ProxmoxTaskError가 설정된다.
+      asyncio 쪽에서는 asyncio.wrap_future()로 그대로 await 할 수 있다.
+    - 작업 상태 조회는 fetch_status(node, upid)로 위임한다. (ProxmoxAPI의 회로 차단기/지연 기록 적용)
+    """
+
+    INITIAL_DELAY = 0.5
+    MAX_DELAY = 5.0
+    BACKOFF = 1.5
+    # 작업 완료 확인 기본 제한 시간(초). VMLifecycle.READY_TIMEOUT과 같게 유지한다.
+    # (느린 시작/재개 작업이 VM 준비 대기보다 먼저 실패로 처리되지 않도록)
+    DEFAULT_TIMEOUT = 300.0
+
+    def __init__(self, fetch_status: Callable[[str, str], dict]):
+        self.fetch_status = fetch_status
+        self._tasks: dict[str, _TrackedTask] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, node: str, upid: str, timeout: Optional[float] = None) -> Future:
+        """UPID 추적을 시작하고 완료 Future를 반환 (같은 UPID는 같은 Future)"""
+        with self._cond:
+            task = self._tasks.get(upid)
+            if task is None:
+                task = self._tasks[upid] = _TrackedTask(
+                    node, upid, timeout or self.DEFAULT_TIMEOUT, self.INITIAL_DELAY)
+                self._ensure_thread()
+                self._cond.notify()
+            return task.future
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._tasks)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='proxmox-task-tracker', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._tasks:
+                    # 추적할 작업이 없으면 스레드를 종료 (다음 track()에서 다시 시작)
+                    self._thread = None
+                    return
+                now = time.time()
+                due = [task for task in self._tasks.values() if task.next_poll <= now]
+                if not due:
+                    wake_at = min(task.next_poll for task in self._tasks.values())
+                    self._cond.wait(max(0.0, wake_at - now))
+                    continue
+
+            for task in due:
+                self._poll(task)
+
+    def _poll(self, task: _TrackedTask) -> None:
+        try:
+            status = self.fetch_status(task.node, task.upid)
+        except Exception as e:
+            logging.debug(f"작업 상태 조회 실패 ({task.upid}): {e}")
+            status = None
+
+        if status is not None and status.get('status') == 'stopped':
+            exitstatus = status.get('exitstatus')
+            if exitstatus == 'OK':
+                self._finish(task, result=exitstatus)
+            else:
+                self._finish(task, error=ProxmoxTaskError(f"작업 실패 ({task.upid}): {exitstatus}"))
+            return
+
+        if time.time() >= task.deadline:
+            self._finish(task, error=ProxmoxTaskError(f"작업 완료 확인 시간 초과 ({task.upid})"))
+            return
+
+        with self._cond:
+            task.delay = min(self.MAX_DELAY, task.delay * self.BACKOFF)
+            task.next_poll = time.time() + task.delay
+
+    def _finish(self, task: _TrackedTask, result: Optional[str] = None,
+                error: Optional[Exception] = None) -> None:
+        with self._cond:
+            self._tasks.pop(task.upid, None)
+        if error is not None:
+            logging.warning(str(error))
+            task.future.set_exception(error)
+        else:
+            logging.debug(f"작업 완료: {task.upid}")
+            task.future.set_result(result)
+
+
+def wait_task(future: Optional[Future], timeout: Optional[float] = None) -> bool:
+    """작업 Future가 성공적으로 완료될 때까지 대기 (실패/시간 초과/Future 없음이면 False)"""
+    if future is None:
+        return False
+    try:
+        future.result(timeout=timeout)
+        return True
+    except Exception as e:
+        logging.debug(f"작업 완료 대기 실패: {e}")
+        return False
@@ -0,0 +1,128 @@
+import bisect
+import threading
+import time
+from typing import Any, Optional
+
+import requests  # type: ignore
+
+
+class CircuitOpenError(requests.RequestException):
+    """회로 차단기가 열려 있어 요청을 보내지 않고 즉시 실패한 경우
+
+    requests.RequestException을 상속하므로 기존 요청 오류 처리에서 함께 처리된다.
+    """
+
+
+class CircuitBreaker:
+    """연속 실패가 failure_threshold에 도달하면 reset_timeout 동안 요청을 차단하는 회로 차단기
+
+    - closed: 정상. 실패가 누적되면 open으로 전환
+    - open: 모든 요청을 즉시 실패. reset_timeout이 지나면 half_open
+    - half_open: 시험 요청 1개만 허용. 성공하면 closed, 실패하면 다시 open
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.open_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.time() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """요청을 보내도 되는지 확인 (half_open에서는 시험 요청 1개만 허용)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.time() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.open_count += 1
+                self._state = self.OPEN
+                self._opened_at = time.time()
+
+    def snapshot(self) -> dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {'state': state, 'failures': self._failures, 'open_count': self.open_count}
+
+
+class LatencyHistogram:
+    """고정 경계(ms) 버킷에 지연 시간을 누적하는 히스토그램 (기록/조회 모두 상수 비용)"""
+
+    BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self._sum_ms = 0.0
+        self._errors = 0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self._counts[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+            self._sum_ms += ms
+            if error:
+                self._errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q 분위수 근사값(ms, 해당 버킷 상한, 최대 경계 초과분은 최대 경계로 표시). 기록이 없으면 None"""
+        with self._lock:
+            total = sum(self._counts)
+            if not total:
+                return None
+            rank = q * total
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank:
+                    return float(self.BOUNDS_MS[min(index, len(self.BOUNDS_MS) - 1)])
+        return None
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            total = sum(self._counts)
+            buckets = {f"le_{bound}ms": count for bound, count in zip(self.BOUNDS_MS, self._counts)}
+            buckets['gt_10000ms'] = self._counts[-1]
+            summary = {
+                'count': total,
+                'errors': self._errors,
+                'avg_ms': round(self._sum_ms / total, 1) if total else None,
+                'buckets': buckets,
+            }
+        summary['p50_ms'] = self.quantile(0.5)
+        summary['p95_ms'] = self.quantile(0.95)
+        return summary
@@ -0,0 +1,124 @@
+import logging
+import socket
+import subprocess
+import threading
+import time
+from typing import Optional
+
+
+class SambaSupervisor:
+    """smbd/nmbd를 포그라운드 자식 프로세스로 실행하고 상태를 메모리에 유지
+
+    - start(): 자식으로 실행한 뒤 SMB 포트가 연결을 받을 때까지 대기 (고정 sleep 없음)
+    - is_running(): Popen.poll()만 사용하므로 호출마다 외부 프로세스를 만들지 않는다.
+    - 실행 중 smbd가 예기치 않게 종료되면 감시 스레드가 다시 띄운다.
+    """
+
+    SMBD_CMD = ('smbd', '--foreground', '--no-process-group')
+    NMBD_CMD = ('nmbd', '--foreground', '--no-process-group')
+    # 준비 확인 최대 대기 시간(초)
+    READY_TIMEOUT = 10.0
+    # 예기치 않은 종료 후 재시작 간격(초)
+    RESTART_DELAY = 2.0
+
+    def __init__(self, port: int = 445, host: str = '127.0.0.1'):
+        self.port = port
+        self.host = host
+        self._lock = threading.Lock()
+        self._smbd: Optional[subprocess.Popen] = None
+        self._nmbd: Optional[subprocess.Popen] = None
+        # stop() 호출 전까지 smbd가 떠 있어야 하는지 여부 (감시 스레드 재시작 판단)
+        self._wanted = False
+        self._ready = False
+        self.restart_count = 0
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._smbd.pid if self._smbd is not None else None
+
+    def is_running(self) -> bool:
+        smbd = self._smbd
+        return smbd is not None and smbd.poll() is None
+
+    def is_ready(self) -> bool:
+        """smbd가 실행 중이고 SMB 포트 연결이 확인된 상태인지 (메모리 상태만 확인)"""
+        return self._ready and self.is_running()
+
+    def start(self, timeout: float = READY_TIMEOUT) -> bool:
+        """smbd/nmbd를 시작하고 포트가 열릴 때까지 대기 (준비되면 True)"""
+        with self._lock:
+            self._wanted = True
+            if not self.is_running():
+                self._ready = False
+                self._smbd = self._spawn(self.SMBD_CMD)
+                if self._smbd is None:
+                    return False
+                threading.Thread(target=self._watch, args=(self._smbd,),
+                                 name='smbd-supervisor', daemon=True).start()
+            if self._nmbd is None or self._nmbd.poll() is not None:
+                self._nmbd = self._spawn(self.NMBD_CMD)
+            smbd = self._smbd
+
+        ready = self._wait_ready(smbd, time.time() + timeout)
+        with self._lock:
+            if smbd is self._smbd:
+                self._ready = ready
+        return ready
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            self._wanted = False
+            self._ready = False
+            procs = [p for p in (self._smbd, self._nmbd) if p is not None]
+            self._smbd = self._nmbd = None
+        for proc in procs:
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    def status(self) -> dict:
+        return {'running': self.is_running(), 'ready': self.is_ready(), 'pid': self.pid,
+                'restart_count': self.restart_count}
+
+    @staticmethod
+    def _spawn(cmd: tuple) -> Optional[subprocess.Popen]:
+        try:
+            return subprocess.Popen(list(cmd), stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            logging.error(f"{cmd[0]} 실행 실패: {e}")
+            return None
+
+    def _wait_ready(self, smbd: subprocess.Popen, deadline: float) -> bool:
+        delay = 0.05
+        while time.time() < deadline:
+            if smbd.poll() is not None:
+                logging.error(f"smbd가 준비되기 전에 종료되었습니다. (종료 코드: {smbd.returncode})")
+                return False
+            try:
+                with socket.create_connection((self.host, self.port), timeout=1):
+                    return True
+            except OSError:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.5)
+        logging.warning(f"smbd 준비 확인 시간 초과 (포트 {self.port})")
+        return False
+
+    def _watch(self, smbd: subprocess.Popen) -> None:
+        """관리 중인 smbd가 예기치 않게 종료되면 다시 시작"""
+        code = smbd.wait()
+        with self._lock:
+            if smbd is not self._smbd or not self._wanted:
+                return
+            self._ready = False
+            self._smbd = None
+        logging.warning(f"smbd가 예기치 않게 종료되었습니다. (종료 코드: {code}) {self.RESTART_DELAY}초 후 재시작합니다.")
+        time.sleep(self.RESTART_DELAY)
+        if self._wanted:
+            self.restart_count += 1
+            self.start()
@@ -0,0 +1,471 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from typing import Callable, Iterable, Iterator, Mapping, MutableMapping, Optional
+
+# 스냅샷 파일 구조 (리틀 엔디안)
+#   header   : magic(4s) version(I) generation(Q) count(Q) identity_len(I) blob_len(Q)
+#   identity : JSON (utf-8), 8바이트 정렬 패딩
+#   mtimes   : float64 x count            (경로 정렬 순서)
+#   offsets  : uint64 x (count + 1)       (blob 내 각 경로 시작 위치)
+#   blob     : 정렬된 경로를 NUL 로 이어 붙인 utf-8(surrogateescape) 바이트열
+SNAPSHOT_MAGIC = b'GSSC'
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct('<4sIQQIQ')
+
+# WAL 파일 구조
+#   header : magic(4s) generation(Q)  - 스냅샷 generation과 일치할 때만 재생한다.
+#   record : op(c: S=설정, D=삭제) mtime(d) path_len(I) path(bytes)
+WAL_MAGIC = b'GSWL'
+_WAL_HEADER = struct.Struct('<4sQ')
+_WAL_RECORD = struct.Struct('<cdI')
+WAL_OP_SET = b'S'
+WAL_OP_DELETE = b'D'
+
+
+def _encode_path(path: str) -> bytes:
+    return path.encode('utf-8', 'surrogateescape')
+
+
+def _decode_path(data: bytes) -> str:
+    return data.decode('utf-8', 'surrogateescape')
+
+
+def _align8(value: int) -> int:
+    return (value + 7) & ~7
+
+
+class ScanCacheSnapshot(Mapping):
+    """mmap으로 연 스냅샷 파일을 읽기 전용 Mapping으로 노출한다.
+
+    경로 테이블이 정렬되어 있어 전체를 파싱하지 않고도 이진 탐색으로 단건 조회가 가능하다.
+    """
+
+    def __init__(self, mm: mmap.mmap, generation: int, identity: dict,
+                 mtimes: memoryview, offsets: memoryview, blob_start: int, blob_len: int):
+        self._mm = mm
+        self.generation = generation
+        self.identity = identity
+        self._mtimes = mtimes
+        self._offsets = offsets
+        self._blob_start = blob_start
+        self._blob_len = blob_len
+
+    def _path_at(self, index: int) -> bytes:
+        start = self._blob_start + self._offsets[index]
+        end = self._blob_start + self._offsets[index + 1] - 1  # NUL 구분자 제외
+        return self._mm[start:end]
+
+    def __len__(self) -> int:
+        return len(self._mtimes)
+
+    def __getitem__(self, path: str) -> float:
+        key = _encode_path(path)
+        lo, hi = 0, len(self._mtimes)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._path_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self._mtimes) and self._path_at(lo) == key:
+            return self._mtimes[lo]
+        raise KeyError(path)
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self._mtimes)):
+            yield _decode_path(self._path_at(index))
+
+    def to_dict(self) -> dict[str, float]:
+        """전체 항목을 dict로 변환 (경로 blob을 한 번에 디코딩하여 분할)"""
+        if not len(self._mtimes):
+            return {}
+        blob = self._mm[self._blob_start:self._blob_start + self._blob_len - 1]
+        paths = _decode_path(blob).split('\0')
+        return dict(zip(paths, self._mtimes.tolist()))
+
+    def close(self) -> None:
+        self._mtimes.release()
+        self._offsets.release()
+        self._mm.close()
+
+
+class LazyScanCache(MutableMapping):
+    """mmap 스냅샷 위에 WAL 변경분을 얹은 폴더 스캔 캐시 (필요할 때만 dict로 변환)
+
+    단건 조회와 len()은 스냅샷을 이진 탐색하여 바로 응답하므로 시작 시 전체 파싱이 필요 없다.
+    순회나 변경이 처음 일어날 때 한 번만 dict로 변환하고 스냅샷을 닫는다.
+    """
+
+    def __init__(self, snapshot: ScanCacheSnapshot, overlay: dict[str, Optional[float]]):
+        self._snapshot: Optional[ScanCacheSnapshot] = snapshot
+        # WAL로 재생한 변경분 (None이면 삭제)
+        self._overlay = overlay
+        self._data: Optional[dict[str, float]] = None
+        self._len: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_materialized(self) -> bool:
+        return self._data is not None
+
+    def materialize(self) -> dict[str, float]:
+        """스냅샷 + WAL 변경분을 dict로 변환 (최초 1회)"""
+        data = self._data
+        if data is not None:
+            return data
+        with self._lock:
+            if self._data is None:
+                data = self._snapshot.to_dict()
+                for path, mtime in self._overlay.items():
+                    if mtime is None:
+                        data.pop(path, None)
+                    else:
+                        data[path] = mtime
+                self._snapshot.close()
+                self._snapshot = None
+                self._overlay = {}
+                self._data = data
+            return self._data
+
+    def _lookup(self, path: str) -> float:
+        """dict 변환 전 단건 조회 (잠금 안에서 호출)"""
+        if path in self._overlay:
+            mtime = self._overlay[path]
+            if mtime is None:
+                raise KeyError(path)
+            return mtime
+        return self._snapshot[path]
+
+    def __getitem__(self, path: str) -> float:
+        data = self._data
+        if data is None:
+            with self._lock:
+                if self._data is None:
+                    return self._lookup(path)
+            data = self._data
+        return data[path]
+
+    def __len__(self) -> int:
+        data = self._data
+        if data is not None:
+            return len(data)
+        with self._lock:
+            if self._data is not None:
+                return len(self._data)
+            if self._len is None:
+                count = len(self._snapshot)
+                for path, mtime in self._overlay.items():
+                    in_snapshot = path in self._snapshot
+                    if mtime is None and in_snapshot:
+                        count -= 1
+                    elif mtime is not None and not in_snapshot:
+                        count += 1
+                self._len = count
+            return self._len
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.materialize())
+
+    def __setitem__(self, path: str, mtime: float) -> None:
+        self.materialize()[path] = mtime
+
+    def __delitem__(self, path: str) -> None:
+        del self.materialize()[path]
+
+    def keys(self):
+        return self.materialize().keys()
+
+    def items(self):
+        return self.materialize().items()
+
+    def values(self):
+        return self.materialize().values()
+
+    def update(self, *args, **kwargs) -> None:
+        self.materialize().update(*args, **kwargs)
+
+
+class ScanCacheStore:
+    """폴더 스캔 결과를 바이너리 스냅샷 + WAL(write-ahead log)로 저장하는 저장소
+
+    - 스냅샷: 정렬된 경로 테이블과 float64 mtime 배열, 임시 파일에 쓴 뒤 원자적으로 교체
+    - WAL: 이벤트 단위 변경을 O(1) append로 기록하고, 일정량이 쌓이면 스냅샷으로 압축
+    """
+
+    def __init__(self, snapshot_path: str, wal_path: str, compact_min_records: int = 1024):
+        self.snapshot_path = snapshot_path
+        self.wal_path = wal_path
+        self.compact_min_records = compact_min_records
+        self._generation = 0
+        self._snapshot_count = 0
+        self._wal_records = 0
+        self._wal_file = None
+        self._lock = threading.Lock()
+
+    @property
+    def has_snapshot(self) -> bool:
+        """WAL을 붙일 기준 스냅샷이 있는지 (load 또는 save_snapshot 이후 True)"""
+        return self._generation != 0
+
+    @property
+    def needs_compaction(self) -> bool:
+        """WAL이 스냅샷 크기의 1/4(최소 compact_min_records)을 넘으면 압축 필요"""
+        return self._wal_records >= max(self.compact_min_records, self._snapshot_count // 4)
+
+    def open_snapshot(self) -> Optional[ScanCacheSnapshot]:
+        """스냅샷 파일을 mmap으로 연다. (파일이 없거나 형식이 다르면 None)"""
+        if not os.path.exists(self.snapshot_path):
+            return None
+
+        with open(self.snapshot_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _SNAPSHOT_HEADER.size:
+                return None
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, generation, count, identity_len, blob_len = _SNAPSHOT_HEADER.unpack_from(mm, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError('스냅샷 형식 불일치')
+
+            pos = _SNAPSHOT_HEADER.size
+            identity = json.loads(mm[pos:pos + identity_len].decode('utf-8'))
+            pos = _align8(pos + identity_len)
+
+            mtimes = memoryview(mm)[pos:pos + count * 8].cast('d')
+            pos += count * 8
+            offsets = memoryview(mm)[pos:pos + (count + 1) * 8].cast('Q')
+            pos += (count + 1) * 8
+            if pos + blob_len > len(mm):
+                raise ValueError('스냅샷 파일이 잘렸습니다')
+
+            return ScanCacheSnapshot(mm, generation, identity, mtimes, offsets, pos, blob_len)
+        except Exception:
+            mm.close()
+            raise
+
+    def _replay_wal(self, generation: int, overlay: dict[str, Optional[float]]) -> int:
+        """스냅샷과 같은 generation의 WAL 레코드를 overlay에 모으고 레코드 수를 반환 (삭제는 None)"""
+        if not os.path.exists(self.wal_path):
+            return 0
+
+        applied = 0
+        with open(self.wal_path, 'rb') as f:
+            header = f.read(_WAL_HEADER.size)
+            if len(header) < _WAL_HEADER.size:
+                return 0
+            magic, wal_generation = _WAL_HEADER.unpack(header)
+            if magic != WAL_MAGIC or wal_generation != generation:
+                logging.debug('폴더 스캔 WAL이 현재 스냅샷과 일치하지 않아 무시합니다.')
+                return 0
+
+            while True:
+                record = f.read(_WAL_RECORD.size)
+                if len(record) < _WAL_RECORD.size:
+                    break
+                op, mtime, path_len = _WAL_RECORD.unpack(record)
+                raw_path = f.read(path_len)
+                if len(raw_path) < path_len:
+                    # 기록 도중 종료된 마지막 레코드는 버린다.
+                    break
+                path = _decode_path(raw_path)
+                if op == WAL_OP_SET:
+                    overlay[path] = mtime
+                elif op == WAL_OP_DELETE:
+                    overlay[path] = None
+                applied += 1
+        return applied
+
+    def load(self, identity: dict) -> Optional[LazyScanCache]:
+        """식별자가 일치하면 스냅샷 + WAL을 얹은 LazyScanCache를 반환한다. (전체 파싱은 처음 순회할 때)"""
+        with self._lock:
+            snapshot = self.open_snapshot()
+            if snapshot is None:
+                return None
+            try:
+                if snapshot.identity != identity:
+                    logging.info('폴더 스캔 캐시를 재사용하지 않습니다. (설정 변경)')
+                    snapshot.close()
+                    return None
+                overlay: dict[str, Optional[float]] = {}
+                self._wal_records = self._replay_wal(snapshot.generation, overlay)
+            except Exception:
+                snapshot.close()
+                raise
+
+            self._generation = snapshot.generation
+            self._snapshot_count = len(snapshot)
+            return LazyScanCache(snapshot, overlay)
+
+    def save_snapshot(self, identity: dict, data: dict[str, float]) -> None:
+        """전체 스냅샷을 새로 쓰고 WAL을 비운다. (임시 파일 + 원자적 rename)"""
+        with self._lock:
+            paths = sorted(data)
+            encoded = [_encode_path(path) for path in paths]
+            offsets = array('Q', [0])
+            total = 0
+            for raw in encoded:
+                total += len(raw) + 1
+                offsets.append(total)
+            blob = b'\0'.join(encoded) + (b'\0' if encoded else b'')
+            mtimes = array('d', (data[path] for path in paths))
+            identity_bytes = json.dumps(identity, ensure_ascii=False, sort_keys=True).encode('utf-8')
+            generation = time.time_ns()
+
+            header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, generation,
+                                           len(paths), len(identity_bytes), len(blob))
+            padding = _align8(_SNAPSHOT_HEADER.size + len(identity_bytes)) - (_SNAPSHOT_HEADER.size + len(identity_bytes))
+
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(header)
+                f.write(identity_bytes)
+                f.write(b'\0' * padding)
+                f.write(mtimes.tobytes())
+                f.write(offsets.tobytes())
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            self._generation = generation
+            self._snapshot_count = len(paths)
+            self._reset_wal()
+
+    def _reset_wal(self) -> None:
+        if self._wal_file is not None:
+            self._wal_file.close()
+            self._wal_file = None
+
+        tmp_path = f"{self.wal_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_WAL_HEADER.pack(WAL_MAGIC, self._generation))
+        os.replace(tmp_path, self.wal_path)
+        self._wal_records = 0
+
+    def _append(self, op: bytes, path: str, mtime: float) -> None:
+        with self._lock:
+            if self._generation == 0:
+                # WAL은 기준 스냅샷에 붙여야 재생된다. (ScanCacheWriter는 먼저 스냅샷을 기록함)
+                raise RuntimeError('기준 스냅샷이 없어 WAL을 기록할 수 없습니다.')
+            if self._wal_file is None:
+                self._wal_file = open(self.wal_path, 'ab')
+            raw_path = _encode_path(path)
+            self._wal_file.write(_WAL_RECORD.pack(op, mtime, len(raw_path)) + raw_path)
+            self._wal_file.flush()
+            self._wal_records += 1
+
+    def append_set(self, path: str, mtime: float) -> None:
+        self._append(WAL_OP_SET, path, mtime)
+
+    def append_delete(self, path: str) -> None:
+        self._append(WAL_OP_DELETE, path, 0.0)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._wal_file is not None:
+                self._wal_file.close()
+                self._wal_file = None
+
+
+class ScanCacheWriter:
+    """스캔 캐시 변경분을 모아 백그라운드 스레드에서 주기적으로 기록하는 작성기
+
+    요청 스레드는 변경 사항을 메모리에 표시만 하고 즉시 반환한다.
+    같은 경로의 반복 변경은 마지막 값 하나로 합쳐지며, flush는 interval마다 최대 1회 수행된다.
+    """
+
+    def __init__(self, store: ScanCacheStore, identity_fn: Callable[[], dict],
+                 snapshot_fn: Callable[[], dict[str, float]], interval: float = 5.0):
+        self.store = store
+        self.identity_fn = identity_fn
+        self.snapshot_fn = snapshot_fn
+        self.interval = max(0.0, float(interval))
+        # 경로 -> mtime (None이면 삭제)
+        self._pending: dict[str, Optional[float]] = {}
+        self._snapshot_requested = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='scan-cache-writer', daemon=True)
+        self._thread.start()
+
+    def mark_changed(self, updated: dict[str, float], deleted: Iterable[str]) -> None:
+        with self._lock:
+            self._pending.update(updated)
+            for path in deleted:
+                self._pending[path] = None
+        self._wakeup.set()
+
+    def request_snapshot(self) -> None:
+        with self._lock:
+            self._snapshot_requested = True
+        self._wakeup.set()
+
+    @property
+    def is_dirty(self) -> bool:
+        return self._snapshot_requested or bool(self._pending)
+
+    def flush(self) -> None:
+        """대기 중인 변경분을 즉시 기록한다. (WAL이 커졌거나 요청된 경우 스냅샷으로 압축)"""
+        with self._lock:
+            pending = self._pending
+            snapshot_requested = self._snapshot_requested
+            self._pending = {}
+            self._snapshot_requested = False
+
+        if not pending and not snapshot_requested:
+            return
+
+        try:
+            if snapshot_requested or not self.store.has_snapshot or self.store.needs_compaction:
+                self.store.save_snapshot(self.identity_fn(), self.snapshot_fn())
+                return
+
+            for path, mtime in pending.items():
+                if mtime is None:
+                    self.store.append_delete(path)
+                else:
+                    self.store.append_set(path, mtime)
+            if self.store.needs_compaction:
+                logging.debug('폴더 스캔 캐시 WAL 압축 수행')
+                self.store.save_snapshot(self.identity_fn(), self.snapshot_fn())
+        except Exception as e:
+            logging.warning(f'폴더 스캔 캐시 기록 실패 (다음 주기에 재시도): {e}')
+            # 실패한 변경분을 되돌려 놓는다. (그 사이 들어온 더 새로운 값이 우선)
+            with self._lock:
+                for path, mtime in pending.items():
+                    self._pending.setdefault(path, mtime)
+                self._snapshot_requested = self._snapshot_requested or snapshot_requested
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            self.flush()
+            # 다음 flush까지 최소 interval 동안 변경분을 모은다.
+            self._stopped.wait(self.interval)
+
+    def stop(self) -> None:
+        """백그라운드 스레드를 멈추고 남은 변경분을 마지막으로 기록한다."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
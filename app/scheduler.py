@@ -0,0 +1,72 @@
+import threading
+import time
+from typing import Optional
+
+
+class MonitorScheduler:
+    """모니터링 루프의 타이머와 외부 이벤트를 한 곳에서 관리하는 스케줄러
+
+    - 타이머: schedule(name, when)으로 등록하며, 같은 이름은 하나만 유지된다.
+    - 이벤트: request(name)로 즉시 깨우며, 처리 전 중복 요청은 하나로 합쳐진다.
+    wait()는 만기된 타이머와 요청된 이벤트 이름 집합을 반환한다.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._timers: dict[str, float] = {}
+        self._requested: set[str] = set()
+
+    def schedule(self, name: str, when: float) -> None:
+        """name 타이머를 when(epoch 초) 시점으로 등록 (기존 예약은 대체)"""
+        with self._cond:
+            self._timers[name] = when
+            self._cond.notify()
+
+    def schedule_in(self, name: str, delay: float) -> None:
+        self.schedule(name, time.time() + max(0.0, delay))
+
+    def ensure_scheduled(self, name: str, when: float) -> None:
+        """name 타이머가 예약되어 있지 않을 때만 등록"""
+        with self._cond:
+            if name not in self._timers:
+                self._timers[name] = when
+                self._cond.notify()
+
+    def cancel(self, name: str) -> None:
+        with self._cond:
+            self._timers.pop(name, None)
+
+    def is_scheduled(self, name: str) -> bool:
+        with self._cond:
+            return name in self._timers
+
+    def request(self, name: str) -> None:
+        """이벤트를 요청하고 대기 중인 루프를 즉시 깨운다."""
+        with self._cond:
+            self._requested.add(name)
+            self._cond.notify()
+
+    def _take_ready(self, now: float) -> set[str]:
+        due = {name for name, when in self._timers.items() if when <= now}
+        for name in due:
+            del self._timers[name]
+        events = due | self._requested
+        self._requested = set()
+        return events
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        """만기 타이머 또는 요청 이벤트가 생길 때까지 대기 후 이름 집합 반환 (timeout 시 빈 집합)"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while True:
+                now = time.time()
+                events = self._take_ready(now)
+                if events:
+                    return events
+
+                wake_at = min(self._timers.values(), default=None)
+                if deadline is not None:
+                    if now >= deadline:
+                        return set()
+                    wake_at = deadline if wake_at is None else min(wake_at, deadline)
+                self._cond.wait(None if wake_at is None else max(0.0, wake_at - now))
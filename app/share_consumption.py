@@ -0,0 +1,197 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from share_fs import AllowListShare
+
+
+@dataclass
+class ConsumedItem:
+    """links_dir 바로 아래 공유 항목(폴더 심링크 또는 파일 심링크) 하나의 읽기 진행 상태"""
+    link_name: str
+    # 원본 경로 (MOUNT_PATH 기준 상대 경로, remove_symlink 인자로 사용)
+    source: str
+    is_dir: bool
+    # 폴더 항목의 전체 파일 목록 (항목 기준 상대 경로, 처음 열릴 때 1회 수집)
+    expected: Optional[frozenset] = None
+    # 열렸다가 닫힌 파일 (항목 기준 상대 경로)
+    read: set = field(default_factory=set)
+    # 현재 열려 있는 파일
+    open_now: set = field(default_factory=set)
+    # 마지막으로 열린 파일이 모두 닫힌 시각
+    closed_at: Optional[float] = None
+    # VM 측 콜백으로 소비 완료가 통보됨
+    forced: bool = False
+
+    @property
+    def complete(self) -> bool:
+        if self.forced:
+            return True
+        if self.open_now or self.closed_at is None:
+            return False
+        if not self.is_dir:
+            return True
+        return self.expected is not None and self.expected <= self.read
+
+
+class ShareConsumptionTracker:
+    """VM이 공유 항목을 모두 읽었는지 추적해 해제 대상을 알려준다.
+
+    - observe(): smbstatus 열린 파일 목록으로 항목별 열림/닫힘을 누적
+      (파일 항목은 한 번 열렸다 닫히면, 폴더 항목은 안의 모든 파일이 열렸다 닫히면 완료)
+    - mark_consumed(): VM 측 콜백(/api/consumed)으로 즉시 완료 처리
+    완료 후 마지막 닫힘에서 grace초가 지나면 pop_ready()가 해제 대상으로 반환한다.
+
+    observe()는 CPU 확인 주기(CHECK_INTERVAL)마다 한 번 찍힌 열린 파일 목록만 보므로
+    두 샘플 사이에 열렸다 닫힌 파일은 놓친다. 작은 파일이 많은 폴더 항목은 샘플만으로
+    완료되는 일이 드물어, 사실상 VM 측 콜백으로 해제된다고 보는 편이 맞다.
+
+    공유 백엔드별 항목 단위:
+    - symlink: links_dir 바로 아래 링크 이름 (readlink로 원본 경로 확인)
+    - fuse: links_dir가 MOUNT_PATH를 그대로 비추므로 허용 목록의 폴더 경로 (share_fs.covering)
+    """
+
+    RECENT_SIZE = 50
+
+    def __init__(self, links_dir: str, mount_path: str, grace: float = 120.0,
+                 share_fs: Optional[AllowListShare] = None):
+        self.links_dir = links_dir.rstrip('/')
+        self.mount_path = mount_path.rstrip('/')
+        self.grace = grace
+        self.share_fs = share_fs
+        self._lock = threading.Lock()
+        self._items: dict[str, ConsumedItem] = {}
+        self.retired: deque[dict[str, Any]] = deque(maxlen=self.RECENT_SIZE)
+
+    def reset(self) -> None:
+        """공유 전체가 해제되면(VM 종료 등) 추적 상태를 비운다."""
+        with self._lock:
+            self._items.clear()
+
+    def _resolve(self, link_name: str) -> Optional[ConsumedItem]:
+        """새 항목 정보를 만든다. NFS 탐색이 포함되므로 잠금 밖에서 호출한다."""
+        if self.share_fs is not None:
+            if not self.share_fs.is_allowed(link_name):
+                return None
+            target = os.path.join(self.mount_path, link_name)
+        else:
+            try:
+                target = os.readlink(os.path.join(self.links_dir, link_name))
+            except OSError:
+                return None
+            if not target.startswith(self.mount_path + '/'):
+                return None
+
+        item = ConsumedItem(link_name, os.path.relpath(target, self.mount_path), os.path.isdir(target))
+        if item.is_dir:
+            item.expected = self._list_files(target)
+        return item
+
+    def _ensure(self, link_names: Iterable[str]) -> None:
+        """아직 추적하지 않는 항목을 잠금 밖에서 확인해 등록"""
+        with self._lock:
+            missing = [name for name in link_names if name not in self._items]
+        resolved = [item for item in map(self._resolve, missing) if item is not None]
+        if resolved:
+            with self._lock:
+                for item in resolved:
+                    self._items.setdefault(item.link_name, item)
+
+    @staticmethod
+    def _list_files(root: str) -> Optional[frozenset]:
+        """폴더 안 전체 파일 목록 (숨김 파일 제외). 읽지 못했거나 비어 있으면 None (콜백으로만 완료)"""
+        files = set()
+        for dirpath, _, filenames in os.walk(root, onerror=lambda e: logging.debug(f"공유 폴더 탐색 실패: {e}")):
+            rel_dir = os.path.relpath(dirpath, root)
+            for name in filenames:
+                if not name.startswith('.'):
+                    files.add(name if rel_dir == '.' else f"{rel_dir}/{name}")
+        return frozenset(files) or None
+
+    def _split(self, path: str) -> Optional[tuple[str, str]]:
+        """links_dir 아래 열린 파일 경로를 (항목 이름, 항목 기준 상대 경로)로 분리"""
+        if not path.startswith(self.links_dir + '/'):
+            return None
+        rel = path[len(self.links_dir) + 1:]
+        if self.share_fs is not None:
+            folder = self.share_fs.covering(rel)
+            if folder is None:
+                return None
+            return folder, rel[len(folder) + 1:]
+        link_name, _, rest = rel.partition('/')
+        return link_name, rest
+
+    def observe(self, open_paths: Iterable[str], now: Optional[float] = None) -> None:
+        """smbstatus로 본 현재 열린 파일 목록을 반영"""
+        now = now or time.time()
+        current: dict[str, set] = {}
+        for path in open_paths:
+            parts = self._split(path)
+            if parts is not None:
+                current.setdefault(parts[0], set()).add(parts[1])
+
+        self._ensure(current)
+        with self._lock:
+            for link_name, item in self._items.items():
+                still_open = current.get(link_name, set())
+                closed = item.open_now - still_open
+                if closed:
+                    item.read.update(closed)
+                    if not still_open:
+                        item.closed_at = now
+                item.open_now = still_open
+
+    def mark_consumed(self, paths: Iterable[str]) -> list[str]:
+        """VM 측 콜백: 링크 이름 또는 원본 상대 경로로 받은 항목을 소비 완료로 표시 (처리된 링크 이름 반환)"""
+        candidates = []
+        for path in paths:
+            path = path.strip('/')
+            if self.share_fs is not None:
+                candidates.append((path,))
+            else:
+                candidates.append((path, path.replace('/', '_'), os.path.basename(path)))
+        self._ensure(name for names in candidates for name in names)
+
+        marked = []
+        with self._lock:
+            for names in candidates:
+                for link_name in names:
+                    item = self._items.get(link_name)
+                    if item is not None:
+                        item.forced = True
+                        item.open_now = set()
+                        item.closed_at = item.closed_at or 0.0
+                        marked.append(link_name)
+                        break
+        return marked
+
+    def pop_ready(self, now: Optional[float] = None) -> list[ConsumedItem]:
+        """해제해도 되는 항목을 꺼내 반환 (콜백으로 완료된 항목은 유예 없이 즉시)"""
+        now = now or time.time()
+        ready = []
+        with self._lock:
+            for link_name, item in list(self._items.items()):
+                if not item.complete:
+                    continue
+                if not item.forced and now - item.closed_at < self.grace:
+                    continue
+                ready.append(self._items.pop(link_name))
+                self.retired.append({'link': link_name, 'source': item.source, 'at': now,
+                                     'files': len(item.read), 'callback': item.forced})
+        return ready
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            tracking = [{
+                'link': item.link_name,
+                'source': item.source,
+                'open': len(item.open_now),
+                'read': len(item.read),
+                'total': len(item.expected) if item.expected is not None else (None if item.is_dir else 1),
+                'complete': item.complete,
+            } for item in self._items.values()]
+            return {'tracking': tracking, 'retired': list(self.retired)}
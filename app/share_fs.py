@@ -0,0 +1,200 @@
+import errno
+import logging
+import os
+import stat
+import subprocess
+import threading
+import time
+from typing import Any, Optional
+
+from folder_index import is_pruned_dir_name
+from path_trie import PathTrie
+
+try:
+    from fuse import FUSE, FuseOSError, Operations  # type: ignore
+except (ImportError, OSError):  # fusepy 미설치 또는 libfuse 없음
+    FUSE = None
+    Operations = object
+
+    class FuseOSError(OSError):  # type: ignore
+        def __init__(self, code: int):
+            super().__init__(code, os.strerror(code))
+
+
+class AllowListFS(Operations):
+    """MOUNT_PATH를 허용 목록(폴더 단위)으로 걸러 읽기 전용으로 보여주는 FUSE 파일시스템
+
+    - 허용된 폴더와 그 하위는 원본 그대로 보인다.
+    - 허용된 폴더의 상위 폴더는 허용된 쪽으로 가는 하위 항목만 보인다.
+    - 그 밖의 경로는 존재하지 않는 것(ENOENT)으로 처리한다.
+    - 폴더 스캔과 같은 제외 규칙(@*, .*, #recycle)에 해당하는 디렉토리는 허용 범위 안에서도 숨긴다.
+    """
+
+    def __init__(self, root: str, allowed: PathTrie, lock: threading.Lock):
+        self.root = root.rstrip('/')
+        self.allowed = allowed
+        self.lock = lock
+
+    def _real(self, path: str) -> str:
+        return self.root + path
+
+    def _visibility(self, path: str) -> str:
+        """'full': 허용 범위 안, 'partial': 허용 폴더의 상위, '': 보이지 않음"""
+        rel = path.strip('/')
+        # 제외 디렉토리 아래 경로는 보이지 않음 (마지막 구성요소는 디렉토리인지 getattr/readdir에서 판별)
+        if any(is_pruned_dir_name(part) for part in rel.split('/')[:-1]):
+            return ''
+        with self.lock:
+            if rel and self.allowed.is_covered(rel, include_self=True):
+                return 'full'
+            if not rel or self.allowed.has_descendant(rel):
+                return 'partial'
+        return ''
+
+    def _check(self, path: str) -> str:
+        visibility = self._visibility(path)
+        if not visibility:
+            raise FuseOSError(errno.ENOENT)
+        return visibility
+
+    def getattr(self, path: str, fh: Optional[int] = None) -> dict[str, Any]:
+        self._check(path)
+        try:
+            st = os.lstat(self._real(path))
+        except OSError as e:
+            raise FuseOSError(e.errno)
+        if stat.S_ISDIR(st.st_mode) and is_pruned_dir_name(os.path.basename(path)):
+            raise FuseOSError(errno.ENOENT)
+        return {key: getattr(st, key) for key in (
+            'st_mode', 'st_nlink', 'st_size', 'st_uid', 'st_gid', 'st_atime', 'st_mtime', 'st_ctime')}
+
+    def readdir(self, path: str, fh: int) -> list[str]:
+        visibility = self._check(path)
+        real = self._real(path)
+        try:
+            if visibility == 'full':
+                with os.scandir(real) as entries:
+                    return ['.', '..'] + [entry.name for entry in entries
+                                          if not (entry.is_dir(follow_symlinks=False) and is_pruned_dir_name(entry.name))]
+            with self.lock:
+                names = self.allowed.children(path.strip('/'))
+            return ['.', '..'] + [name for name in names if os.path.lexists(os.path.join(real, name))]
+        except OSError as e:
+            raise FuseOSError(e.errno)
+
+    def access(self, path: str, mode: int) -> None:
+        self._check(path)
+        if mode & os.W_OK:
+            raise FuseOSError(errno.EROFS)
+
+    def readlink(self, path: str) -> str:
+        self._check(path)
+        return os.readlink(self._real(path))
+
+    def open(self, path: str, flags: int) -> int:
+        if self._check(path) != 'full':
+            raise FuseOSError(errno.EISDIR)
+        if flags & (os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_TRUNC):
+            raise FuseOSError(errno.EROFS)
+        try:
+            return os.open(self._real(path), flags)
+        except OSError as e:
+            raise FuseOSError(e.errno)
+
+    def read(self, path: str, size: int, offset: int, fh: int) -> bytes:
+        return os.pread(fh, size, offset)
+
+    def release(self, path: str, fh: int) -> None:
+        os.close(fh)
+
+    def statfs(self, path: str) -> dict[str, Any]:
+        st = os.statvfs(self.root)
+        return {key: getattr(st, key) for key in (
+            'f_bavail', 'f_bfree', 'f_blocks', 'f_bsize', 'f_favail', 'f_ffree', 'f_files', 'f_frsize', 'f_namemax')}
+
+
+class AllowListShare:
+    """AllowListFS를 links_dir에 마운트해 공유 대상 폴더를 메모리 집합만으로 켜고 끄는 공유 백엔드
+
+    심볼릭 링크 생성/삭제, 소유권 변경, smbd 재시작 없이 allow()/revoke()로 즉시 반영된다.
+    """
+
+    # 마운트 확인 최대 대기 시간(초)
+    MOUNT_TIMEOUT = 5.0
+
+    def __init__(self, source_root: str, mountpoint: str):
+        self.source_root = source_root
+        self.mountpoint = mountpoint
+        self._lock = threading.Lock()
+        self._allowed = PathTrie()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def available() -> bool:
+        return FUSE is not None
+
+    @staticmethod
+    def unmount(mountpoint: str) -> None:
+        """이전 실행에서 남은 FUSE 마운트를 정리 (마운트가 없으면 아무것도 하지 않음)"""
+        try:
+            subprocess.run(['fusermount', '-uz', mountpoint], capture_output=True, check=False)
+        except OSError:
+            pass
+
+    def start(self, timeout: float = MOUNT_TIMEOUT) -> bool:
+        """백그라운드 스레드에서 FUSE를 마운트하고 마운트될 때까지 대기 (성공 시 True)"""
+        if FUSE is None:
+            return False
+        operations = AllowListFS(self.source_root, self._allowed, self._lock)
+        self._thread = threading.Thread(target=self._serve, args=(operations,), name='share-fs', daemon=True)
+        self._thread.start()
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if os.path.ismount(self.mountpoint):
+                return True
+            if not self._thread.is_alive():
+                return False
+            time.sleep(0.05)
+        return False
+
+    def _serve(self, operations: AllowListFS) -> None:
+        try:
+            FUSE(operations, self.mountpoint, foreground=True, ro=True, allow_other=True)
+        except Exception as e:
+            logging.error(f"FUSE 공유 마운트 실패 ({self.mountpoint}): {e}")
+
+    def stop(self) -> None:
+        """FUSE 마운트를 해제하고 서비스 스레드 종료를 잠시 기다린다."""
+        self.unmount(self.mountpoint)
+        if self._thread is not None:
+            self._thread.join(timeout=self.MOUNT_TIMEOUT)
+            self._thread = None
+
+    def allow(self, folder: str) -> None:
+        with self._lock:
+            self._allowed.add(folder)
+
+    def revoke(self, folder: str) -> bool:
+        with self._lock:
+            if folder not in self._allowed:
+                return False
+            self._allowed.discard(folder)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._allowed.clear()
+
+    def is_allowed(self, folder: str) -> bool:
+        with self._lock:
+            return folder in self._allowed
+
+    def covering(self, path: str) -> Optional[str]:
+        """path(MOUNT_PATH 기준 상대 경로)를 공유하고 있는 허용 폴더 (없으면 None)"""
+        with self._lock:
+            return self._allowed.covering(path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._allowed)
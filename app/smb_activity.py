@@ -0,0 +1,153 @@
+import json
+import logging
+import re
+import subprocess
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class SMBActivitySample:
+    """smbstatus 1회 조회 결과"""
+    timestamp: float
+    # 공유 경로 아래에서 열려 있는 파일 경로
+    open_files: set = field(default_factory=set)
+    # 누적 읽기 바이트 (profiling 카운터, 없으면 None)
+    read_bytes: Optional[int] = None
+    # 누적 읽기 요청 수 (profiling 카운터, 없으면 None)
+    read_ops: Optional[int] = None
+
+
+class SMBActivityProbe:
+    """Samba 읽기 활동으로 업로더(Android)가 공유 파일을 아직 읽고 있는지 판단
+
+    - smbstatus --json: 공유 경로 아래 열린 파일 목록
+    - smbstatus --profile: 누적 읽기 바이트/요청 수 ('smbd profiling level = count' 필요)
+    update()는 다음 중 하나를 반환한다.
+      active: 열린 파일이 있거나 직전 조회 이후 읽기가 있었음
+      drained: 이번 세션에 읽기가 있었고, 이후 idle_samples회 연속 읽기가 없음 (모두 읽고 끝남)
+      idle: 이번 세션에 읽기 활동이 아직 없음
+      unknown: smbstatus 조회 실패
+    """
+
+    ACTIVE = 'active'
+    DRAINED = 'drained'
+    IDLE = 'idle'
+    UNKNOWN = 'unknown'
+
+    _PROFILE_LINE = re.compile(r'^\s*([A-Za-z0-9_]+):\s+(\d+)\s*$')
+    _READ_BYTES_KEY = re.compile(r'(pread|read|sendfile)[a-z_]*_bytes$', re.IGNORECASE)
+    _READ_OPS_KEYS = ('SMBreadX_count', 'SMBread_count', 'smb2_read_count')
+
+    def __init__(self, share_path: str, idle_samples: int = 2, timeout: float = 10.0):
+        self.share_path = share_path.rstrip('/')
+        self.idle_samples = max(1, idle_samples)
+        self.timeout = timeout
+        self.last_sample: Optional[SMBActivitySample] = None
+        self.reset_session()
+
+    def reset_session(self) -> None:
+        """VM 세션이 바뀔 때(시작/종료) 누적 판단 상태를 초기화"""
+        self.session_reads_seen = False
+        self.quiet_samples = 0
+        self.files_read: set = set()
+
+    def _run(self, *args: str) -> Optional[str]:
+        try:
+            result = subprocess.run(['smbstatus', *args], capture_output=True, text=True,
+                                    timeout=self.timeout, check=False)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logging.debug(f"smbstatus {' '.join(args)} 실행 실패: {e}")
+            return None
+        if result.returncode != 0:
+            logging.debug(f"smbstatus {' '.join(args)} 오류: {result.stderr.strip()}")
+            return None
+        return result.stdout
+
+    def _open_files(self) -> Optional[set]:
+        output = self._run('--json', '-L')
+        if output is None:
+            return None
+        try:
+            data = json.loads(output or '{}')
+        except ValueError:
+            logging.debug("smbstatus --json 출력 파싱 실패")
+            return None
+
+        paths = set()
+        for entry in (data.get('open_files') or {}).values():
+            service_path = (entry.get('service_path') or '').rstrip('/')
+            if service_path != self.share_path and not service_path.startswith(self.share_path + '/'):
+                continue
+            paths.add(f"{service_path}/{entry.get('filename', '')}".rstrip('/'))
+        return paths
+
+    def _read_counters(self) -> tuple[Optional[int], Optional[int]]:
+        output = self._run('--profile')
+        if not output:
+            return None, None
+        read_bytes = 0
+        read_ops = 0
+        found_bytes = found_ops = False
+        for line in output.splitlines():
+            match = self._PROFILE_LINE.match(line)
+            if not match:
+                continue
+            key, value = match.group(1), int(match.group(2))
+            if self._READ_BYTES_KEY.search(key):
+                read_bytes += value
+                found_bytes = True
+            elif key in self._READ_OPS_KEYS:
+                read_ops += value
+                found_ops = True
+        return (read_bytes if found_bytes else None), (read_ops if found_ops else None)
+
+    def sample(self) -> Optional[SMBActivitySample]:
+        open_files = self._open_files()
+        if open_files is None:
+            return None
+        read_bytes, read_ops = self._read_counters()
+        return SMBActivitySample(time.time(), open_files, read_bytes, read_ops)
+
+    def update(self) -> str:
+        """smbstatus를 조회해 현재 읽기 활동 상태를 반환"""
+        current = self.sample()
+        if current is None:
+            return self.UNKNOWN
+
+        previous = self.last_sample
+        self.last_sample = current
+
+        read_delta = False
+        if previous is not None:
+            if current.read_bytes is not None and previous.read_bytes is not None:
+                # smbd 재시작으로 카운터가 초기화된 경우(감소)도 읽기 활동으로 본다.
+                read_delta = current.read_bytes != previous.read_bytes
+            elif current.read_ops is not None and previous.read_ops is not None:
+                read_delta = current.read_ops != previous.read_ops
+
+        self.files_read.update(current.open_files)
+        if current.open_files or read_delta:
+            self.session_reads_seen = True
+            self.quiet_samples = 0
+            return self.ACTIVE
+
+        if not self.session_reads_seen:
+            return self.IDLE
+
+        self.quiet_samples += 1
+        if self.quiet_samples >= self.idle_samples:
+            return self.DRAINED
+        return self.ACTIVE
+
+    def status(self) -> dict:
+        sample = self.last_sample
+        return {
+            'open_files': sorted(sample.open_files) if sample else [],
+            'read_bytes': sample.read_bytes if sample else None,
+            'read_ops': sample.read_ops if sample else None,
+            'session_reads_seen': self.session_reads_seen,
+            'quiet_samples': self.quiet_samples,
+            'files_read': len(self.files_read),
+        }
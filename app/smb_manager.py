@@ -1,14 +1,41 @@
 import logging
 import os
 import subprocess
-import time
-import pwd
-import grp
 import shutil
+import threading
 from config import GshareConfig  # type: ignore
-from typing import Optional, Tuple
+from path_trie import PathTrie
+from samba_supervisor import SambaSupervisor
+from share_fs import AllowListShare
+from identity_cache import IdentityCache
+from typing import Callable, Iterable, List, Optional, Tuple
+
+
+class ShareSpace:
+    """SMB 공유 하나(공유 이름 + 링크 디렉토리)와 그 안의 링크 상태
+
+    VM 프로필마다 하나씩 두어, 각 VM은 자신에게 라우팅된 폴더만 보게 된다.
+    """
+
+    def __init__(self, name: str, share_name: str, links_dir: str):
+        self.name = name
+        self.share_name = share_name
+        self.links_dir = links_dir
+        self.active_links: set = set()  # Active link cache
+        self.shared_folders = PathTrie()  # 폴더 단위 공유 경로 (원본 경로 기준)
+        # 허용 목록 FUSE 공유 백엔드 (SMB_SHARE_BACKEND가 fuse이고 사용 가능할 때만)
+        self.share_fs: Optional[AllowListShare] = None
+
+
 class SMBManager:
-    """SMB 서비스 관리 클래스"""
+    """SMB 서비스 관리 클래스
+
+    smbd는 하나만 실행하고, 기본 공유(SMB_SHARE_NAME/SMB_LINKS_DIR) 외에 추가 VM 프로필마다
+    별도 공유와 링크 디렉토리를 둔다. 폴더는 configure_profiles()로 받은 라우팅 함수에 따라
+    담당 프로필의 공유에만 링크된다.
+    """
+
+    PRIMARY = 'primary'
 
     def __init__(self, config: GshareConfig, nfs_uid: int, nfs_gid: int):
         """
@@ -25,12 +52,25 @@ class SMBManager:
         self.nfs_uid = nfs_uid
         self.nfs_gid = nfs_gid
         self.user_checked = False # 사용자 검증 완료 여부 
-        self._active_links = set()  # Active link cache
+        self._ownership_fixed = False  # 기존 공유 리소스 소유권 일괄 수정 완료 여부
+        # 공유 단위 (기본 공유 + 추가 VM 프로필별 공유)
+        self.primary = ShareSpace(self.PRIMARY, self.config.SMB_SHARE_NAME, self.links_dir)
+        self.spaces: dict[str, ShareSpace] = {self.PRIMARY: self.primary}
+        # 폴더 -> 담당 공유(프로필) 이름 목록 (설정 전에는 모두 기본 공유)
+        self._router: Optional[Callable[[str], List[str]]] = None
+        # smbd/nmbd를 자식 프로세스로 관리 (상태 조회는 메모리에서 O(1))
+        self.supervisor = SambaSupervisor(self.config.SMB_PORT)
+        # 사용자/그룹/Samba passdb 조회 캐시 (사용자/그룹 변경 시에만 무효화)
+        self.identity = IdentityCache()
+        if self.config.SMB_SHARE_BACKEND == 'fuse':
+            # 이전 실행에서 남은 FUSE 마운트가 있으면 링크 디렉토리 정리 전에 해제
+            AllowListShare.unmount(self.links_dir)
 
         # 초기화 작업
         self._init_smb_config()
-        # 초기 상태 설정 (파일에서 확인)
-        self._is_smb_active = self._check_smb_status_from_file()
+        # 초기 상태 설정 (파일에서 확인, 이후에는 설정 파일을 쓸 때마다 메모리 값만 갱신)
+        self._share_configured = self._check_smb_status_from_file()
+        self._is_smb_active = self._share_configured
         self._set_smb_user_ownership()
 
         # 공유용 링크 디렉토리 생성 및 권한 설정
@@ -39,6 +79,66 @@ class SMBManager:
         # 시작 시 기존 심볼릭 링크 모두 제거
         self.cleanup_all_symlinks()
 
+        self.primary.share_fs = self._init_share_fs(self.primary.links_dir)
+
+    @property
+    def share_fs(self) -> Optional[AllowListShare]:
+        """기본 공유의 FUSE 백엔드 (심볼릭 링크 백엔드면 None)"""
+        return self.primary.share_fs
+
+    def configure_profiles(self, profiles: Iterable[Tuple[str, str]],
+                           router: Callable[[str], List[str]]) -> None:
+        """
+        추가 VM 프로필별 SMB 공유를 준비한다.
+
+        Args:
+            profiles: (프로필 이름, 공유 이름) 목록. 링크 디렉토리는 SMB_LINKS_DIR 옆 '<SMB_LINKS_DIR>_<프로필 이름>'
+            router: 폴더 -> 담당 프로필 이름 목록 (기본 공유는 PRIMARY)
+        """
+        base_dir = self.config.SMB_LINKS_DIR.rstrip('/')
+        for name, share_name in profiles:
+            if name in self.spaces:
+                continue
+            space = ShareSpace(name, share_name, f"{base_dir}_{name}")
+            if self.config.SMB_SHARE_BACKEND == 'fuse':
+                AllowListShare.unmount(space.links_dir)
+            self._set_links_directory_permissions(space.links_dir)
+            self._cleanup_space(space)
+            space.share_fs = self._init_share_fs(space.links_dir)
+            self.spaces[name] = space
+            logging.info(f"VM 프로필 공유 준비: [{share_name}] {space.links_dir} ({name})")
+        self._router = router
+
+    def _spaces_for(self, subfolder: str) -> List[ShareSpace]:
+        """폴더를 링크할 공유 목록 (라우팅 결과가 없거나 알 수 없는 프로필이면 기본 공유)"""
+        if self._router is None or len(self.spaces) == 1:
+            return [self.primary]
+        spaces = [self.spaces[name] for name in self._router(subfolder) if name in self.spaces]
+        return spaces or [self.primary]
+
+    def links_dirs(self) -> List[str]:
+        """모든 공유의 링크 디렉토리 (기본 공유 먼저)"""
+        return [space.links_dir for space in self.spaces.values()]
+
+    def _init_share_fs(self, links_dir: str) -> Optional[AllowListShare]:
+        """fuse 백엔드를 마운트 (조건이 맞지 않거나 실패하면 심볼릭 링크 백엔드로 동작하도록 None)"""
+        if self.config.SMB_SHARE_BACKEND != 'fuse':
+            return None
+        if self.config.SMB_SHARE_MODE == 'file':
+            logging.warning("fuse 공유 백엔드는 폴더 단위 공유 모드에서만 지원되어 심볼릭 링크 백엔드를 사용합니다.")
+            return None
+        if not AllowListShare.available():
+            logging.warning("fusepy 또는 libfuse가 없어 심볼릭 링크 공유 백엔드를 사용합니다.")
+            return None
+
+        share_fs = AllowListShare(self.config.MOUNT_PATH, links_dir)
+        if not share_fs.start():
+            logging.warning("FUSE 공유 마운트에 실패해 심볼릭 링크 공유 백엔드를 사용합니다.")
+            share_fs.stop()
+            return None
+        logging.info(f"허용 목록 FUSE 공유 백엔드 사용: {self.config.MOUNT_PATH} -> {links_dir}")
+        return share_fs
+
     def is_link_active(self, subfolder: str) -> bool:
         """
         Check if a link is active using memory cache to minimize syscalls.
@@ -47,27 +147,61 @@ class SMBManager:
             subfolder: Original subfolder path (e.g., 'Movies/Action')
         """
         link_name = subfolder.replace(os.sep, '_')
-        return link_name in self._active_links
+        return any(link_name in space.active_links for space in self._spaces_for(subfolder))
 
     def is_folder_mount_active(self, subfolder: str) -> bool:
         """폴더 단위 마운트가 활성화되어 있는지 실제 심볼릭 링크 여부로 판별"""
-        link_name = subfolder.replace(os.sep, '_')
-        link_path = os.path.join(self.links_dir, link_name)
+        return any(self._is_folder_mounted_in(space, subfolder) for space in self._spaces_for(subfolder))
+
+    @staticmethod
+    def _is_folder_mounted_in(space: ShareSpace, subfolder: str) -> bool:
+        if space.share_fs is not None:
+            return space.share_fs.is_allowed(subfolder)
+        link_path = os.path.join(space.links_dir, subfolder.replace(os.sep, '_'))
         return os.path.lexists(link_path) and os.path.islink(link_path)
 
     def is_ancestor_shared(self, subfolder: str) -> bool:
         """주어진 서브폴더 또는 상위 부모 폴더 중 하나라도 이미 공유(마운트)되어 있는지 확인합니다."""
-        parent = subfolder
-        while parent:
-            if self.is_link_active(parent) or self.is_folder_mount_active(parent):
+        for space in self._spaces_for(subfolder):
+            # 성능 최적화: 메모리 트리가 있으면 O(depth)로 판별하고,
+            # 비어 있을 때만(외부에서 생성된 링크 가능성) 상위 경로별 디스크 확인으로 폴백한다.
+            if space.shared_folders:
+                if space.shared_folders.is_covered(subfolder, include_self=True):
+                    return True
+                continue
+
+            parent = subfolder
+            while parent:
+                if (parent.replace(os.sep, '_') in space.active_links or
+                        self._is_folder_mounted_in(space, parent)):
+                    return True
+                parent_parts = parent.rsplit('/', 1)
+                parent = parent_parts[0] if len(parent_parts) > 1 else ""
+        return False
+
+    def has_shared_resources(self) -> bool:
+        """어느 공유에든 남은 공유 리소스가 있는지 확인 (SMB 공유 비활성화 판단용)"""
+        # 성능 최적화: 매 삭제마다 links_dir 전체 스캔을 피하고 메모리 캐시로 남은 링크 여부를 우선 판단
+        if any(space.active_links for space in self.spaces.values()):
+            return True
+
+        # 캐시가 비어있더라도 외부 프로세스가 링크를 생성했을 가능성은 남아있으므로
+        # 비활성화 직전 1회만 디스크를 재확인해 정확성을 유지합니다.
+        for space in self.spaces.values():
+            if space.share_fs is not None or not os.path.exists(space.links_dir):
+                continue
+            if any((os.path.islink(os.path.join(space.links_dir, filename)) or
+                    (os.path.isdir(os.path.join(space.links_dir, filename)) and filename != ".tmp"))
+                   for filename in os.listdir(space.links_dir)):
                 return True
-            parent_parts = parent.rsplit('/', 1)
-            parent = parent_parts[0] if len(parent_parts) > 1 else ""
         return False
 
     def _init_smb_config(self) -> None:
         """기본 SMB 설정 초기화"""
         try:
+            # 읽기 활동 감지를 쓸 때만 누적 카운터 활성화 (smbstatus --profile)
+            profiling = ("   # 읽기 활동 감지용 누적 카운터 (smbstatus --profile)\n"
+                         "   smbd profiling level = count\n") if self.config.SMB_ACTIVITY_ENABLED else ""
             # 기본 설정 생성
             base_config = f"""[global]
    workgroup = WORKGROUP
@@ -98,7 +232,7 @@ class SMBManager:
    stat cache size = 1024
    change notify = no
    kernel change notify = no
-   # 디버깅 설정
+{profiling}   # 디버깅 설정
    log level = 3
 """
             # 기본 설정 저장
@@ -106,8 +240,7 @@ class SMBManager:
                 f.write(base_config)
 
             # 기존 Samba 사용자 존재 여부 확인
-            user_in_samba = subprocess.run(['pdbedit', '-L', self.config.SMB_USERNAME], 
-                                       capture_output=True).returncode == 0
+            user_in_samba = self.identity.samba_user_exists(self.config.SMB_USERNAME)
             
             # 시스템에 사용자 존재 여부 확인
             user_exists = self._get_user_info(self.config.SMB_USERNAME) is not None
@@ -118,6 +251,7 @@ class SMBManager:
                 logging.debug(f"기존 Samba 사용자 {self.config.SMB_USERNAME} 삭제 시도")
                 subprocess.run(['smbpasswd', '-x', self.config.SMB_USERNAME], 
                             capture_output=True, check=False)
+                self.identity.set_samba_user(self.config.SMB_USERNAME, False)
             
             if user_exists:
                 # 2. 시스템 사용자가 존재하면 패스워드 설정
@@ -126,6 +260,7 @@ class SMBManager:
                                      input=passwd_cmd, capture_output=True)
                 
                 if result.returncode == 0:
+                    self.identity.set_samba_user(self.config.SMB_USERNAME, True)
                     logging.debug(f"Samba 사용자 {self.config.SMB_USERNAME} 비밀번호 설정 성공")
                 else:
                     logging.error(f"Samba 사용자 비밀번호 설정 실패: {result.stderr.decode()}")
@@ -143,24 +278,13 @@ class SMBManager:
             raise
 
     def _check_samba_process_status(self) -> bool:
-        """smbd 프로세스가 실행 중인지 확인"""
-        try:
-            result = subprocess.run(
-                ['pgrep', '-x', 'smbd'],
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            return result.returncode == 0
-        except Exception as e:
-            logging.error(f"Samba 프로세스 상태 확인 중 오류: {e}")
-            return False
+        """관리 중인 smbd 자식 프로세스가 실행 중인지 확인"""
+        return self.supervisor.is_running()
 
     def check_smb_status(self) -> bool:
         """SMB 공유 설정 및 smbd 프로세스 실행 여부를 함께 확인"""
-        config_active = self._check_smb_status_from_file()
-        process_active = self._check_samba_process_status()
-        self._is_smb_active = config_active and process_active
+        # 성능 최적화: 이벤트/상태 갱신마다 호출되므로 pgrep 실행과 smb.conf 재읽기 없이 메모리 상태만 본다.
+        self._is_smb_active = self._share_configured and self.supervisor.is_running()
         return self._is_smb_active
 
     def _check_smb_status_from_file(self) -> bool:
@@ -182,25 +306,21 @@ class SMBManager:
             # 먼저 잔여 프로세스 확인 및 종료
             self._stop_samba_service()
             
-            # Docker 환경에서는 직접 데몬 실행
-            subprocess.run(['smbd', '--daemon'], check=False)
-            subprocess.run(['nmbd', '--daemon'], check=False)
-            
-            # 서비스 시작 확인
-            time.sleep(1)
-            if not self._check_samba_process_status():
-                logging.warning("Samba 서비스 시작 후에도 실행되지 않는 것으로 확인됩니다.")
+            # 포그라운드 자식 프로세스로 실행하고 SMB 포트가 열릴 때까지 대기
+            if not self.supervisor.start():
+                logging.warning("Samba 서비스 시작 후에도 준비되지 않은 것으로 확인됩니다.")
                 
         except Exception as e:
             logging.error(f"Samba 서비스 시작 실패: {e}")
             raise
 
-    def _stop_samba_service(self, timeout=None) -> None:
+    def _stop_samba_service(self, timeout=5.0) -> None:
         """Samba 서비스 중지"""
         try:
-            # 프로세스 종료
-            subprocess.run(['pkill', 'smbd'], check=False)
-            subprocess.run(['pkill', 'nmbd'], check=False)
+            self.supervisor.stop(timeout=timeout)
+            # 관리 대상이 아닌(이전 실행이나 외부에서 띄운) 잔여 프로세스 정리
+            subprocess.run(['pkill', '-x', 'smbd'], check=False)
+            subprocess.run(['pkill', '-x', 'nmbd'], check=False)
         except Exception as e:
             logging.error(f"Samba 서비스 중지 실패: {e}")
 
@@ -208,27 +328,39 @@ class SMBManager:
         """Samba 서비스 재시작"""
         try:
             self._stop_samba_service()
-            time.sleep(1)  # 잠시 대기
             self._start_samba_service()
         except Exception as e:
             logging.error(f"Samba 서비스 재시작 실패: {e}")
             raise
 
-    def _update_smb_config(self) -> None:
-        """SMB 설정 파일 업데이트"""
+    def _reload_samba_config(self) -> bool:
+        """실행 중인 smbd에 설정 다시 읽기 요청 (연결 유지). 성공 시 True"""
+        try:
+            result = subprocess.run(['smbcontrol', 'smbd', 'reload-config'],
+                                    capture_output=True, text=True, timeout=10, check=False)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logging.warning(f"smbcontrol reload-config 실행 실패: {e}")
+            return False
+        if result.returncode != 0:
+            logging.warning(f"smbcontrol reload-config 실패: {(result.stderr or result.stdout).strip()}")
+            return False
+        return True
+
+    def _update_smb_config(self) -> bool:
+        """SMB 설정 파일 업데이트 (내용이 바뀌었으면 True)"""
         try:
             # 사용자 체크가 필요한 경우에만 SMB 사용자 UID/GID 설정을 업데이트
             if not self.user_checked:
                 self._set_smb_user_ownership()
             
-            share_name = self.config.SMB_SHARE_NAME
+            share_name = ', '.join(space.share_name for space in self.spaces.values())
 
             # 설정 파일 읽기
             with open('/etc/samba/smb.conf', 'r') as f:
-                lines = f.readlines()
+                current = f.read()
 
             # 빈 줄 제거
-            lines = [line for line in lines if line.strip()]
+            lines = [line for line in current.splitlines(keepends=True) if line.strip()]
             
             # global 섹션만 유지하고 다른 섹션은 제거
             global_section_lines = []
@@ -237,10 +369,10 @@ class SMBManager:
                     break
                 global_section_lines.append(line)
 
-            # 공유 설정 생성
-            share_config = f"""
-[{share_name}]
-   path = {self.links_dir}
+            # 공유 설정 생성 (VM 프로필마다 자기 링크 디렉토리만 가리키는 공유 하나씩)
+            share_configs = [f"""
+[{space.share_name}]
+   path = {space.links_dir}
    comment = {self.config.SMB_COMMENT}
    browseable = yes
    guest ok = {'yes' if self.config.SMB_GUEST_OK else 'no'}
@@ -250,43 +382,60 @@ class SMBManager:
    veto files = /@*
    hide dot files = yes
    delete veto files = no
-"""
+""" for space in self.spaces.values()]
             # global 섹션 + 공유 설정
-            final_lines = global_section_lines + [share_config]
-
-            # 설정 파일 저장
-            with open('/etc/samba/smb.conf', 'w') as f:
-                f.writelines([line for line in final_lines if line.strip()])
+            final_lines = global_section_lines + share_configs
+            content = ''.join(line for line in final_lines if line.strip())
 
+            self._share_configured = True
             self._is_smb_active = True
+            if content == current:
+                logging.debug(f"SMB 설정 변경 없음: {share_name}")
+                return False
+
+            # 설정 파일 저장 (smbd가 쓰는 도중의 파일을 읽지 않도록 임시 파일에 쓰고 교체)
+            tmp_path = '/etc/samba/smb.conf.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, '/etc/samba/smb.conf')
+
             logging.debug(
                 f"SMB 설정 파일이 업데이트 되었습니다: {share_name}")
+            return True
         except Exception as e:
             logging.error(f"SMB 설정 파일 업데이트 실패: {e}")
             raise
 
     def activate_smb_share(self) -> bool:
-        """SMB 공유 활성화 - SMB 설정 파일 업데이트 및 서비스 재시작"""
+        """SMB 공유 활성화 - 설정 파일 업데이트 후 실행 중이면 설정만 다시 읽히고, 아니면 서비스 시작"""
         try:
             # 이미 SMB 서비스가 실행 중인지 확인
-            is_running = self.check_smb_status()
+            is_running = self._check_samba_process_status()
 
             # SMB 설정 파일 업데이트
-            self._update_smb_config()
+            config_changed = self._update_smb_config()
             
             # SMB 사용자 및 비밀번호 설정 재확인 (첫 실행 시에만)
             if not self.user_checked:
                 logging.debug("SMB 공유 활성화 시 사용자 설정 재확인")
                 self._set_smb_user_ownership()
                 self.user_checked = True
-            
-            # 심볼릭 링크 소유권 수정
-            self._fix_symlinks_ownership()
 
-            # 서비스 재시작/시작
+            # 심볼릭 링크 소유권 수정 (이후 생성되는 링크는 생성 시 lchown으로 설정되므로 1회만)
+            if not self._ownership_fixed:
+                self._fix_symlinks_ownership()
+                self._ownership_fixed = True
+
+            # 성능 최적화: 공유 내용 변경은 심볼릭 링크 추가/삭제뿐이므로 smbd를 재시작하지 않는다.
+            # 설정이 바뀐 경우에도 reload-config로 반영해 기존 클라이언트(Android CIFS) 연결을 유지한다.
             if is_running:
-                logging.debug("SMB 서비스가 이미 실행 중입니다. 서비스를 재시작합니다.")
-                self._restart_samba_service()
+                if not config_changed:
+                    logging.debug("SMB 서비스가 실행 중이고 설정 변경이 없어 재시작을 생략합니다.")
+                elif self._reload_samba_config():
+                    logging.debug("SMB 설정을 다시 읽도록 요청했습니다. (재시작 없음)")
+                else:
+                    logging.warning("SMB 설정 다시 읽기에 실패해 서비스를 재시작합니다.")
+                    self._restart_samba_service()
             else:
                 self._start_samba_service()
 
@@ -320,6 +469,7 @@ class SMBManager:
             with open('/etc/samba/smb.conf', 'w') as f:
                 f.writelines([line for line in new_lines if line.strip()])
 
+            self._share_configured = False
             self._is_smb_active = False
             # Samba 서비스 중지
             self._stop_samba_service()
@@ -344,19 +494,24 @@ class SMBManager:
         Returns:
             Optional[Tuple[int, int]]: (UID, GID) 튜플 (존재하지 않거나 오류 시 None)
         """
-        try:
-            user_info = subprocess.run(
-                ['id', username], capture_output=True, text=True)
-            if user_info.returncode == 0:
-                info_parts = user_info.stdout.strip().split()
-                current_uid = int(
-                    info_parts[0].split('=')[1].split('(')[0])
-                current_gid = int(
-                    info_parts[1].split('=')[1].split('(')[0])
-                return current_uid, current_gid
-        except Exception as e:
-            logging.error(f"사용자 확인 중 오류 ({username}): {e}")
-        return None
+        # 성능 최적화: id 프로세스 대신 pwd 조회 결과를 캐시에서 재사용
+        return self.identity.user(username)
+
+    def _share_owner(self) -> Optional[Tuple[int, int]]:
+        """
+        공유 리소스에 적용할 소유자 (SMB 사용자 UID, NFS GID 그룹 또는 SMB 사용자 그룹의 GID)
+
+        Returns:
+            Optional[Tuple[int, int]]: (UID, GID) 튜플 (SMB 사용자가 없으면 None)
+        """
+        user = self.identity.user(self.config.SMB_USERNAME)
+        if user is None:
+            return None
+
+        # NFS GID가 이미 존재하는 그룹에 할당되어 있으면 그 그룹, 없으면 SMB 사용자 그룹
+        group_name = self._get_group_name(self.nfs_gid) or self.config.SMB_USERNAME
+        target_gid = self.identity.group_gid(group_name)
+        return user[0], target_gid if target_gid is not None else self.nfs_gid
 
     def _get_group_name(self, gid: int) -> Optional[str]:
         """
@@ -368,14 +523,9 @@ class SMBManager:
         Returns:
             Optional[str]: 그룹 이름 (존재하지 않거나 오류 시 None)
         """
-        try:
-            group_info = subprocess.run(
-                ['getent', 'group', str(gid)], capture_output=True, text=True)
-            if group_info.returncode == 0:  # 해당 GID를 가진 그룹이 존재
-                return group_info.stdout.strip().split(':')[0]
-        except Exception as e:
-            logging.error(f"그룹 확인 중 오류 ({gid}): {e}")
-        return None
+        # 성능 최적화: getent 프로세스 대신 grp 조회 결과를 캐시에서 재사용
+        return self.identity.group_name(gid)
+
     def _set_smb_user_ownership(self) -> None:
         """SMB 사용자의 UID/GID를 NFS 마운트 경로와 동일하게 설정"""
         try:
@@ -441,6 +591,8 @@ class SMBManager:
                         self.nfs_gid)
                     user_cmd = ['useradd', '-r', '-o', '-u', str(self.nfs_uid), '-g', group_to_use, smb_username]
                     user_result = subprocess.run(user_cmd, capture_output=True, text=True, check=False)
+                    # 그룹/사용자를 새로 만들었으므로 조회 캐시 무효화
+                    self.identity.invalidate()
                     if user_result.returncode != 0:
                         logging.error(f"사용자 생성 실패: {user_result.stderr.strip()}")
                     else:
@@ -459,6 +611,7 @@ class SMBManager:
                         smb_result = subprocess.run(['smbpasswd', '-a', '-s', smb_username],
                                                  input=passwd_cmd, capture_output=True)
                         if smb_result.returncode == 0:
+                            self.identity.set_samba_user(smb_username, True)
                             subprocess.run(['smbpasswd', '-e', smb_username], check=False)
                             logging.debug(f"Samba 사용자 '{smb_username}' 패스워드 설정 및 활성화 완료")
                         else:
@@ -489,13 +642,15 @@ class SMBManager:
                         self.nfs_gid)
                     groupmod_result = subprocess.run(
                         ['usermod', '-g', group_to_use, smb_username], capture_output=True, text=True, check=False)
+                    # UID/GID를 바꿨으므로 조회 캐시 무효화
+                    self.identity.invalidate()
                     logging.debug(
                         f"사용자 GID 수정 결과: {groupmod_result.returncode}, 오류: {groupmod_result.stderr.strip() if groupmod_result.stderr else '없음'}")
 
                     # 필요한 파일의 소유권 변경
                     group_name = existing_group if existing_group else smb_username
                     subprocess.run(
-                        ['chown', '-R', f"{smb_username}:{group_name}", self.links_dir], check=False)
+                        ['chown', '-R', f"{smb_username}:{group_name}", *self.links_dirs()], check=False)
                     logging.debug(
                         f"사용자 '{smb_username}'의 UID/GID 수정 완료 (UID={self.nfs_uid}, GID={self.nfs_gid})")
                     
@@ -504,9 +659,11 @@ class SMBManager:
                         passwd_cmd = f"{smb_password}\n{smb_password}\n".encode()
                         # 기존 사용자 삭제 후 다시 추가
                         subprocess.run(['smbpasswd', '-x', smb_username], capture_output=True, check=False)
+                        self.identity.set_samba_user(smb_username, False)
                         smb_result = subprocess.run(['smbpasswd', '-a', '-s', smb_username],
                                                  input=passwd_cmd, capture_output=True)
                         if smb_result.returncode == 0:
+                            self.identity.set_samba_user(smb_username, True)
                             subprocess.run(['smbpasswd', '-e', smb_username], check=False)
                             logging.debug(f"Samba 사용자 '{smb_username}' 패스워드 재설정 및 활성화 완료")
                         else:
@@ -522,12 +679,12 @@ class SMBManager:
                 if smb_password:
                     try:
                         # 기존 Samba 사용자 존재 여부 확인
-                        user_in_samba = subprocess.run(['pdbedit', '-L', smb_username], 
-                                                     capture_output=True).returncode == 0
+                        user_in_samba = self.identity.samba_user_exists(smb_username)
                         
                         if user_in_samba:
                             # Samba 사용자가 이미 존재하면 삭제 후 다시 생성
                             subprocess.run(['smbpasswd', '-x', smb_username], capture_output=True, check=False)
+                            self.identity.set_samba_user(smb_username, False)
                         
                         # Samba 사용자 추가 및 비밀번호 설정
                         passwd_cmd = f"{smb_password}\n{smb_password}\n".encode()
@@ -535,6 +692,7 @@ class SMBManager:
                                                  input=passwd_cmd, capture_output=True)
                         
                         if smb_result.returncode == 0:
+                            self.identity.set_samba_user(smb_username, True)
                             subprocess.run(['smbpasswd', '-e', smb_username], check=False)
                             logging.debug(f"Samba 사용자 '{smb_username}' 패스워드 재설정 및 활성화 완료")
                         else:
@@ -576,60 +734,33 @@ class SMBManager:
             logging.error(f"공유용 링크 디렉토리 생성/설정 실패: {e}")
             raise
 
-    def remove_symlink(self, subfolder: str) -> bool:
+    def remove_symlink(self, subfolder: str, deactivate_when_empty: bool = True) -> bool:
         """
         특정 폴더 또는 파일의 심볼릭 링크 제거.
         파일 모드에서는 subfolder가 'parent_dir/file_name' 형식이며,
         links_dir 내 단일 파일 심링크(file_name)만 제거합니다.
+        라우팅 규칙이 바뀐 경우에도 링크가 남지 않도록 모든 공유에서 제거합니다.
 
         Args:
             subfolder: 제거할 심볼릭 링크 서브폴더 경로 (또는 'parent/file_name')
+            deactivate_when_empty: 남은 공유 리소스가 없으면 SMB 공유를 비활성화할지 여부
 
         Returns:
             bool: 제거 성공 여부
         """
         try:
-            link_name = subfolder.replace(os.sep, '_')
-            link_path = os.path.join(self.links_dir, link_name)
             removed = False
-
-            # 1) 폴더 단위 공유 또는 파일 단위 공유(단일 심링크) 제거
-            if os.path.lexists(link_path):
-                if os.path.islink(link_path):
-                    os.remove(link_path)
-                elif os.path.isdir(link_path):
-                    shutil.rmtree(link_path)
-                logging.info(f"공유 리소스 제거됨: {link_path}")
-                self._active_links.discard(link_name)
-                removed = True
-
-            # 2) 파일 모드: 'parent/file_name' 형식이면 links_dir/file_name 위치의 단일 심링크도 제거 시도
-            parts = subfolder.rsplit('/', 1)
-            if len(parts) > 1:
-                file_name = parts[1]
-                file_link_path = os.path.join(self.links_dir, file_name)
-                if os.path.lexists(file_link_path) and os.path.islink(file_link_path):
-                    os.remove(file_link_path)
-                    logging.info(f"파일 단위 공유 심링크 제거됨: {file_link_path}")
-                    self._active_links.discard(file_name)
+            for space in self.spaces.values():
+                if self._remove_from_space(space, subfolder):
                     removed = True
 
             if not removed:
                 logging.warning(f"제거할 공유 리소스를 찾지 못했습니다: {subfolder}")
 
-            # 성능 최적화: 매 삭제마다 links_dir 전체 스캔을 피하고 메모리 캐시로 남은 링크 여부를 우선 판단
-            remaining_symlinks = len(self._active_links) > 0
-
-            # 캐시가 비어있더라도 외부 프로세스가 링크를 생성했을 가능성은 남아있으므로
-            # 비활성화 직전 1회만 디스크를 재확인해 정확성을 유지합니다.
-            if not remaining_symlinks and os.path.exists(self.links_dir):
-                remaining_symlinks = any(
-                    (os.path.islink(os.path.join(self.links_dir, filename)) or
-                     (os.path.isdir(os.path.join(self.links_dir, filename)) and filename != ".tmp"))
-                    for filename in os.listdir(self.links_dir)
-                )
+            if not deactivate_when_empty:
+                return removed
 
-            if not remaining_symlinks:
+            if not self.has_shared_resources():
                 logging.info("남은 공유 리소스가 없어 SMB 공유를 비활성화합니다.")
                 self.deactivate_smb_share()
 
@@ -638,23 +769,65 @@ class SMBManager:
             logging.error(f"공유 리소스 제거 실패 ({subfolder}): {e}")
             return False
 
+    def _remove_from_space(self, space: ShareSpace, subfolder: str) -> bool:
+        """공유 하나에서 폴더/파일 링크 제거 (제거한 것이 있으면 True)"""
+        link_name = subfolder.replace(os.sep, '_')
+        link_path = os.path.join(space.links_dir, link_name)
+        removed = False
+
+        if space.share_fs is not None:
+            # fuse 백엔드: 허용 목록에서만 제거 (파일시스템 변경 없음)
+            if space.share_fs.revoke(subfolder):
+                logging.info(f"공유 폴더 허용 해제됨: {subfolder}")
+                removed = True
+            space.active_links.discard(link_name)
+            space.shared_folders.discard(subfolder)
+
+        # 1) 폴더 단위 공유 또는 파일 단위 공유(단일 심링크) 제거
+        elif os.path.lexists(link_path):
+            if os.path.islink(link_path):
+                os.remove(link_path)
+            elif os.path.isdir(link_path):
+                shutil.rmtree(link_path)
+            logging.info(f"공유 리소스 제거됨: {link_path}")
+            space.active_links.discard(link_name)
+            space.shared_folders.discard(subfolder)
+            removed = True
+
+        # 2) 파일 모드: 'parent/file_name' 형식이면 links_dir/file_name 위치의 단일 심링크도 제거 시도
+        parts = subfolder.rsplit('/', 1)
+        if len(parts) > 1 and space.share_fs is None:
+            file_name = parts[1]
+            file_link_path = os.path.join(space.links_dir, file_name)
+            if os.path.lexists(file_link_path) and os.path.islink(file_link_path):
+                os.remove(file_link_path)
+                logging.info(f"파일 단위 공유 심링크 제거됨: {file_link_path}")
+                space.active_links.discard(file_name)
+                removed = True
+        return removed
+
     def create_file_symlink(self, subfolder: str, file_name: str) -> bool:
         """
         파일 단위 공유: links_dir에 file_name 그대로 단일 심링크를 생성합니다.
-        별도의 서브폴더나 .tmp 스테이징 없이, SMB 공유 루트에 직접 노출됩니다.
+        별도의 서브폴더나 .tmp 스테이징 없이, 담당 프로필 공유 루트에 직접 노출됩니다.
 
         Args:
-            subfolder: 파일이 속한 서브폴더 경로 (참조용, link_name에는 미사용)
+            subfolder: 파일이 속한 서브폴더 경로 (라우팅 기준, link_name에는 미사용)
             file_name: SMB 공유에 노출할 파일명 (실제 파일의 basename)
         """
+        results = [self._create_file_symlink_in(space, subfolder, file_name)
+                   for space in self._spaces_for(subfolder)]
+        return all(results)
+
+    def _create_file_symlink_in(self, space: ShareSpace, subfolder: str, file_name: str) -> bool:
         try:
             source_path = os.path.join(self.config.MOUNT_PATH, subfolder, file_name)
-            link_path = os.path.join(self.links_dir, file_name)
+            link_path = os.path.join(space.links_dir, file_name)
 
             if os.path.lexists(link_path):
                 # 동일 target이면 idempotent 성공
                 if os.path.islink(link_path) and os.readlink(link_path) == source_path:
-                    self._active_links.add(file_name)
+                    space.active_links.add(file_name)
                     logging.debug(f"이미 활성화된 파일 심링크를 재사용합니다: {link_path}")
                     return True
                 # 다른 파일/폴더가 같은 이름으로 있으면 제거 후 재생성
@@ -667,23 +840,13 @@ class SMBManager:
 
             # 소유권/권한: symlink 자체에 적용 (가능하면 lchown)
             try:
-                target_uid = pwd.getpwnam(self.config.SMB_USERNAME).pw_uid
-                existing_group_name = self._get_group_name(self.nfs_gid)
-                if existing_group_name:
-                    try:
-                        target_gid = grp.getgrnam(existing_group_name).gr_gid
-                    except KeyError:
-                        target_gid = self.nfs_gid
-                else:
-                    try:
-                        target_gid = grp.getgrnam(self.config.SMB_USERNAME).gr_gid
-                    except KeyError:
-                        target_gid = self.nfs_gid
-                os.lchown(link_path, target_uid, target_gid)
+                owner = self._share_owner()
+                if owner is not None:
+                    os.lchown(link_path, *owner)
             except Exception as pe:
                 logging.warning(f"파일 심링크 소유권 설정 오류 (무시): {pe}")
 
-            self._active_links.add(file_name)
+            space.active_links.add(file_name)
             logging.info(f"파일 단위 공유 심링크 생성: {link_path} -> {source_path}")
             return True
         except Exception as e:
@@ -696,72 +859,182 @@ class SMBManager:
 
         Args:
             subfolder: 생성할 심볼릭 링크 서브폴더 경로
-            source_base_path: 원본 경로의 기본 경로
 
         Returns:
             bool: 생성 성공 여부
         """
-        try:
-            source_path = os.path.join(self.config.MOUNT_PATH, subfolder)
-            link_name = subfolder.replace(os.sep, '_')
-            link_path = os.path.join(self.links_dir, link_name)
+        mounted, _ = self.create_symlinks([subfolder])
+        return bool(mounted)
 
-            # 이미 동일한 심볼릭 링크가 있으면 재생성하지 않고 성공으로 처리
-            if os.path.islink(link_path):
-                try:
-                    if os.readlink(link_path) == source_path:
-                        self._active_links.add(link_name)
-                        logging.debug(f"이미 활성화된 심볼릭 링크를 재사용합니다: {link_path}")
-                        return True
-                except OSError:
-                    # readlink 실패 시 아래 재생성 로직으로 진행
-                    pass
+    def create_symlinks(self, subfolders: Iterable[str]) -> Tuple[list, list]:
+        """
+        여러 폴더의 심볼릭 링크를 한 번에 생성 (폴더마다 담당 프로필의 공유에만 링크)
 
-            # 링크/파일이 이미 존재하면 제거 (깨진 symlink 대응을 위해 lexists 사용)
-            if os.path.lexists(link_path):
-                os.remove(link_path)
+        Args:
+            subfolders: 공유할 서브폴더 경로 목록
 
-            # 심볼릭 링크 생성
-            try:
-                os.symlink(source_path, link_path)
-            except FileExistsError:
-                # 이벤트가 짧은 간격으로 중복 도착한 경쟁 상태일 수 있음
-                if os.path.islink(link_path) and os.readlink(link_path) == source_path:
-                    self._active_links.add(link_name)
-                    logging.debug(f"동일 링크가 이미 생성되어 재사용합니다: {link_path}")
-                    return True
-                raise
-            
-            # SMB 사용자의 소유권으로 변경
-            try:
-                # NFS GID가 이미 존재하는 그룹에 할당되어 있는지 확인
-                existing_group = self._get_group_name(self.nfs_gid)
+        Returns:
+            Tuple[list, list]: (공유된 폴더 목록(기존 포함), 실패한 폴더 목록)
+            여러 프로필에 라우팅된 폴더는 한 공유에서라도 실패하면 실패로 본다.
+        """
+        ordered = list(dict.fromkeys(subfolders))
+        groups: dict[str, list] = {}
+        for subfolder in ordered:
+            for space in self._spaces_for(subfolder):
+                groups.setdefault(space.name, []).append(subfolder)
+
+        failed_set: set = set()
+        for name, group in groups.items():
+            _, failed = self._create_symlinks_in(self.spaces[name], group)
+            failed_set.update(failed)
+        return ([subfolder for subfolder in ordered if subfolder not in failed_set],
+                [subfolder for subfolder in ordered if subfolder in failed_set])
+
+    def _create_symlinks_in(self, space: ShareSpace, subfolders: List[str]) -> Tuple[list, list]:
+        """
+        공유 하나에 여러 폴더의 심볼릭 링크를 한 번에 생성
 
-                # 적절한 그룹 이름 결정
-                group_name = existing_group if existing_group else self.config.SMB_USERNAME
-                
-                # 심볼릭 링크 소유권 변경
-                subprocess.run(
-                    ['chown', '-h', f"{self.config.SMB_USERNAME}:{group_name}", link_path], check=False)
-                logging.debug(f"심볼릭 링크 소유권 변경됨: {link_path}")
-            except Exception as e:
-                logging.warning(f"심볼릭 링크 소유권 변경 실패 ({link_path}): {e}")
+        이미 공유 중인 폴더(shared_folders)는 건드리지 않고, 바뀐 항목만 .tmp 스테이징 디렉토리에서
+        링크 생성과 소유권 설정(lchown)을 마친 뒤 rename으로 교체한다.
+        SMB 클라이언트는 소유권까지 설정된 완성된 링크만 보게 된다.
 
-            self._active_links.add(link_name)
-            logging.info(f"심볼릭 링크 생성됨: {link_path} -> {source_path}")
-            return True
-        except Exception as e:
-            logging.error(f"심볼릭 링크 생성 실패 ({subfolder}): {e}")
-            return False
+        원자성은 링크 단위다. links_dir는 공유 루트 자체라 통째로 교체할 수 없으므로
+        묶음 중간에 실패하면 그때까지 교체된 링크만 반영되고, 실패한 항목은 기존 링크가 그대로 남는다.
+        SMB_PRUNE_COVERED_LINKS가 켜져 있으면 새로 공유한 폴더 아래의 하위 폴더 링크를 정리한다.
+        """
+        mounted: list = []
+        failed: list = []
+        pending: list = []
+        for subfolder in subfolders:
+            if subfolder in space.shared_folders and subfolder.replace(os.sep, '_') in space.active_links:
+                mounted.append(subfolder)
+            else:
+                pending.append(subfolder)
+        if not pending:
+            return mounted, failed
+
+        if space.share_fs is not None:
+            # 성능 최적화: fuse 백엔드는 허용 목록 갱신만으로 공유된다. (링크/chown 없음, 이름 충돌 없음)
+            for subfolder in pending:
+                source_path = os.path.join(self.config.MOUNT_PATH, subfolder)
+                if not os.path.isdir(source_path):
+                    logging.error(f"공유할 폴더가 없습니다: {source_path}")
+                    failed.append(subfolder)
+                    continue
+                space.share_fs.allow(subfolder)
+                space.active_links.add(subfolder.replace(os.sep, '_'))
+                space.shared_folders.add(subfolder)
+                mounted.append(subfolder)
+                logging.info(f"공유 폴더 허용됨: {subfolder} [{space.share_name}]")
+            return mounted, failed
+
+        # 성능 최적화: 소유자 UID/GID는 묶음당 1회만 확인하고 chown 프로세스 대신 os.lchown 사용
+        owner = self._share_owner()
+        staging_dir = os.path.join(space.links_dir, '.tmp', f"batch-{os.getpid()}-{threading.get_ident()}")
+        created = 0
+        try:
+            os.makedirs(staging_dir, exist_ok=True)
+            for subfolder in pending:
+                source_path = os.path.join(self.config.MOUNT_PATH, subfolder)
+                link_name = subfolder.replace(os.sep, '_')
+                staged_path = os.path.join(staging_dir, link_name)
+                try:
+                    if os.path.lexists(staged_path):
+                        os.remove(staged_path)
+                    os.symlink(source_path, staged_path)
+                    if owner is not None:
+                        try:
+                            os.lchown(staged_path, *owner)
+                        except OSError as e:
+                            logging.warning(f"심볼릭 링크 소유권 변경 실패 ({link_name}): {e}")
+                    # 기존 링크(다른 대상 또는 깨진 링크 포함)는 rename으로 원자적으로 교체
+                    os.replace(staged_path, os.path.join(space.links_dir, link_name))
+                except OSError as e:
+                    logging.error(f"심볼릭 링크 생성 실패 ({subfolder}): {e}")
+                    failed.append(subfolder)
+                    continue
+                space.active_links.add(link_name)
+                space.shared_folders.add(subfolder)
+                mounted.append(subfolder)
+                created += 1
+                logging.debug(f"심볼릭 링크 생성됨: {link_name} -> {source_path}")
+        except OSError as e:
+            logging.error(f"심볼릭 링크 스테이징 디렉토리 준비 실패 ({staging_dir}): {e}")
+            failed.extend(subfolder for subfolder in pending if subfolder not in mounted and subfolder not in failed)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        if created:
+            logging.info(f"[{space.share_name}] 심볼릭 링크 {created}개 생성됨 "
+                         f"(기존 {len(mounted) - created}개 유지, 실패 {len(failed)}개)")
+            if self.config.SMB_PRUNE_COVERED_LINKS:
+                failed_set = set(failed)
+                self._prune_covered_links(space, [subfolder for subfolder in pending if subfolder not in failed_set])
+        return mounted, failed
+
+    def _prune_covered_links(self, space: ShareSpace, added: List[str]) -> int:
+        """
+        이번 묶음에서 공유한 폴더 아래에 따로 공유 중이던 하위 폴더 링크를 제거 (SMB_PRUNE_COVERED_LINKS)
+
+        메모리 트리만 보고 판단하며 NFS stat은 하지 않는다.
+
+        Returns:
+            int: 제거한 링크 수
+        """
+        removed = 0
+        for folder in added:
+            for child in space.shared_folders.descendants(folder):
+                link_name = child.replace(os.sep, '_')
+                link_path = os.path.join(space.links_dir, link_name)
+                try:
+                    os.remove(link_path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logging.warning(f"하위 폴더 심볼릭 링크 제거 실패 ({link_name}): {e}")
+                    continue
+                space.active_links.discard(link_name)
+                space.shared_folders.discard(child)
+                removed += 1
+                logging.debug(f"상위 폴더 공유에 포함된 하위 폴더 링크 제거됨: {link_name} ({folder})")
+        if removed:
+            logging.info(f"[{space.share_name}] 상위 폴더 공유에 포함된 하위 폴더 링크 {removed}개 제거됨")
+        return removed
+
+    def close(self) -> None:
+        """종료 시 FUSE 공유 마운트 해제 (심볼릭 링크 백엔드는 할 일 없음)"""
+        for space in self.spaces.values():
+            if space.share_fs is not None:
+                space.share_fs.stop()
+                space.share_fs = None
+                logging.info(f"FUSE 공유 마운트 해제: {space.links_dir}")
 
     def cleanup_all_symlinks(self) -> None:
         """
-        links_dir 디렉토리에 있는 모든 공유 리소스(심링크 및 디렉토리)를 제거합니다.
+        모든 공유의 links_dir 디렉토리에 있는 공유 리소스(심링크 및 디렉토리)를 제거합니다.
         """
+        for space in self.spaces.values():
+            self._cleanup_space(space)
+
+    def cleanup_profile_share(self, name: str) -> None:
+        """VM 프로필 하나의 공유 리소스만 제거 (다른 VM이 SMB 서버를 쓰는 중일 때)"""
+        space = self.spaces.get(name)
+        if space is not None:
+            self._cleanup_space(space)
+
+    def _cleanup_space(self, space: ShareSpace) -> None:
+        """공유 하나의 links_dir에 있는 모든 공유 리소스(심링크 및 디렉토리)를 제거"""
+        if space.share_fs is not None:
+            space.share_fs.clear()
+            space.active_links.clear()
+            space.shared_folders.clear()
+            logging.info(f"공유 허용 목록을 모두 비웠습니다: {space.share_name}")
+            return
+
         try:
-            if os.path.exists(self.links_dir):
-                for filename in os.listdir(self.links_dir):
-                    file_path = os.path.join(self.links_dir, filename)
+            if os.path.exists(space.links_dir):
+                for filename in os.listdir(space.links_dir):
+                    file_path = os.path.join(space.links_dir, filename)
                     if filename == ".tmp":
                         # 임시 디렉토리는 내부만 비움
                         shutil.rmtree(file_path, ignore_errors=True)
@@ -776,70 +1049,56 @@ class SMBManager:
                     except Exception as e:
                         logging.error(f"공유 리소스 제거 실패 ({file_path}): {e}")
 
-            self._active_links.clear()
-            logging.info(f"모든 공유 리소스 제거 완료: {self.links_dir}")
+            space.active_links.clear()
+            space.shared_folders.clear()
+            logging.info(f"모든 공유 리소스 제거 완료: {space.links_dir}")
 
         except Exception as e:
             logging.error(f"공유 리소스 정리 중 오류 발생: {e}")
-            
+
     def _fix_symlinks_ownership(self) -> None:
         """
         기존 심볼릭 링크 및 하위 파일들의 소유권을 SMB 사용자로 변경합니다.
         """
+        # fuse 백엔드는 원본 파일의 소유권을 그대로 보여주므로 변경할 링크가 없다.
+        spaces = [space for space in self.spaces.values()
+                  if space.share_fs is None and os.path.exists(space.links_dir)]
+        if not spaces:
+            return
         try:
-            if not os.path.exists(self.links_dir):
-                return
-
-            # 1. 타겟 UID 결정
-            try:
-                target_uid = pwd.getpwnam(self.config.SMB_USERNAME).pw_uid
-            except KeyError:
+            # 1. 타겟 UID/GID 결정
+            owner = self._share_owner()
+            if owner is None:
                 logging.error(f"사용자 '{self.config.SMB_USERNAME}' 정보를 찾을 수 없어 소유권 변경을 중단합니다.")
                 return
-
-            # 2. 타겟 GID 결정
-            target_gid = self.nfs_gid # 기본값
-
-            # NFS GID가 이미 존재하는 그룹에 할당되어 있는지 확인
-            existing_group_name = self._get_group_name(self.nfs_gid)
-
-            if existing_group_name:
-                try:
-                    target_gid = grp.getgrnam(existing_group_name).gr_gid
-                except KeyError:
-                    pass
-            else:
-                # 그룹이 없는 경우 SMB 사용자의 primary group GID 시도
-                try:
-                    target_gid = grp.getgrnam(self.config.SMB_USERNAME).gr_gid
-                except KeyError:
-                    pass
+            target_uid, target_gid = owner
 
             logging.debug(f"공유 리소스 소유권 변경 시작 (UID={target_uid}, GID={target_gid})")
 
             # 3. 모든 공유 리소스 소유권 변경
-            for filename in os.listdir(self.links_dir):
-                if filename == ".tmp":
-                    continue
-                file_path = os.path.join(self.links_dir, filename)
-                if os.path.islink(file_path):
-                    try:
-                        # subprocess.run(['chown', ...]) 대신 os.lchown 사용 (N+1 최적화)
-                        os.lchown(file_path, target_uid, target_gid)
-                        logging.debug(f"심볼릭 링크 소유권 변경됨: {file_path}")
-                    except OSError as e:
-                        logging.warning(f"심볼릭 링크 소유권 변경 실패 ({file_path}): {e}")
-                elif os.path.isdir(file_path):
-                    try:
-                        os.chown(file_path, target_uid, target_gid)
-                        for sub_file in os.listdir(file_path):
-                            sub_path = os.path.join(file_path, sub_file)
-                            if os.path.islink(sub_path):
-                                os.lchown(sub_path, target_uid, target_gid)
-                        logging.debug(f"디렉토리 내부 소유권 변경됨: {file_path}")
-                    except OSError as e:
-                        logging.warning(f"디렉토리 내부 소유권 변경 실패 ({file_path}): {e}")
-
-            logging.debug(f"모든 공유 리소스 소유권 변경 완료: {self.links_dir}")
+            for space in spaces:
+                for filename in os.listdir(space.links_dir):
+                    if filename == ".tmp":
+                        continue
+                    file_path = os.path.join(space.links_dir, filename)
+                    if os.path.islink(file_path):
+                        try:
+                            # subprocess.run(['chown', ...]) 대신 os.lchown 사용 (N+1 최적화)
+                            os.lchown(file_path, target_uid, target_gid)
+                            logging.debug(f"심볼릭 링크 소유권 변경됨: {file_path}")
+                        except OSError as e:
+                            logging.warning(f"심볼릭 링크 소유권 변경 실패 ({file_path}): {e}")
+                    elif os.path.isdir(file_path):
+                        try:
+                            os.chown(file_path, target_uid, target_gid)
+                            for sub_file in os.listdir(file_path):
+                                sub_path = os.path.join(file_path, sub_file)
+                                if os.path.islink(sub_path):
+                                    os.lchown(sub_path, target_uid, target_gid)
+                            logging.debug(f"디렉토리 내부 소유권 변경됨: {file_path}")
+                        except OSError as e:
+                            logging.warning(f"디렉토리 내부 소유권 변경 실패 ({file_path}): {e}")
+
+                logging.debug(f"모든 공유 리소스 소유권 변경 완료: {space.links_dir}")
         except Exception as e:
             logging.error(f"공유 리소스 소유권 변경 중 오류 발생: {e}")
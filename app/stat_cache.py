@@ -0,0 +1,102 @@
+import os
+import threading
+from typing import Optional
+
+
+class DirectoryStatCache:
+    """모니터링 주기(cycle) 단위의 stat/scandir 결과 캐시
+
+    같은 주기 안에서 keepalive, 마운트 대상 선택, 트랜스코더가 같은 디렉토리를
+    반복 조회하지 않도록 경로별 결과를 1회만 계산해 공유한다.
+    os.DirEntry는 stat 결과를 자체적으로 보관하므로 항목별 stat도 주기당 최대 1회만 발생한다.
+    """
+
+    def __init__(self):
+        self._stats: dict[str, Optional[os.stat_result]] = {}
+        self._listings: dict[str, Optional[list[os.DirEntry]]] = {}
+        self._lock = threading.Lock()
+        # 같은 경로를 여러 스레드가 동시에 조회할 때 실제 조회는 1회만 수행
+        self._key_locks: dict[str, threading.Lock] = {}
+        self.cycle = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normpath(path)
+
+    def new_cycle(self) -> None:
+        """새 모니터링 주기 시작: 이전 주기의 결과를 모두 버린다."""
+        with self._lock:
+            self._stats = {}
+            self._listings = {}
+            self._key_locks = {}
+            self.cycle += 1
+
+    def invalidate(self, path: str) -> None:
+        """특정 디렉토리의 캐시만 무효화 (이벤트로 변경이 확인된 경우)"""
+        key = self._key(path)
+        with self._lock:
+            self._stats.pop(key, None)
+            self._listings.pop(key, None)
+
+    def _key_lock(self, kind: str, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(kind + key)
+            if lock is None:
+                lock = self._key_locks[kind + key] = threading.Lock()
+            return lock
+
+    def stat(self, path: str) -> Optional[os.stat_result]:
+        """경로의 stat 결과 (존재하지 않거나 실패하면 None)"""
+        key = self._key(path)
+        try:
+            return self._stats[key]
+        except KeyError:
+            pass
+
+        with self._key_lock('s', key):
+            if key in self._stats:
+                return self._stats[key]
+            try:
+                result: Optional[os.stat_result] = os.stat(key)
+            except OSError:
+                result = None
+            self._stats[key] = result
+            return result
+
+    def scandir(self, path: str) -> list[os.DirEntry]:
+        """디렉토리 항목 목록 (조회 실패 시 OSError를 다시 발생)"""
+        key = self._key(path)
+        listing = self._listings.get(key)
+        if listing is None:
+            with self._key_lock('l', key):
+                if key not in self._listings:
+                    try:
+                        with os.scandir(key) as it:
+                            self._listings[key] = list(it)
+                    except OSError:
+                        self._listings[key] = None
+                        raise
+                listing = self._listings[key]
+
+        if listing is None:
+            raise FileNotFoundError(key)
+        return listing
+
+    def has_file_near_mtime(self, path: str, reference_mtime: float, tolerance: float = 2.0,
+                            short_circuit: bool = True) -> bool:
+        """디렉토리 안에 mtime이 reference_mtime과 tolerance 이내인 파일이 있는지 확인
+
+        short_circuit이 True면 첫 번째 일치 항목에서 멈춰 나머지 항목의 stat을 생략한다.
+        """
+        found = False
+        for entry in self.scandir(path):
+            try:
+                if not entry.is_file():
+                    continue
+                if abs(entry.stat().st_mtime - reference_mtime) <= tolerance:
+                    found = True
+                    if short_circuit:
+                        break
+            except OSError:
+                continue
+        return found
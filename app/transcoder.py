@@ -7,6 +7,7 @@ import threading
 from functools import lru_cache
 from typing import Optional, Dict, Any, List, Callable
 from config import GshareConfig  # type: ignore
+from stat_cache import DirectoryStatCache
 
 
 class Transcoder:
@@ -201,34 +202,43 @@ class Transcoder:
 
                 yield root, filename, rule
 
-    def _iter_known_folder_matches(self, folder_path: str, subfolders: List[str]):
-        """이미 파악된 폴더 목록(폴더 스캔 결과)을 재사용해 파일만 확인"""
+    def _iter_known_folder_matches(self, folder_path: str, subfolders: List[str],
+                                   stat_cache: Optional[DirectoryStatCache] = None):
+        """이미 파악된 폴더 목록(폴더 스캔 결과)을 재사용해 파일만 확인
+
+        stat_cache가 주어지면 같은 모니터링 주기에 이미 조회한 디렉토리 목록을 재사용한다.
+        """
         for sub in subfolders:
-            full_path = os.path.join(folder_path, sub)
-            if not os.path.isdir(full_path):
+            full_path = os.path.join(folder_path, sub) if sub else folder_path
+            if stat_cache is None and not os.path.isdir(full_path):
                 continue
 
             try:
                 done_set = self._load_done_list(full_path)
                 active_rules = self._get_active_rules_for_folder(full_path)
 
-                with os.scandir(full_path) as entries:
-                    for entry in entries:
-                        if not entry.is_file():
-                            continue
+                if stat_cache is not None:
+                    entries = stat_cache.scandir(full_path)
+                else:
+                    with os.scandir(full_path) as it:
+                        entries = list(it)
+
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
 
-                        filename = entry.name
-                        if self._is_skippable_file(filename, done_set):
-                            continue
+                    filename = entry.name
+                    if self._is_skippable_file(filename, done_set):
+                        continue
 
-                        rule = self._match_rule_for_filename(filename, active_rules)
-                        if rule is None:
-                            continue
+                    rule = self._match_rule_for_filename(filename, active_rules)
+                    if rule is None:
+                        continue
 
-                        if self._is_any_output_pattern_file(filename, rule):
-                            continue
+                    if self._is_any_output_pattern_file(filename, rule):
+                        continue
 
-                        yield full_path, filename, rule
+                    yield full_path, filename, rule
             except OSError as e:
                 logging.debug(f"폴더 재사용 스캔 실패(무시): {full_path} - {e}")
 
@@ -327,15 +337,17 @@ class Transcoder:
         logging.info(f"트랜스코딩 작업 큐에 추가됨: {folder_path} (recursive={recursive})")
         return 0  # 비동기 처리이므로 즉시 반환
 
-    def process_folder_blocking(self, folder_path: str, recursive: bool = True) -> int:
+    def process_folder_blocking(self, folder_path: str, recursive: bool = True,
+                                stat_cache: Optional[DirectoryStatCache] = None) -> int:
         """폴더 트랜스코딩을 즉시 실행하고 완료될 때까지 대기"""
         if not self.enabled or not self.rules:
             return 0
 
         with self._lock:
-            return self._process_folder_sync(folder_path, recursive=recursive)
+            return self._process_folder_sync(folder_path, recursive=recursive, stat_cache=stat_cache)
 
-    def _process_folder_sync(self, folder_path: str, recursive: bool = True) -> int:
+    def _process_folder_sync(self, folder_path: str, recursive: bool = True,
+                             stat_cache: Optional[DirectoryStatCache] = None) -> int:
         """폴더 내 매칭되는 파일들을 트랜스코딩 (동기 실행). 처리된 파일 수 반환."""
         if not self.enabled or not self.rules:
             return 0
@@ -349,7 +361,13 @@ class Transcoder:
                 logging.warning(f"트랜스코딩 대상 폴더가 존재하지 않습니다: {folder_path}")
                 return 0
 
-            for root, filename, rule in self._iter_walk_matches(folder_path, recursive=recursive):
+            if not recursive and stat_cache is not None:
+                # 비재귀 처리는 모니터링 주기 캐시의 디렉토리 목록을 재사용
+                matches = self._iter_known_folder_matches(folder_path, [''], stat_cache=stat_cache)
+            else:
+                matches = self._iter_walk_matches(folder_path, recursive=recursive)
+
+            for root, filename, rule in matches:
                 file_path = os.path.join(root, filename)
 
                 if self._is_any_output_pattern_file(filename, rule):
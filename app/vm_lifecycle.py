@@ -0,0 +1,142 @@
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Optional
+
+from proxmox_tasks import ProxmoxTaskTracker, wait_task
+
+
+class VMLifecycle:
+    """VM 하나의 깨우기/재우기 방식을 관리 (stop/start 또는 최대 절전/재개)
+
+    - stop 모드: 기존과 같이 stop/start
+    - hibernate 모드: suspend todisk로 메모리 상태를 보존해 다음 시작 시 Android 부팅을 건너뛴다.
+      최대 절전 요청이 실패하면 stop으로, 재개가 실패하면 콜드 스타트로 되돌아간다.
+    깨우기 요청부터 VM 준비(ready_host의 VM_READY_PORT 응답)까지 걸린 시간을 기록한다.
+    """
+
+    MODE_STOP = 'stop'
+    MODE_HIBERNATE = 'hibernate'
+
+    # 준비 확인 최대 대기 시간(초), Proxmox 작업 추적 제한 시간과 같다.
+    READY_TIMEOUT = ProxmoxTaskTracker.DEFAULT_TIMEOUT
+    # 보관할 최근 깨우기 기록 수
+    HISTORY_SIZE = 50
+
+    def __init__(self, config: Any, proxmox_api: Any, ready_host: Optional[str] = None):
+        self.config = config
+        self.proxmox_api = proxmox_api
+        # 준비 확인 대상 (None이면 기본 VM의 ANDROID_VM_IP, 빈 값이면 Proxmox 작업 완료 시점을 준비로 간주)
+        self.ready_host = ready_host
+        self._lock = threading.Lock()
+        self._waking = False
+        self._last_prewarm = 0.0
+        # 마지막 깨우기 사유 (세션 기록의 시작 사유로 사용)
+        self.last_reason: Optional[str] = None
+        self.history: deque[dict[str, Any]] = deque(maxlen=self.HISTORY_SIZE)
+
+    @property
+    def mode(self) -> str:
+        return self.config.VM_LIFECYCLE_MODE
+
+    def wake(self, reason: str, requested_at: Optional[float] = None) -> Optional[Future]:
+        """VM을 깨운다. (최대 절전 상태면 재개, 아니면 콜드 스타트) 요청 실패 시 None"""
+        requested_at = requested_at or time.time()
+        state = self.proxmox_api.get_power_state()
+
+        if state == 'paused':
+            method = 'resume'
+            future = self.proxmox_api.submit_resume()
+        else:
+            # 디스크 최대 절전 상태는 Proxmox에서 start 시 저장된 상태로 재개된다.
+            method = 'resume' if state == 'hibernated' else 'cold'
+            future = self.proxmox_api.submit_start()
+
+        if future is None and method == 'resume':
+            logging.warning("VM 재개 요청 실패, 콜드 스타트로 전환합니다.")
+            method = 'cold'
+            future = self.proxmox_api.submit_start()
+        if future is None:
+            return None
+
+        logging.info(f"VM 깨우기 요청 ({reason}, 방식: {method})")
+        self.last_reason = reason
+        with self._lock:
+            self._waking = True
+        threading.Thread(target=self._measure_wake, args=(future, reason, method, requested_at),
+                         name='vm-wake-latency', daemon=True).start()
+        return future
+
+    def sleep(self) -> Optional[Future]:
+        """VM을 재운다. hibernate 모드면 최대 절전, 실패하거나 stop 모드면 stop"""
+        if self.mode == self.MODE_HIBERNATE:
+            future = self.proxmox_api.submit_hibernate()
+            if future is not None:
+                logging.info("VM 최대 절전(suspend todisk) 요청")
+                return future
+            logging.warning("VM 최대 절전 요청 실패, 종료(stop)로 전환합니다.")
+        return self.proxmox_api.submit_stop()
+
+    def handle_relay_activity(self) -> bool:
+        """릴레이가 업로드 활동 시작을 알리면 이벤트 도착 전에 VM을 미리 깨운다. (사전 기동 시 True)"""
+        if not self.config.VM_PREWARM_ENABLED:
+            return False
+        now = time.time()
+        with self._lock:
+            if self._waking or now - self._last_prewarm < self.config.VM_PREWARM_COOLDOWN:
+                return False
+            self._last_prewarm = now
+        if self.proxmox_api.is_vm_running():
+            return False
+        return self.wake('사전 기동', requested_at=now) is not None
+
+    def _measure_wake(self, future: Future, reason: str, method: str, requested_at: float) -> None:
+        record: dict[str, Any] = {'reason': reason, 'method': method, 'requested_at': requested_at,
+                                  'task_seconds': None, 'ready_seconds': None, 'success': False}
+        try:
+            if not wait_task(future, timeout=self.READY_TIMEOUT):
+                logging.error(f"VM 깨우기 작업 실패 ({method})")
+                return
+            record['task_seconds'] = round(time.time() - requested_at, 2)
+
+            ready_at = self._wait_until_ready(requested_at + self.READY_TIMEOUT)
+            if ready_at is not None:
+                record['ready_seconds'] = round(ready_at - requested_at, 2)
+                record['success'] = True
+                logging.info(f"VM 준비 완료 ({reason}, {method}): 요청 후 {record['ready_seconds']}초 "
+                             f"(Proxmox 작업 {record['task_seconds']}초)")
+            else:
+                logging.warning(f"VM 준비 확인 시간 초과 ({reason}, {method})")
+        finally:
+            with self._lock:
+                self._waking = False
+                self.history.append(record)
+
+    def _wait_until_ready(self, deadline: float) -> Optional[float]:
+        """VM의 준비 포트가 연결을 받을 때까지 대기 (IP/포트 미설정 시 즉시 준비로 간주)"""
+        host = (self.config.ANDROID_VM_IP if self.ready_host is None else self.ready_host) or ''
+        host = host.strip()
+        port = int(self.config.VM_READY_PORT or 0)
+        if not host or port <= 0:
+            return time.time()
+
+        while time.time() < deadline:
+            try:
+                with socket.create_connection((host, port), timeout=2):
+                    return time.time()
+            except OSError:
+                time.sleep(1)
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        """최근 깨우기 지연 통계 (방식별 평균 준비 시간 포함)"""
+        with self._lock:
+            records = list(self.history)
+        summary: dict[str, Any] = {'mode': self.mode, 'count': len(records), 'recent': records[-10:]}
+        for method in ('resume', 'cold'):
+            values = [r['ready_seconds'] for r in records if r['method'] == method and r['ready_seconds'] is not None]
+            summary[f'{method}_avg_seconds'] = round(sum(values) / len(values), 2) if values else None
+        return summary
@@ -0,0 +1,163 @@
+import logging
+import math
+from collections import deque
+from typing import Any, Optional
+
+
+class RollingSeries:
+    """시간 창(window) 안의 값을 유지하며 평균/EWMA/p95를 O(1)로 제공하는 시계열
+
+    - 평균: 창에 들어오고 나가는 값으로 합계를 갱신
+    - EWMA: 값이 추가될 때마다 갱신
+    - p95: 고정 개수의 로그 스케일 버킷 히스토그램에서 계산 (값 개수와 무관한 상수 비용)
+    """
+
+    BUCKETS = 128
+    # 버킷 해상도: log2 한 단계를 4등분 (약 19% 간격)
+    BUCKET_SCALE = 4
+
+    def __init__(self, window: float, ewma_alpha: float = 0.3):
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self._points: deque[tuple[float, float]] = deque()
+        self._sum = 0.0
+        self._histogram = [0] * self.BUCKETS
+        self.ewma: Optional[float] = None
+        self.last_time: Optional[float] = None
+
+    @classmethod
+    def _bucket(cls, value: float) -> int:
+        if value <= 0:
+            return 0
+        return min(cls.BUCKETS - 1, int(math.log2(value + 1) * cls.BUCKET_SCALE))
+
+    @classmethod
+    def _bucket_upper(cls, index: int) -> float:
+        return 2 ** ((index + 1) / cls.BUCKET_SCALE) - 1
+
+    def add(self, timestamp: float, value: float) -> None:
+        if self.last_time is not None and timestamp <= self.last_time:
+            return
+        self.last_time = timestamp
+        self._points.append((timestamp, value))
+        self._sum += value
+        self._histogram[self._bucket(value)] += 1
+        self.ewma = value if self.ewma is None else self.ewma + self.ewma_alpha * (value - self.ewma)
+        self._expire(timestamp)
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.window
+        while self._points and self._points[0][0] <= cutoff:
+            _, old = self._points.popleft()
+            self._sum -= old
+            self._histogram[self._bucket(old)] -= 1
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    @property
+    def span(self) -> float:
+        """창 안의 첫 값과 마지막 값 사이 시간(초)"""
+        if len(self._points) < 2:
+            return 0.0
+        return self._points[-1][0] - self._points[0][0]
+
+    @property
+    def mean(self) -> Optional[float]:
+        if not self._points:
+            return None
+        return self._sum / len(self._points)
+
+    @property
+    def p95(self) -> Optional[float]:
+        """95 백분위 근사값 (해당 버킷의 상한)"""
+        count = len(self._points)
+        if not count:
+            return None
+        rank = math.ceil(count * 0.95)
+        seen = 0
+        for index, bucket_count in enumerate(self._histogram):
+            seen += bucket_count
+            if seen >= rank:
+                return self._bucket_upper(index)
+        return self._bucket_upper(self.BUCKETS - 1)
+
+
+class VMMetricsClient:
+    """Proxmox rrddata(분 단위 평균)로 CPU/네트워크/디스크 시계열을 유지하는 클라이언트
+
+    status/current를 주기마다 1회 샘플링하는 대신 한 번의 rrddata 요청으로
+    지난 구간의 분 단위 값을 모두 받아 새 포인트만 시계열에 추가한다.
+    """
+
+    # series 이름 -> rrddata 필드 목록 (여러 필드는 합산)
+    SERIES_FIELDS = {
+        'cpu': ('cpu',),
+        'netin': ('netin',),
+        'netout': ('netout',),
+        'disk': ('diskread', 'diskwrite'),
+    }
+
+    def __init__(self, proxmox_api: Any, window: float = 900, ewma_alpha: float = 0.3):
+        self.proxmox_api = proxmox_api
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self.reset()
+
+    def reset(self) -> None:
+        """VM 종료 등으로 이전 구간이 의미 없어졌을 때 시계열을 비운다."""
+        self.series = {name: RollingSeries(self.window, self.ewma_alpha) for name in self.SERIES_FIELDS}
+
+    def refresh(self, since: Optional[float] = None) -> bool:
+        """rrddata를 조회해 새 포인트를 추가한다. (실패 시 False)
+
+        since가 주어지면 그 이전 포인트(예: VM 부팅 전 정지 구간)는 무시한다.
+        """
+        points = self.proxmox_api.get_rrd_data()
+        if points is None:
+            return False
+
+        added = 0
+        for point in sorted(points, key=lambda p: p.get('time') or 0):
+            timestamp = point.get('time')
+            if timestamp is None or (since is not None and timestamp < since):
+                continue
+            for name, fields in self.SERIES_FIELDS.items():
+                values = [point.get(field) for field in fields]
+                if any(value is None for value in values):
+                    continue
+                value = sum(float(v) for v in values)
+                if name == 'cpu':
+                    value *= 100
+                series = self.series[name]
+                if series.last_time is None or timestamp > series.last_time:
+                    series.add(float(timestamp), value)
+                    added += 1
+        logging.debug(f"rrddata 갱신: 새 값 {added}개")
+        return True
+
+    def is_ready(self) -> bool:
+        """판단에 필요한 만큼(창의 80% 이상) 시계열이 쌓였는지 여부"""
+        cpu = self.series['cpu']
+        return len(cpu) >= 2 and cpu.span >= self.window * 0.8
+
+    def is_idle(self, cpu_threshold: float, net_threshold: float, disk_threshold: float) -> bool:
+        """창 평균 CPU(%)/업로드(bytes/s)/디스크 I/O(bytes/s)가 모두 임계치 미만이면 유휴로 판단"""
+        if not self.is_ready():
+            return False
+        cpu = self.series['cpu'].mean
+        netout = self.series['netout'].mean
+        disk = self.series['disk'].mean
+        if cpu is None or cpu >= cpu_threshold:
+            return False
+        if netout is not None and netout >= net_threshold:
+            return False
+        if disk is not None and disk >= disk_threshold:
+            return False
+        return True
+
+    def summary(self) -> dict[str, dict[str, Optional[float]]]:
+        return {
+            name: {'mean': series.mean, 'p95': series.p95, 'ewma': series.ewma}
+            for name, series in self.series.items()
+        }
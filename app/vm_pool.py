@@ -0,0 +1,171 @@
+import fnmatch
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from config import GshareConfig  # type: ignore
+from proxmox_api import ProxmoxAPI
+from vm_lifecycle import VMLifecycle
+from vm_status_poller import VMStatusPoller, VMStatusSnapshot
+
+
+@dataclass
+class VMProfile:
+    """VM 프로필: 대상 VM과 폴더 라우팅/유휴 판정 설정"""
+    name: str
+    node_name: str
+    vm_id: str
+    # 이 VM으로 라우팅할 폴더 규칙 (경로 접두어 또는 fnmatch 패턴)
+    folders: List[str] = field(default_factory=list)
+    # 종료 전 호출할 웹훅 (비어 있으면 바로 stop 예약)
+    shutdown_webhook_url: str = ''
+    # 유휴 판정 기준 (None이면 전역 설정 사용)
+    cpu_threshold: Optional[float] = None
+    threshold_count: Optional[int] = None
+    # 깨우기 지연 측정 시 준비 포트를 확인할 VM IP (비어 있으면 확인 없이 Proxmox 작업 완료 시점으로 측정,
+    # 기본 VM의 ANDROID_VM_IP는 다른 VM이므로 쓰지 않음)
+    ready_host: str = ''
+    # 이 VM이 마운트할 SMB 공유 이름 (비어 있으면 '<SMB_SHARE_NAME>_<name>')
+    share_name: str = ''
+
+    def matches(self, folder: str) -> bool:
+        for rule in self.folders:
+            rule = rule.strip().strip('/')
+            if not rule:
+                continue
+            if folder == rule or folder.startswith(rule + '/') or fnmatch.fnmatchcase(folder, rule):
+                return True
+        return False
+
+
+class VMRuntime:
+    """VM 프로필별 실행 상태 (유휴 카운트, 예약된 stop, 마지막 종료 시각)
+
+    VM마다 자체 상태 폴러와 깨우기/재우기(VMLifecycle)를 가지므로, 상태 확인은 poller의
+    스냅샷을, start/stop은 lifecycle을 거친다. (Proxmox 작업 추적/상태 전환 캐시 공통 적용)
+    """
+
+    def __init__(self, profile: VMProfile, api: ProxmoxAPI, lifecycle: VMLifecycle,
+                 poller: VMStatusPoller, last_shutdown_time: float = 0.0):
+        self.profile = profile
+        self.api = api
+        self.lifecycle = lifecycle
+        self.poller = poller
+        self.low_cpu_count = 0
+        self.pending_stop_at: Optional[float] = None
+        self.last_shutdown_time = last_shutdown_time
+        self.last_file_event_time: Optional[float] = None
+        self.last_vm_status: Optional[bool] = None
+
+    @property
+    def name(self) -> str:
+        return self.profile.name
+
+    @property
+    def status(self) -> VMStatusSnapshot:
+        return self.poller.snapshot
+
+    @property
+    def pending_stop_event(self) -> str:
+        """스케줄러에서 사용할 예약 stop 타이머 이름"""
+        return f"pending_stop:{self.profile.name}"
+
+
+class VMPool:
+    """하나의 스캔 인덱스/SMB 서버를 공유하는 VM 프로필 모음
+
+    기본(primary) VM은 기존 NODE_NAME/VM_ID 설정이며, 어떤 프로필 규칙에도 맞지 않는
+    폴더를 담당한다. 추가 프로필은 VM_PROFILES 설정으로 등록하며 같은 Proxmox 세션을 공유한다.
+    SMB 서버(smbd)는 하나지만 프로필마다 별도 공유를 두므로, 각 VM은 route()로 자신에게
+    배정된 폴더만 보게 된다. (SMBManager.configure_profiles)
+    """
+
+    PRIMARY_NAME = 'primary'
+    # 프로필 이름은 링크 디렉토리/공유 이름에 그대로 쓰이므로 안전한 문자만 허용
+    NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+    def __init__(self, config: GshareConfig, primary_api: ProxmoxAPI, primary_lifecycle: VMLifecycle,
+                 primary_poller: VMStatusPoller, last_shutdown_time: float = 0.0,
+                 on_status_change: Optional[Callable[[VMStatusSnapshot], None]] = None):
+        self.config = config
+        self.primary = VMRuntime(
+            VMProfile(self.PRIMARY_NAME, primary_api.node_name, primary_api.vm_id),
+            primary_api, primary_lifecycle, primary_poller, last_shutdown_time)
+        self.secondary: List[VMRuntime] = []
+
+        for profile in self.parse_profiles(getattr(config, 'VM_PROFILES', None)):
+            api = ProxmoxAPI(config, node_name=profile.node_name, vm_id=profile.vm_id, shared_with=primary_api)
+            if not profile.share_name:
+                profile.share_name = f"{config.SMB_SHARE_NAME}_{profile.name}"
+            lifecycle = VMLifecycle(config, api, ready_host=profile.ready_host)
+            poller = VMStatusPoller(
+                api, interval=config.VM_STATUS_POLL_INTERVAL,
+                transition_interval=config.PROXMOX_STATUS_TTL_TRANSITION * 2,
+                on_change=on_status_change)
+            self.secondary.append(VMRuntime(profile, api, lifecycle, poller, last_shutdown_time))
+
+        if self.secondary:
+            logging.info(f"추가 VM 프로필 {len(self.secondary)}개 로드: "
+                         f"{', '.join(f'{rt.name}({rt.profile.vm_id})' for rt in self.secondary)}")
+
+    @staticmethod
+    def parse_profiles(raw_profiles: Optional[List[Dict[str, Any]]]) -> List[VMProfile]:
+        profiles: List[VMProfile] = []
+        seen = {VMPool.PRIMARY_NAME}
+        for raw in raw_profiles or []:
+            try:
+                name = str(raw.get('name') or '').strip()
+                vm_id = str(raw.get('vm_id') or '').strip()
+                if not name or not vm_id or name in seen or not VMPool.NAME_PATTERN.match(name):
+                    logging.warning(f"잘못되었거나 중복된 VM 프로필을 무시합니다: {raw}")
+                    continue
+                folders = raw.get('folders') or []
+                if isinstance(folders, str):
+                    folders = [folders]
+                cpu_threshold = raw.get('cpu_threshold')
+                threshold_count = raw.get('threshold_count')
+                profiles.append(VMProfile(
+                    name=name,
+                    node_name=str(raw.get('node_name') or '').strip(),
+                    vm_id=vm_id,
+                    folders=[str(folder) for folder in folders],
+                    shutdown_webhook_url=str(raw.get('shutdown_webhook_url') or ''),
+                    cpu_threshold=float(cpu_threshold) if cpu_threshold is not None else None,
+                    threshold_count=int(threshold_count) if threshold_count is not None else None,
+                    ready_host=str(raw.get('ready_host') or '').strip(),
+                    share_name=str(raw.get('share_name') or '').strip(),
+                ))
+                seen.add(name)
+            except (AttributeError, TypeError, ValueError) as e:
+                logging.warning(f"VM 프로필 파싱 실패 ({raw}): {e}")
+        return profiles
+
+    def start(self) -> None:
+        """추가 VM 프로필의 상태 폴러 시작 (기본 VM 폴러는 GShareManager가 시작)"""
+        for runtime in self.secondary:
+            runtime.poller.start()
+
+    def __iter__(self):
+        yield self.primary
+        yield from self.secondary
+
+    def route(self, folder: str) -> List[VMRuntime]:
+        """폴더를 담당할 VM 목록 (추가 프로필 규칙에 맞지 않으면 기본 VM)"""
+        matched = [runtime for runtime in self.secondary if runtime.profile.matches(folder)]
+        return matched or [self.primary]
+
+    def get(self, name: str) -> Optional[VMRuntime]:
+        for runtime in self:
+            if runtime.name == name:
+                return runtime
+        return None
+
+    def any_running(self, exclude: Optional[VMRuntime] = None) -> bool:
+        """exclude를 제외한 VM 중 실행 중인 VM이 있는지 확인 (공유 SMB 서버 비활성화 판단용)"""
+        for runtime in self:
+            if runtime is exclude:
+                continue
+            if runtime.status.vm_running:
+                return True
+        return False
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+
+@dataclass(frozen=True)
+class VMStatusSnapshot:
+    """특정 시점의 VM 상태 (불변 객체로 통째로 교체되므로 읽는 쪽은 잠금이 필요 없다)"""
+    vm_running: bool = False
+    cpu_usage: float = 0.0
+    uptime: Optional[float] = None
+    fetched_at: float = 0.0
+    # 마지막 조회가 실패해 이전 값을 유지 중인지 여부
+    stale: bool = True
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at if self.fetched_at else float('inf')
+
+
+class VMStatusPoller:
+    """백그라운드에서 VM 상태를 주기적으로 조회해 최신 스냅샷을 유지하는 폴러
+
+    update_state, 웹 요청, 이벤트 처리 등은 Proxmox를 직접 호출하지 않고 snapshot만 읽는다.
+    start/stop 직후(상태 전환 구간)에는 transition_interval 간격으로 더 자주 조회한다.
+    """
+
+    def __init__(self, proxmox_api: Any, interval: float = 5.0, transition_interval: float = 1.0,
+                 on_change: Optional[Callable[[VMStatusSnapshot], None]] = None):
+        self.proxmox_api = proxmox_api
+        self.interval = max(0.5, interval)
+        self.transition_interval = max(0.2, transition_interval)
+        self.on_change = on_change
+        self.snapshot = VMStatusSnapshot()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """첫 스냅샷을 동기적으로 만든 뒤 폴링 스레드를 시작"""
+        self.poll_once()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='vm-status-poller', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+
+    def refresh_soon(self) -> None:
+        """다음 주기를 기다리지 않고 즉시 다시 조회하도록 요청"""
+        self._wakeup.set()
+
+    def poll_once(self) -> VMStatusSnapshot:
+        previous = self.snapshot
+        try:
+            data = self.proxmox_api.fetch_vm_status()
+            snapshot = VMStatusSnapshot(
+                vm_running=data.get('status') == 'running',
+                cpu_usage=float(data.get('cpu') or 0.0) * 100,
+                uptime=data.get('uptime'),
+                fetched_at=time.time(),
+                stale=False,
+            )
+        except Exception as e:
+            logging.debug(f"VM 상태 폴링 실패 (이전 값 유지): {e}")
+            snapshot = VMStatusSnapshot(previous.vm_running, previous.cpu_usage, previous.uptime,
+                                        previous.fetched_at, stale=True)
+
+        self.snapshot = snapshot
+        if self.on_change is not None and snapshot.vm_running != previous.vm_running:
+            try:
+                self.on_change(snapshot)
+            except Exception as e:
+                logging.error(f"VM 상태 변경 알림 처리 오류: {e}")
+        return snapshot
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            interval = self.transition_interval if self.proxmox_api.in_transition else self.interval
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                return
+            self.poll_once()
@@ -278,6 +278,17 @@ class GshareWebServer:
                               'get_scan_status', self.get_scan_status)
         self.app.add_url_rule('/api/toggle_feature', 'toggle_feature',
                               self.toggle_feature, methods=['POST'])
+        self.app.add_url_rule('/api/proxmox/status-cache', 'proxmox_status_cache',
+                              self.proxmox_status_cache)
+        self.app.add_url_rule('/api/proxmox/metrics', 'proxmox_metrics',
+                              self.proxmox_metrics)
+        self.app.add_url_rule('/api/vm/lifecycle', 'vm_lifecycle_stats',
+                              self.vm_lifecycle_stats)
+        self.app.add_url_rule('/api/history', 'get_history', self.get_history)
+        self.app.add_url_rule('/api/smb/activity', 'smb_activity_status',
+                              self.smb_activity_status)
+        self.app.add_url_rule('/api/consumed', 'share_consumed',
+                              self.share_consumed, methods=['GET', 'POST'])
 
         # SocketIO 이벤트 핸들러 등록
         self._register_socket_events()
@@ -578,9 +589,13 @@ class GshareWebServer:
             if hasattr(self.manager, 'touch_event_relay'):
                 self.manager.touch_event_relay()
 
+            # 릴레이가 업로드 활동 시작을 알리면 이벤트 도착 전에 VM 사전 기동 (설정 시)
+            if payload.get('activity') or payload.get('burst'):
+                if self.manager.vm_lifecycle.handle_relay_activity():
+                    self.manager.last_action = 'VM 사전 기동(릴레이 활동)'
+
             if is_health_signal and not folder:
-                self.manager.current_state = self.manager.update_state(update_monitored_folders=False)
-                self.emit_state_update()
+                self.manager.request_state_refresh()
                 return jsonify({"status": "success", "message": "헬스 신호 수신 완료"})
 
             if not folder:
@@ -590,10 +605,12 @@ class GshareWebServer:
             if not success:
                 return jsonify({"status": "error", "message": f"이벤트 처리 실패: {detail}"}), 500
 
-            self.manager.current_state = self.manager.update_state(update_monitored_folders=True)
-            self.emit_state_update()
-            if self.manager.mqtt_manager:
-                self.manager.mqtt_manager.publish_state(self.manager.current_state)
+            if self.manager.config.EVENT_BATCH_WINDOW > 0:
+                # 묶음 처리 후 모니터 루프에서 상태를 갱신하므로 큐에 넣은 즉시 응답
+                return jsonify({"status": "success", "message": "이벤트 수신 완료", "queued": detail})
+
+            # 상태 재계산/전송은 모니터 루프에서 합쳐서 1회 수행 (이벤트 폭주 시 중복 계산 방지)
+            self.manager.request_state_refresh(update_monitored_folders=True)
 
             return jsonify({"status": "success", "message": "이벤트 처리 완료", "mounted": detail})
         except Exception as e:
@@ -787,7 +804,7 @@ class GshareWebServer:
             if vm_running:
                 return jsonify({"status": "error", "message": "VM이 이미 실행 중입니다."}), 400
 
-            if self.manager.proxmox_api.start_vm():
+            if self.manager.vm_lifecycle.wake('웹 UI') is not None:
                 return jsonify({"status": "success", "message": "VM 시작이 요청되었습니다."})
             else:
                 return jsonify({"status": "error", "message": "VM 시작 실패"}), 500
@@ -867,7 +884,7 @@ class GshareWebServer:
             # VM 내부에서 15분 연속 종료 신호를 요청한 경우에만 동일한 종료 워크플로우를 수행
             self.manager._run_vm_shutdown_workflow()
 
-            if self.manager.proxmox_api.stop_vm():
+            if self.manager.vm_lifecycle.sleep() is not None:
                 self.vm_stop_window_start = 0.0
                 self.vm_stop_last_signal = 0.0
                 return jsonify({"status": "success", "message": "VM stop 명령이 전송되었습니다."}), 200
@@ -917,13 +934,12 @@ class GshareWebServer:
             
             # 2. 마운트 동작 수행
             if action == 'mount':
-                # 2-1. 폴더 일괄 마운트
-                for folder in folders:
-                    if self.manager.smb_manager.create_symlink(folder):
-                        success_count += 1
-                    else:
-                        fail_count += 1
-                        logging.error(f"일괄 마운트 중 폴더 마운트 실패: {folder}")
+                # 2-1. 폴더 일괄 마운트 (소유권 확인 1회, 바뀐 항목만 생성)
+                mounted, failed = self.manager.smb_manager.create_symlinks(folders)
+                success_count += len(mounted)
+                fail_count += len(failed)
+                for folder in failed:
+                    logging.error(f"일괄 마운트 중 폴더 마운트 실패: {folder}")
 
                 # 2-2. 파일 일괄 마운트 (links_dir/file_name 위치에 단일 심링크 생성)
                 for subfolder, file_names in files_by_subfolder.items():
@@ -965,21 +981,12 @@ class GshareWebServer:
                             logging.error(f"일괄 해제 중 파일 심링크 제거 실패: {target}")
 
                 # 2-3. 남은 심볼릭 링크 존재 여부 확인 및 최종 SMB 비활성화 여부 판단 (단 한 번만 실행!)
-                remaining_symlinks = len(self.manager.smb_manager._active_links) > 0
-                if not remaining_symlinks and os.path.exists(self.manager.smb_manager.links_dir):
-                    remaining_symlinks = any(
-                        (os.path.islink(os.path.join(self.manager.smb_manager.links_dir, filename)) or 
-                         (os.path.isdir(os.path.join(self.manager.smb_manager.links_dir, filename)) and filename != ".tmp"))
-                        for filename in os.listdir(self.manager.smb_manager.links_dir)
-                    )
-                
-                if not remaining_symlinks:
+                if not self.manager.smb_manager.has_shared_resources():
                     logging.info("일괄 해제 완료: 남은 공유 리소스가 없어 SMB 공유를 비활성화합니다.")
                     self.manager.smb_manager.deactivate_smb_share()
 
-            # 전체 감시 폴더 마운트 상태 갱신 (1회만 호출하여 전체 동기화)
-            self.manager.current_state = self.manager.update_state(update_monitored_folders=True)
-            self.emit_state_update()
+            # 전체 감시 폴더 마운트 상태 갱신 (1회만 요청하여 전체 동기화)
+            self.manager.request_state_refresh(update_monitored_folders=True)
             
             return jsonify({
                 "status": "success", 
@@ -1014,8 +1021,7 @@ class GshareWebServer:
 
             ok, detail = self.manager.bulk_mount_recent(days=days)
 
-            self.manager.current_state = self.manager.update_state(update_monitored_folders=True)
-            self.emit_state_update()
+            self.manager.request_state_refresh(update_monitored_folders=True)
 
             if ok:
                 return jsonify({"status": "success", "message": f"최근 {days}일 이내 폴더 일괄 공유: {detail}", "days": days}), 200
@@ -1030,33 +1036,35 @@ class GshareWebServer:
             if self.manager is None:
                 return jsonify({"status": "error", "message": "서버가 아직 초기화되지 않았습니다."}), 404
 
-            # 실제 심볼릭 링크(또는 파일 공유 디렉토리)가 존재하는지 확인
-            links_dir = self.manager.smb_manager.links_dir
+            # 실제 심볼릭 링크(또는 파일 공유 디렉토리)가 존재하는지 확인 (VM 프로필별 공유 포함)
             normalized_folder = folder.replace(os.sep, '_')
-            target_path = os.path.join(links_dir, normalized_folder)
-            
+
             # 마운트 여부 판단
             is_mounted = False
-            if os.path.exists(target_path):
-                if os.path.islink(target_path):
-                    # 폴더 단위 마운트인 경우
-                    is_mounted = True
-                elif os.path.isdir(target_path):
-                    # 파일 단위 마운트인 경우 (디렉토리 내부에 실제 파일 링크가 있음)
-                    parts = folder.split('/')
-                    file_name = parts[-1] if parts else ""
-                    link_file = os.path.join(target_path, file_name)
-                    if os.path.exists(link_file) and os.path.islink(link_file):
-                        is_mounted = True
-
-            # 파일 단위 공유: links_dir/file_name 위치의 단일 심링크 검사
-            if not is_mounted:
-                parts = folder.rsplit('/', 1)
-                if len(parts) > 1:
-                    file_name = parts[1]
-                    file_link_path = os.path.join(links_dir, file_name)
-                    if os.path.lexists(file_link_path) and os.path.islink(file_link_path):
+            for links_dir in self.manager.smb_manager.links_dirs():
+                target_path = os.path.join(links_dir, normalized_folder)
+                if os.path.exists(target_path):
+                    if os.path.islink(target_path):
+                        # 폴더 단위 마운트인 경우
                         is_mounted = True
+                    elif os.path.isdir(target_path):
+                        # 파일 단위 마운트인 경우 (디렉토리 내부에 실제 파일 링크가 있음)
+                        parts = folder.split('/')
+                        file_name = parts[-1] if parts else ""
+                        link_file = os.path.join(target_path, file_name)
+                        if os.path.exists(link_file) and os.path.islink(link_file):
+                            is_mounted = True
+
+                # 파일 단위 공유: links_dir/file_name 위치의 단일 심링크 검사
+                if not is_mounted:
+                    parts = folder.rsplit('/', 1)
+                    if len(parts) > 1:
+                        file_name = parts[1]
+                        file_link_path = os.path.join(links_dir, file_name)
+                        if os.path.lexists(file_link_path) and os.path.islink(file_link_path):
+                            is_mounted = True
+                if is_mounted:
+                    break
 
             # 실제 대상이 파일인지 폴더인지 구분
             source_path = os.path.join(self.manager.config.MOUNT_PATH, folder)
@@ -1111,14 +1119,13 @@ class GshareWebServer:
                 return jsonify({"status": "error", "message": "존재하지 않거나 폴더가 아닙니다."}), 400
 
             files = []
-            links_dir = self.manager.smb_manager.links_dir
+            links_dirs = self.manager.smb_manager.links_dirs()
 
             for name in os.listdir(abs_path):
                 full_file_path = os.path.join(abs_path, name)
                 if os.path.isfile(full_file_path):
-                    # 마운트 상태 체크: 파일 단위 공유는 links_dir/file_name에 단일 심링크
-                    is_mounted = os.path.lexists(os.path.join(links_dir, name)) and \
-                                 os.path.islink(os.path.join(links_dir, name))
+                    # 마운트 상태 체크: 파일 단위 공유는 (프로필별) links_dir/file_name에 단일 심링크
+                    is_mounted = any(os.path.islink(os.path.join(links_dir, name)) for links_dir in links_dirs)
 
                     mtime = os.path.getmtime(full_file_path)
                     mtime_str = datetime.fromtimestamp(mtime, self.manager.local_tz).strftime('%Y-%m-%d %H:%M:%S')
@@ -1183,7 +1190,8 @@ class GshareWebServer:
                 is_mounted = self._is_nfs_mount_present(mount_path, self.manager.config.NFS_PATH)
                         
                 if is_mounted:
-                    # NFS 마운트 해제 시도
+                    # 진행 중인 폴더 스캔 중단 후 NFS 마운트 해제 시도
+                    self.manager.folder_monitor.cancel_scan()
                     logging.debug(f"기존 NFS 마운트 해제 시도: {mount_path}")
                     subprocess.run(["umount", "-f", mount_path], stderr=subprocess.PIPE, check=False)
                     logging.debug("NFS 마운트 해제 명령 실행 완료")
@@ -1404,6 +1412,8 @@ class GshareWebServer:
             elif feature == 'polling':
                 self.manager.config.POLLING_ENABLED = enabled
                 config_update['POLLING_ENABLED'] = enabled
+                if not enabled:
+                    self.manager.folder_monitor.cancel_scan()
                 logging.info(f"폴링 모드 {'활성화' if enabled else '비활성화'}")
 
             elif feature == 'event':
@@ -1440,8 +1450,7 @@ class GshareWebServer:
             GshareConfig.update_yaml_config(config_update)
 
             # 상태 업데이트 트리거
-            self.manager.current_state = self.manager.update_state(update_monitored_folders=False)
-            self.emit_state_update()
+            self.manager.request_state_refresh()
 
             return jsonify({"status": "success", "message": f"{feature} 기능이 {'활성화' if enabled else '비활성화'}되었습니다."})
 
@@ -1449,6 +1458,92 @@ class GshareWebServer:
             logging.error(f"기능 토글 중 오류: {e}")
             return jsonify({"status": "error", "message": str(e)}), 500
 
+    def proxmox_status_cache(self):
+        """Proxmox VM 상태 캐시 적중/미스 통계 반환"""
+        if not self.manager:
+            return jsonify({"status": "error", "message": "초기화 중입니다."}), 503
+        stats = {runtime.name: runtime.api.get_status_cache_stats() for runtime in self.manager.vm_pool}
+        return jsonify({"status": "success", "stats": stats})
+
+    def proxmox_metrics(self):
+        """Proxmox API 엔드포인트별 지연 히스토그램, 회로 차단기 상태, 상태 캐시 통계 반환"""
+        if not self.manager:
+            return jsonify({"status": "error", "message": "초기화 중입니다."}), 503
+        metrics = self.manager.proxmox_api.get_latency_stats()
+        metrics['status_cache'] = {runtime.name: runtime.api.get_status_cache_stats()
+                                   for runtime in self.manager.vm_pool}
+        metrics['pending_tasks'] = self.manager.proxmox_api.task_tracker.pending_count()
+        return jsonify({"status": "success", "metrics": metrics})
+
+    def vm_lifecycle_stats(self):
+        """VM 깨우기 방식과 이벤트→VM 준비 지연 통계 반환"""
+        if not self.manager:
+            return jsonify({"status": "error", "message": "초기화 중입니다."}), 503
+        return jsonify({"status": "success", "stats": self.manager.vm_lifecycle.stats()})
+
+    def smb_activity_status(self):
+        """SMB 읽기 활동 감지 상태 (열린 파일, 누적 읽기 카운터, 무활동 샘플 수) 반환"""
+        if not self.manager or self.manager.smb_activity is None:
+            return jsonify({"status": "error", "message": "SMB 활동 감지가 비활성화되어 있습니다."}), 503
+        return jsonify({"status": "success", "activity": self.manager.smb_activity.status()})
+
+    def share_consumed(self):
+        """공유 항목 소비(읽기 완료) 추적 상태 조회(GET) 또는 VM 측 완료 통보(POST)
+
+        POST 본문: {"paths": ["폴더 또는 파일 상대 경로", ...]} (안드로이드 VM IP만 허용)
+        """
+        try:
+            if not self.manager or self.manager.share_consumption is None:
+                return jsonify({"status": "error", "message": "공유 소비 추적이 비활성화되어 있습니다."}), 503
+
+            if request.method == 'GET':
+                return jsonify({"status": "success", "consumption": self.manager.share_consumption.status()})
+
+            android_ip = getattr(self.config, 'ANDROID_VM_IP', '')
+            if not android_ip or request.remote_addr != android_ip:
+                logging.warning(f"허용되지 않은 IP에서 공유 소비 통보 시도: {request.remote_addr}")
+                return jsonify({"status": "error", "message": "접근이 거부되었습니다."}), 403
+
+            paths = (request.get_json(silent=True) or {}).get('paths') or []
+            if isinstance(paths, str):
+                paths = [paths]
+            marked = self.manager.share_consumption.mark_consumed(str(p) for p in paths)
+            retired = self.manager.retire_consumed_shares()
+            return jsonify({"status": "success", "marked": marked, "retired": retired})
+        except Exception as e:
+            logging.error(f"공유 소비 처리 중 오류: {e}")
+            return jsonify({"status": "error", "message": str(e)}), 500
+
+    def get_history(self):
+        """기록 범위 조회 (resolution: raw=원본, rollup=집계, sessions=VM 세션/가동 시간)
+
+        쿼리 파라미터: start/end(epoch 초, 기본 최근 24시간), kind(쉼표 구분), step(집계 간격 초), limit
+        """
+        try:
+            if not self.manager or self.manager.history is None:
+                return jsonify({"status": "error", "message": "기록 저장소가 비활성화되어 있습니다."}), 503
+
+            now = time.time()
+            end = float(request.args.get('end') or now)
+            start = float(request.args.get('start') or end - 86400)
+            kinds = [k.strip() for k in (request.args.get('kind') or '').split(',') if k.strip()] or None
+            resolution = request.args.get('resolution', 'rollup')
+            history = self.manager.history
+
+            if resolution == 'raw':
+                limit = min(int(request.args.get('limit') or 5000), 50000)
+                data = history.query(start, end, kinds, limit=limit)
+            elif resolution == 'sessions':
+                data = history.vm_sessions(start, end)
+            else:
+                data = history.rollups(start, end, kinds, step=int(request.args.get('step') or history.ROLLUP_SECONDS))
+            return jsonify({"status": "success", "start": start, "end": end, "resolution": resolution, "data": data})
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"잘못된 파라미터: {e}"}), 400
+        except Exception as e:
+            logging.error(f"기록 조회 오류: {e}")
+            return jsonify({"status": "error", "message": str(e)}), 500
+
     def get_scan_status(self):
         """현재 트랜스코딩 스캔 상태 반환 (새로고침 후 복구용)"""
         try:
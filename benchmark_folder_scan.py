@@ -0,0 +1,108 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+
+import folder_walker  # noqa: E402
+from folder_walker import ParallelFolderWalker  # noqa: E402
+
+
+FIND_CMD = [
+    'find', '.',
+    '-mindepth', '1',
+    '-type', 'd',
+    '(', '-name', '@*', '-o', '-name', '.*', '-o', '-name', '#recycle', ')',
+    '-prune', '-o',
+    '-type', 'd',
+    '-printf', r'%T@\t%P\n'
+]
+
+
+def create_synthetic_tree(root, depth=4, fanout=8):
+    """depth/fanout 기반 합성 디렉토리 트리 생성 (제외 대상 @eaDir/.hidden 포함)"""
+    count = 0
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fanout):
+                path = os.path.join(parent, f"dir{i}")
+                os.mkdir(path)
+                next_level.append(path)
+                count += 1
+            os.mkdir(os.path.join(parent, '@eaDir'))
+            os.mkdir(os.path.join(parent, '.hidden'))
+        level = next_level
+    return count
+
+
+def scan_with_find(root):
+    process = subprocess.Popen(FIND_CMD, cwd=root, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True)
+    results = {}
+    for line in process.stdout:
+        mtime, path = line.rstrip('\n').split('\t', 1)
+        results[path] = float(mtime)
+    process.wait()
+    return results
+
+
+def scan_with_walker(root, workers):
+    walker = ParallelFolderWalker(root, max_workers=workers)
+    return {path: mtime for mtime, path in walker.iter_records()}
+
+
+def measure(label, func, *args):
+    start_time = time.time()
+    results = func(*args)
+    duration = time.time() - start_time
+    print(f"{label}: {duration:.4f} seconds ({len(results)} folders)")
+    return results
+
+
+def run_benchmark():
+    # 인자로 실제 마운트 경로(예: /mnt/gshare)를 주면 해당 경로를 측정한다.
+    target = sys.argv[1] if len(sys.argv) > 1 else None
+    simulated_latency = float(os.environ.get('SIMULATED_LATENCY_MS', '2')) / 1000
+
+    temp_dir = None
+    if target is None:
+        temp_dir = tempfile.mkdtemp(prefix='gshare_scan_bench_')
+        print("Creating synthetic tree...")
+        count = create_synthetic_tree(temp_dir)
+        print(f"Created {count} folders in {temp_dir}")
+        target = temp_dir
+
+    try:
+        print("\n--- Local filesystem ---")
+        expected = measure("find", scan_with_find, target)
+        for workers in (1, 8, 16):
+            result = measure(f"threaded walker ({workers} workers)", scan_with_walker, target, workers)
+            assert result.keys() == expected.keys(), "walker 결과가 find 결과와 다릅니다"
+
+        if temp_dir is not None and simulated_latency > 0:
+            # 로컬 디스크에는 NFS 왕복 지연이 없으므로 scandir 호출마다 지연을 주입해 비교한다.
+            print(f"\n--- Simulated NFS latency ({simulated_latency * 1000:.1f}ms per directory) ---")
+            original_scandir = os.scandir
+
+            def slow_scandir(path):
+                time.sleep(simulated_latency)
+                return original_scandir(path)
+
+            folder_walker.os.scandir = slow_scandir
+            try:
+                for workers in (1, 8, 16):
+                    measure(f"threaded walker ({workers} workers)", scan_with_walker, target, workers)
+            finally:
+                folder_walker.os.scandir = original_scandir
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,82 @@
+import os
+import random
+import sys
+import time
+from bisect import bisect_right
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+
+from path_trie import PathTrie  # noqa: E402
+
+
+def generate_paths(count, seed=42):
+    """깊이 1~6의 합성 폴더 경로 생성 (상위 폴더와 하위 폴더가 섞이도록)"""
+    rng = random.Random(seed)
+    paths = set()
+    while len(paths) < count:
+        depth = rng.randint(1, 6)
+        paths.add('/'.join(f"d{rng.randint(0, 30)}" for _ in range(depth)))
+    return list(paths)
+
+
+def filter_legacy(folders):
+    """기존 구현: bisect 하위 폴더 확인 + 선택된 마운트 전체 선형 순회"""
+    lexicographic_paths = sorted(set(folders))
+
+    def has_child_folder(path):
+        next_idx = bisect_right(lexicographic_paths, path)
+        return next_idx < len(lexicographic_paths) and lexicographic_paths[next_idx].startswith(path + '/')
+
+    final_mounts = set()
+    for path in sorted(folders, key=lambda p: len(p.split('/'))):
+        if any(path.startswith(mount + '/') for mount in final_mounts):
+            continue
+        if not has_child_folder(path):
+            final_mounts.add(path)
+    return final_mounts
+
+
+def filter_trie(folders):
+    """PathTrie 구현: 포함/하위 확인 모두 O(depth)"""
+    changed_trie = PathTrie(folders)
+    final_mounts = PathTrie()
+    selected = set()
+    for path in sorted(set(folders), key=lambda p: len(p.split('/'))):
+        if final_mounts.is_covered(path):
+            continue
+        if not changed_trie.has_descendant(path):
+            final_mounts.add(path)
+            selected.add(path)
+    return selected
+
+
+def measure(label, func, *args):
+    start_time = time.time()
+    result = func(*args)
+    duration = time.time() - start_time
+    print(f"{label}: {duration:.4f} seconds ({len(result)} mounts)")
+    return result
+
+
+def run_benchmark():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    # 기존 구현은 O(n·m)이라 50k에서는 수십 분이 걸리므로 작은 크기에서만 비교 측정한다.
+    legacy_limit = int(os.environ.get('LEGACY_MAX_PATHS', '10000'))
+
+    for size in sorted({min(count, 5000), min(count, legacy_limit), count}):
+        folders = generate_paths(size)
+        print(f"\n--- {len(folders)} synthetic paths ---")
+        trie_result = measure("PathTrie", filter_trie, folders)
+        if size <= legacy_limit:
+            legacy_result = measure("Legacy (linear is_covered)", filter_legacy, folders)
+            assert trie_result == legacy_result, "결과가 서로 다릅니다"
+
+        shared = PathTrie(trie_result)
+        start_time = time.time()
+        for path in folders:
+            shared.is_covered(path, include_self=True)
+        print(f"is_ancestor_shared lookups (trie): {time.time() - start_time:.4f} seconds ({len(folders)} lookups)")
+
+
+if __name__ == "__main__":
+    run_benchmark()